@@ -0,0 +1,1139 @@
+import argparse
+import csv
+import gzip
+import json
+import os
+import sqlite3
+import threading
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from metrics import STAGE_SECONDS
+
+try:
+    import fcntl
+except ImportError:  # Windows, writers then rely on busy_timeout alone
+    fcntl = None
+
+
+# Determine the log directory
+def get_log_directory():
+    # First try to use user's home directory
+    try:
+        home_dir = Path.home()
+        log_dir = home_dir / "marketmap" / "logs"
+        log_dir.mkdir(parents=True, exist_ok=True)
+        return log_dir
+    except Exception:
+        # Fall back to current directory if home is not available
+        fallback_dir = Path(".") / "logs"
+        fallback_dir.mkdir(exist_ok=True)
+        return fallback_dir
+
+
+# Get log directory and create db path
+log_dir = get_log_directory()
+db_path = log_dir / "analytics.db"
+# Raw events in one SQLite file per UTC day, and the compressed exports of the
+# days rotated out of there. analytics.db then only holds the rollups.
+partition_dir = log_dir / "partitions"
+archive_dir = log_dir / "archive"
+
+PARTITION_PREFIX = "analytics-"
+ARCHIVE_FORMATS = ("ndjson", "csv")
+
+
+ANALYTICS_TABLE = """
+        CREATE TABLE IF NOT EXISTS analytics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT,
+            type TEXT,
+            event TEXT,
+            data TEXT,
+            timestamp TEXT,
+            received_at TEXT,
+            session_context TEXT
+        )
+        """
+
+# Normalized schema: session context stored once per session, (type, event)
+# pairs coded as integers and times as epoch milliseconds
+COMPACT_TABLES = (
+    """
+        CREATE TABLE IF NOT EXISTS sessions (
+            id INTEGER PRIMARY KEY,
+            session_key TEXT NOT NULL UNIQUE,
+            context TEXT,
+            first_seen INTEGER
+        )
+        """,
+    """
+        CREATE TABLE IF NOT EXISTS event_kinds (
+            id INTEGER PRIMARY KEY,
+            type TEXT NOT NULL,
+            event TEXT NOT NULL,
+            UNIQUE (type, event)
+        )
+        """,
+    """
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY,
+            session_id INTEGER NOT NULL REFERENCES sessions (id),
+            event INTEGER NOT NULL REFERENCES event_kinds (id),
+            data TEXT,
+            timestamp INTEGER,
+            received_at INTEGER
+        )
+        """,
+    "CREATE INDEX IF NOT EXISTS events_session_time ON events (session_id, timestamp)",
+    "CREATE INDEX IF NOT EXISTS events_event_time ON events (event, timestamp)",
+    # Same columns as the legacy analytics table, for ad-hoc queries
+    """
+        CREATE VIEW IF NOT EXISTS analytics_events AS
+        SELECT events.id, sessions.session_key AS session_id, event_kinds.type,
+               event_kinds.event, events.data, events.timestamp,
+               events.received_at, sessions.context AS session_context
+        FROM events
+        JOIN sessions ON sessions.id = events.session_id
+        JOIN event_kinds ON event_kinds.id = events.event
+        """,
+)
+
+# Legacy partitions get the view too, so every partition can be queried alike
+LEGACY_EVENTS_VIEW = """
+        CREATE VIEW IF NOT EXISTS analytics_events AS
+        SELECT id, session_id, type, event, data, timestamp, received_at,
+               session_context
+        FROM analytics
+        """
+
+EVENT_COLUMNS = (
+    "id",
+    "session_id",
+    "type",
+    "event",
+    "data",
+    "timestamp",
+    "received_at",
+    "session_context",
+)
+
+
+class WriteLock:
+    """
+    Exclusive lock on a file next to the database, held around every write.
+
+    Each worker process runs its own AnalyticsWriter on the same database.
+    Taking this lock first makes the writers queue in turn instead of
+    retrying on SQLITE_BUSY, which SQLite does by sleeping and polling.
+    """
+
+    def __init__(self, path):
+        self.path = f"{path}.lock"
+        self._fd: Optional[int] = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+# Initialize the database if it doesn't exist
+def init_analytics_db(schema: str = "legacy", partitioned: bool = False):
+    """
+    Create the rollup tables, and the event tables unless events are stored
+    in day partitions
+    """
+    lock = WriteLock(db_path)
+    conn = sqlite3.connect(str(db_path), timeout=30)
+    try:
+        with lock:
+            if not partitioned:
+                SCHEMAS[schema]().create(conn)
+            create_rollup_tables(conn)
+            conn.commit()
+        if partitioned and has_raw_events(conn):
+            print(
+                "WARNING: analytics.db still holds raw events, run "
+                "`python analytics.py partition` to move them to day partitions"
+            )
+        elif schema == "compact" and has_legacy_rows(conn):
+            print(
+                "WARNING: analytics.db still holds rows in the legacy analytics "
+                "table, run `python analytics.py migrate` to move them"
+            )
+    finally:
+        conn.close()
+        lock.close()
+
+
+def has_legacy_rows(conn: sqlite3.Connection) -> bool:
+    table = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'analytics'"
+    ).fetchone()
+    if table is None:
+        return False
+    return conn.execute("SELECT 1 FROM analytics LIMIT 1").fetchone() is not None
+
+
+def has_raw_events(conn: sqlite3.Connection) -> bool:
+    """Whether the database holds events of either schema"""
+    if has_legacy_rows(conn):
+        return True
+    if not _has_table(conn, "events"):
+        return False
+    return conn.execute("SELECT 1 FROM events LIMIT 1").fetchone() is not None
+
+
+def to_epoch_ms(timestamp: str) -> Optional[int]:
+    """Convert an ISO 8601 timestamp to epoch milliseconds, None if invalid"""
+    try:
+        return int(datetime.fromisoformat(timestamp).timestamp() * 1000)
+    except (TypeError, ValueError):
+        return None
+
+
+# session_id, type, event, data, timestamp, received_at (epoch seconds),
+# session_context (JSON). data is a dict when submitted and JSON once stored.
+EventRow = Tuple[str, str, str, Any, str, float, str]
+
+INSERT_EVENT = (
+    "INSERT INTO analytics "
+    "(session_id, type, event, data, timestamp, received_at, session_context) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+class LegacySchema:
+    """One self-contained analytics row per event"""
+
+    def create(self, conn: sqlite3.Connection) -> None:
+        conn.execute(ANALYTICS_TABLE)
+
+    def insert(self, conn: sqlite3.Connection, rows: List[EventRow]) -> None:
+        conn.executemany(
+            INSERT_EVENT,
+            (
+                (session, type_, event, data, ts, _isoformat(received), ctx)
+                for session, type_, event, data, ts, received, ctx in rows
+            ),
+        )
+
+    def reset(self) -> None:
+        pass
+
+
+class CompactSchema:
+    """
+    Events reference their session and (type, event) pair by integer id.
+
+    Ids are cached per writer, reset() drops the caches after a rollback since
+    rows inserted by the failed transaction are gone.
+    """
+
+    # Bound on cached session ids, the cache starts over when it is full
+    MAX_CACHED_SESSIONS = 100_000
+
+    def __init__(self):
+        self._sessions: Dict[str, int] = {}
+        self._kinds: Dict[Tuple[str, str], int] = {}
+
+    def create(self, conn: sqlite3.Connection) -> None:
+        for statement in COMPACT_TABLES:
+            conn.execute(statement)
+
+    def insert(self, conn: sqlite3.Connection, rows: List[EventRow]) -> None:
+        events = []
+        for session, type_, event, data, ts, received, ctx in rows:
+            received_ms = int(received * 1000)
+            events.append(
+                (
+                    self._session_id(conn, session, ctx, received_ms),
+                    self._kind_id(conn, type_, event),
+                    data,
+                    to_epoch_ms(ts),
+                    received_ms,
+                )
+            )
+        conn.executemany(
+            "INSERT INTO events (session_id, event, data, timestamp, received_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            events,
+        )
+
+    def reset(self) -> None:
+        self._sessions.clear()
+        self._kinds.clear()
+
+    def _session_id(self, conn, session_key, context, received_ms) -> int:
+        session_id = self._sessions.get(session_key)
+        if session_id is None:
+            if len(self._sessions) >= self.MAX_CACHED_SESSIONS:
+                self._sessions.clear()
+            conn.execute(
+                "INSERT OR IGNORE INTO sessions (session_key, context, first_seen) "
+                "VALUES (?, ?, ?)",
+                (session_key, context, received_ms),
+            )
+            session_id = conn.execute(
+                "SELECT id FROM sessions WHERE session_key = ?", (session_key,)
+            ).fetchone()[0]
+            self._sessions[session_key] = session_id
+        return session_id
+
+    def _kind_id(self, conn, type_, event) -> int:
+        kind_id = self._kinds.get((type_, event))
+        if kind_id is None:
+            conn.execute(
+                "INSERT OR IGNORE INTO event_kinds (type, event) VALUES (?, ?)",
+                (type_, event),
+            )
+            kind_id = conn.execute(
+                "SELECT id FROM event_kinds WHERE type = ? AND event = ?",
+                (type_, event),
+            ).fetchone()[0]
+            self._kinds[(type_, event)] = kind_id
+        return kind_id
+
+
+SCHEMAS = {"legacy": LegacySchema, "compact": CompactSchema}
+
+# Aggregates kept up to date by the writer, so reads never scan raw events.
+# Hours are epoch seconds of the start of the hour the event was received in.
+ROLLUP_TABLES = (
+    """
+        CREATE TABLE IF NOT EXISTS rollup_hourly (
+            hour INTEGER NOT NULL,
+            type TEXT NOT NULL,
+            event TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (hour, type, event)
+        ) WITHOUT ROWID
+        """,
+    """
+        CREATE TABLE IF NOT EXISTS rollup_session_hours (
+            hour INTEGER NOT NULL,
+            session_id TEXT NOT NULL,
+            PRIMARY KEY (hour, session_id)
+        ) WITHOUT ROWID
+        """,
+    """
+        CREATE TABLE IF NOT EXISTS rollup_booth_views (
+            label TEXT PRIMARY KEY,
+            count INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """,
+    """
+        CREATE TABLE IF NOT EXISTS rollup_routes (
+            origin TEXT NOT NULL,
+            destination TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (origin, destination)
+        ) WITHOUT ROWID
+        """,
+    "CREATE INDEX IF NOT EXISTS rollup_booth_views_count ON rollup_booth_views (count)",
+    "CREATE INDEX IF NOT EXISTS rollup_routes_count ON rollup_routes (count)",
+)
+
+ROLLUP_TABLE_NAMES = (
+    "rollup_hourly",
+    "rollup_session_hours",
+    "rollup_booth_views",
+    "rollup_routes",
+)
+
+
+def create_rollup_tables(conn: sqlite3.Connection) -> None:
+    for statement in ROLLUP_TABLES:
+        conn.execute(statement)
+
+
+def update_rollups(conn: sqlite3.Connection, rows: List[EventRow]) -> None:
+    """
+    Fold a batch of events into the rollup tables.
+
+    Every event counts towards its hour and (type, event). Events whose data
+    has a "label" count as a view of that booth, and events whose data has an
+    "origin" and a "destination" count as a request for that route.
+    """
+    hourly = Counter()
+    session_hours = set()
+    booth_views = Counter()
+    routes = Counter()
+
+    for session_id, type_, event, data, _, received, _ in rows:
+        hour = int(received // 3600) * 3600
+        hourly[(hour, type_, event)] += 1
+        session_hours.add((hour, session_id))
+        if not isinstance(data, dict):
+            continue
+        label = data.get("label")
+        if isinstance(label, str) and label:
+            booth_views[label] += 1
+        origin = data.get("origin")
+        destination = data.get("destination")
+        if isinstance(origin, str) and isinstance(destination, str):
+            routes[(origin, destination)] += 1
+
+    conn.executemany(
+        "INSERT INTO rollup_hourly (hour, type, event, count) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT DO UPDATE SET count = count + excluded.count",
+        ((hour, type_, event, n) for (hour, type_, event), n in hourly.items()),
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO rollup_session_hours (hour, session_id) VALUES (?, ?)",
+        session_hours,
+    )
+    conn.executemany(
+        "INSERT INTO rollup_booth_views (label, count) VALUES (?, ?) "
+        "ON CONFLICT DO UPDATE SET count = count + excluded.count",
+        booth_views.items(),
+    )
+    conn.executemany(
+        "INSERT INTO rollup_routes (origin, destination, count) VALUES (?, ?, ?) "
+        "ON CONFLICT DO UPDATE SET count = count + excluded.count",
+        ((origin, destination, n) for (origin, destination), n in routes.items()),
+    )
+
+
+def rebuild_rollups(
+    path, chunk_size: int = 10_000, partitions=None, archives=None
+) -> int:
+    """
+    Recompute the rollup tables from the raw events of both schemas, in the
+    database, in the day partitions in the partitions directory and in the
+    archives of the days rotated out of there.
+
+    For databases written before rollups existed. A day with both a
+    partition and an archive is read from the partition only. Returns the
+    number of events folded in.
+    """
+    conn = connect_writer(path)
+    folded = 0
+    try:
+        conn.execute("BEGIN")
+        create_rollup_tables(conn)
+        for table in ROLLUP_TABLE_NAMES:
+            conn.execute(f"DELETE FROM {table}")
+
+        days = partition_days(partitions) if partitions is not None else []
+        sources = [conn]
+        sources += [_connect_readonly(partition_path(partitions, day)) for day in days]
+        archived = archive_days(archives) if archives is not None else {}
+        try:
+            readers = [read_raw_events(source, chunk_size) for source in sources]
+            readers += [
+                read_archive(archive, chunk_size)
+                for day, archive in archived.items()
+                if day not in days
+            ]
+            for reader in readers:
+                for rows in reader:
+                    update_rollups(
+                        conn,
+                        [
+                            (s, t, e, _json_or_none(data), ts, received, ctx)
+                            for s, t, e, data, ts, received, ctx in rows
+                        ],
+                    )
+                    folded += len(rows)
+        finally:
+            for source in sources[1:]:
+                source.close()
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return folded
+
+
+def read_raw_events(
+    conn: sqlite3.Connection, chunk_size: int = 10_000
+) -> Iterator[List[EventRow]]:
+    """
+    The stored events of both schemas in chunks, as EventRow with the data
+    and session context still JSON text
+    """
+    if _has_table(conn, "analytics"):
+        cursor = conn.execute(
+            "SELECT session_id, type, event, data, timestamp, received_at, "
+            "session_context FROM analytics ORDER BY id"
+        )
+        while rows := cursor.fetchmany(chunk_size):
+            yield [
+                (s, t, e, data, ts, _epoch(received), ctx)
+                for s, t, e, data, ts, received, ctx in rows
+            ]
+    if _has_table(conn, "events"):
+        cursor = conn.execute(
+            "SELECT session_id, type, event, data, timestamp, received_at, "
+            "session_context FROM analytics_events ORDER BY id"
+        )
+        while rows := cursor.fetchmany(chunk_size):
+            yield [
+                (s, t, e, data, _ms_isoformat(ts), received / 1000, ctx)
+                for s, t, e, data, ts, received, ctx in rows
+            ]
+
+
+def read_archive(path, chunk_size: int = 10_000) -> Iterator[List[EventRow]]:
+    """
+    The events of a partition archive in chunks, as read_raw_events yields
+    them
+    """
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+        if ".csv." in Path(path).name:
+            events = csv.DictReader(f)
+        else:
+            events = (json.loads(line) for line in f if line.strip())
+        rows = []
+        for event in events:
+            data = event["data"]
+            context = event["session_context"]
+            if not isinstance(data, (str, type(None))):
+                data = json.dumps(data)
+            if not isinstance(context, (str, type(None))):
+                context = json.dumps(context)
+            timestamp = event["timestamp"]
+            received = event["received_at"]
+            # Compact partitions store epoch milliseconds, legacy ones ISO text
+            if isinstance(received, int) or str(received).isdigit():
+                timestamp = _ms_isoformat(int(timestamp)) if timestamp else None
+                received = int(received) / 1000
+            else:
+                received = _epoch(received)
+            rows.append(
+                (
+                    event["session_id"],
+                    event["type"],
+                    event["event"],
+                    data,
+                    timestamp,
+                    received,
+                    context,
+                )
+            )
+            if len(rows) == chunk_size:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+
+
+def analytics_summary(path, since: float, limit: int = 10) -> Dict[str, Any]:
+    """
+    Read the rollups: per-hour event and session counts since the given epoch
+    time, and the most viewed booths and most requested routes of all time.
+    """
+    conn = _connect_readonly(path)
+    try:
+        since_hour = int(since // 3600) * 3600
+        events_per_hour = [
+            {"hour": _hour_iso(hour), "type": type_, "event": event, "count": n}
+            for hour, type_, event, n in conn.execute(
+                "SELECT hour, type, event, count FROM rollup_hourly "
+                "WHERE hour >= ? ORDER BY hour, type, event",
+                (since_hour,),
+            )
+        ]
+        sessions_per_hour = [
+            {"hour": _hour_iso(hour), "sessions": n}
+            for hour, n in conn.execute(
+                "SELECT hour, COUNT(*) FROM rollup_session_hours "
+                "WHERE hour >= ? GROUP BY hour ORDER BY hour",
+                (since_hour,),
+            )
+        ]
+        top_booths = [
+            {"label": label, "views": n}
+            for label, n in conn.execute(
+                "SELECT label, count FROM rollup_booth_views "
+                "ORDER BY count DESC LIMIT ?",
+                (limit,),
+            )
+        ]
+        top_routes = [
+            {"origin": origin, "destination": destination, "count": n}
+            for origin, destination, n in conn.execute(
+                "SELECT origin, destination, count FROM rollup_routes "
+                "ORDER BY count DESC LIMIT ?",
+                (limit,),
+            )
+        ]
+    finally:
+        conn.close()
+
+    return {
+        "events_per_hour": events_per_hour,
+        "sessions_per_hour": sessions_per_hour,
+        "top_booths": top_booths,
+        "top_routes": top_routes,
+    }
+
+
+def _has_table(conn: sqlite3.Connection, name: str) -> bool:
+    return (
+        conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        ).fetchone()
+        is not None
+    )
+
+
+def _json_or_none(text):
+    try:
+        return json.loads(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def _hour_iso(hour: int) -> str:
+    return datetime.fromtimestamp(hour, timezone.utc).isoformat()
+
+
+def _isoformat(epoch_seconds: float) -> str:
+    return datetime.fromtimestamp(epoch_seconds).isoformat()
+
+
+def _ms_isoformat(epoch_ms: Optional[int]) -> Optional[str]:
+    if epoch_ms is None:
+        return None
+    return datetime.fromtimestamp(epoch_ms / 1000, timezone.utc).isoformat()
+
+
+def _connect_readonly(path) -> sqlite3.Connection:
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+
+def connect_writer(path) -> sqlite3.Connection:
+    """Open a connection tuned for a single long-lived writer"""
+    conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL + NORMAL only syncs at checkpoints, a crash loses at most the last commits
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-16000")
+    return conn
+
+
+def day_of(epoch_seconds: float) -> str:
+    """UTC day an event received at epoch_seconds is stored under"""
+    return datetime.fromtimestamp(epoch_seconds, timezone.utc).date().isoformat()
+
+
+def partition_path(directory, day: str) -> Path:
+    return Path(directory) / f"{PARTITION_PREFIX}{day}.db"
+
+
+def partition_days(directory) -> List[str]:
+    """Days with a partition in directory, oldest first"""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    days = []
+    for name in names:
+        if not (name.startswith(PARTITION_PREFIX) and name.endswith(".db")):
+            continue
+        day = name[len(PARTITION_PREFIX) : -len(".db")]
+        try:
+            date.fromisoformat(day)
+        except ValueError:
+            continue
+        days.append(day)
+    return sorted(days)
+
+
+def archive_days(directory) -> Dict[str, Path]:
+    """Day -> archive of the partitions rotated out to directory"""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return {}
+    archives = {}
+    for name in names:
+        day, _, suffix = name[len(PARTITION_PREFIX) :].partition(".")
+        if not name.startswith(PARTITION_PREFIX) or suffix not in (
+            f"{archive_format}.gz" for archive_format in ARCHIVE_FORMATS
+        ):
+            continue
+        try:
+            date.fromisoformat(day)
+        except ValueError:
+            continue
+        archives[day] = Path(directory) / name
+    return dict(sorted(archives.items()))
+
+
+def open_partition(directory, day: str, schema) -> sqlite3.Connection:
+    """Writer connection to a day's partition, creating its tables"""
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    conn = connect_writer(partition_path(directory, day))
+    schema.create(conn)
+    if isinstance(schema, LegacySchema):
+        conn.execute(LEGACY_EVENTS_VIEW)
+    return conn
+
+
+class AnalyticsWriter:
+    """
+    Buffers analytics events in memory and writes them from one thread.
+
+    submit() only appends to the buffer, so request handlers never touch
+    SQLite. The writer thread drains the buffer with executemany in group
+    commits of up to batch_size rows, or whatever has arrived after
+    flush_interval seconds. When the buffer holds max_buffer rows, submit()
+    refuses new events instead of growing without bound. Every write holds
+    the database's WriteLock, so writers in several worker processes take
+    turns.
+
+    With partitions, a directory, the events are stored in the partition of
+    the UTC day they were received on and only the rollups in the database,
+    so inserts always go to a file holding one day of events. The two
+    commits are not atomic: if the rollup commit fails after the events were
+    stored, `python analytics.py rollup` recomputes the rollups.
+    """
+
+    def __init__(
+        self,
+        path,
+        schema: str = "legacy",
+        partitions=None,
+        max_buffer: int = 50_000,
+        batch_size: int = 1_000,
+        flush_interval: float = 0.5,
+    ):
+        self.path = path
+        self.schema_name = schema
+        self.schema = SCHEMAS[schema]()
+        self.partitions = partitions
+        # day -> (connection, schema) of the partitions written recently, each
+        # with its own id caches
+        self._partitions: Dict[str, Tuple[sqlite3.Connection, Any]] = {}
+        self.max_buffer = max_buffer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._buffer: List[EventRow] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._lock = WriteLock(path)
+
+        # Counters, only for reporting
+        self.submitted = 0
+        self.written = 0
+        self.rejected = 0
+        self.failed = 0
+
+    @property
+    def depth(self) -> int:
+        """Number of buffered events not yet written"""
+        return len(self._buffer)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(
+            target=self._run, name="analytics-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Write everything still buffered and stop the writer thread"""
+        if self._thread is None:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join()
+        self._thread = None
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything submitted so far has been written"""
+        with self._cond:
+            target = self.submitted
+            self._cond.notify()
+            return self._cond.wait_for(
+                lambda: self.written + self.failed >= target, timeout
+            )
+
+    def submit(self, rows: List[EventRow]) -> bool:
+        """Queue rows for writing, False if the buffer is full"""
+        with self._cond:
+            if len(self._buffer) + len(rows) > self.max_buffer:
+                self.rejected += len(rows)
+                return False
+            self._buffer.extend(rows)
+            self.submitted += len(rows)
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+        return True
+
+    def _run(self) -> None:
+        conn = connect_writer(self.path)
+        with self._lock:
+            if self.partitions is None:
+                self.schema.create(conn)
+            create_rollup_tables(conn)
+        try:
+            while True:
+                with self._cond:
+                    if len(self._buffer) < self.batch_size and not self._stopping:
+                        self._cond.wait(self.flush_interval)
+                    rows = self._buffer
+                    self._buffer = []
+                    stopping = self._stopping
+
+                # Write in chunks so one commit never grows past batch_size
+                for start in range(0, len(rows), self.batch_size):
+                    self._write(conn, rows[start : start + self.batch_size])
+                if rows:
+                    with self._cond:
+                        self._cond.notify_all()
+
+                if stopping and not self._buffer:
+                    break
+        finally:
+            conn.close()
+            for partition, _ in self._partitions.values():
+                partition.close()
+            self._partitions.clear()
+            self._lock.close()
+
+    def _write(self, conn: sqlite3.Connection, rows: List[EventRow]) -> None:
+        encoded = [
+            (session_id, type_, event, json.dumps(data), ts, received, ctx)
+            for session_id, type_, event, data, ts, received, ctx in rows
+        ]
+        try:
+            with STAGE_SECONDS.time("analytics_commit"), self._lock:
+                if self.partitions is not None:
+                    self._write_partitions(encoded)
+                conn.execute("BEGIN IMMEDIATE")
+                if self.partitions is None:
+                    self.schema.insert(conn, encoded)
+                update_rollups(conn, rows)
+                conn.execute("COMMIT")
+            self.written += len(rows)
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            self.schema.reset()
+            self.failed += len(rows)
+            print(f"WARNING: Failed to store {len(rows)} analytics events: {e}")
+
+    def _write_partitions(self, rows: List[EventRow]) -> None:
+        by_day: Dict[str, List[EventRow]] = {}
+        for row in rows:
+            by_day.setdefault(day_of(row[5]), []).append(row)
+        for day, day_rows in sorted(by_day.items()):
+            conn, schema = self._partition(day)
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                schema.insert(conn, day_rows)
+                conn.execute("COMMIT")
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                schema.reset()
+                raise
+
+    def _partition(self, day: str) -> Tuple[sqlite3.Connection, Any]:
+        partition = self._partitions.get(day)
+        if partition is None:
+            schema = SCHEMAS[self.schema_name]()
+            partition = (open_partition(self.partitions, day, schema), schema)
+            self._partitions[day] = partition
+            # Keep the previous day open for events received around midnight,
+            # close older ones so rotation can remove their files
+            previous = (date.fromisoformat(day) - timedelta(days=1)).isoformat()
+            for old in [d for d in self._partitions if d < previous]:
+                self._partitions.pop(old)[0].close()
+        return partition
+
+
+def migrate_to_compact(path, chunk_size: int = 10_000) -> int:
+    """
+    Move every row of the legacy analytics table into the compact schema.
+
+    Runs in one transaction and drops the legacy table at the end, then
+    vacuums the file to give the space back. Returns the number of rows moved.
+    """
+    conn = connect_writer(path)
+    schema = CompactSchema()
+    moved = 0
+    try:
+        conn.execute("BEGIN")
+        schema.create(conn)
+        if has_legacy_rows(conn):
+            cursor = conn.execute(
+                "SELECT session_id, type, event, data, timestamp, received_at, "
+                "session_context FROM analytics ORDER BY id"
+            )
+            while rows := cursor.fetchmany(chunk_size):
+                schema.insert(
+                    conn,
+                    [
+                        (session, type_, event, data, ts, _epoch(received), ctx)
+                        for session, type_, event, data, ts, received, ctx in rows
+                    ],
+                )
+                moved += len(rows)
+        conn.execute("DROP TABLE IF EXISTS analytics")
+        conn.execute("COMMIT")
+        conn.execute("VACUUM")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return moved
+
+
+def move_to_partitions(
+    path, partitions, schema: str = "legacy", chunk_size: int = 10_000
+) -> int:
+    """
+    Move the raw events of both schemas out of the database into day
+    partitions of the given schema, keeping the rollups.
+
+    Run it with the server stopped. The raw tables are dropped and the file
+    vacuumed once every partition is committed. Returns the number of events
+    moved.
+    """
+    conn = connect_writer(path)
+    opened: Dict[str, Tuple[sqlite3.Connection, Any]] = {}
+    moved = 0
+    try:
+        for rows in read_raw_events(conn, chunk_size):
+            by_day: Dict[str, List[EventRow]] = {}
+            for row in rows:
+                by_day.setdefault(day_of(row[5]), []).append(row)
+            for day, day_rows in by_day.items():
+                if day not in opened:
+                    day_schema = SCHEMAS[schema]()
+                    partition = open_partition(partitions, day, day_schema)
+                    partition.execute("BEGIN")
+                    opened[day] = (partition, day_schema)
+                partition, day_schema = opened[day]
+                day_schema.insert(partition, day_rows)
+            moved += len(rows)
+        for partition, _ in opened.values():
+            partition.execute("COMMIT")
+
+        conn.execute("BEGIN")
+        conn.execute("DROP VIEW IF EXISTS analytics_events")
+        for table in ("analytics", "events", "sessions", "event_kinds"):
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.execute("COMMIT")
+        conn.execute("VACUUM")
+    except Exception:
+        for partition, _ in opened.values():
+            if partition.in_transaction:
+                partition.execute("ROLLBACK")
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        for partition, _ in opened.values():
+            partition.close()
+        conn.close()
+    return moved
+
+
+def query_partitions(
+    sql: str,
+    params=(),
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    partitions=partition_dir,
+) -> Iterator[tuple]:
+    """
+    Run a read-only query on each day partition from since to until (ISO
+    dates, both included) and yield its rows, oldest day first.
+
+    Every partition has the analytics_events view with the legacy column
+    names. Its timestamp and received_at are ISO strings in legacy
+    partitions and epoch milliseconds in compact ones. Rows are not merged
+    across days, so aggregates are combined by the caller:
+
+        counts = Counter()
+        sql = "SELECT type, COUNT(*) FROM analytics_events GROUP BY type"
+        for type_, n in query_partitions(sql, since="2026-06-01"):
+            counts[type_] += n
+    """
+    for day in partition_days(partitions):
+        if (since and day < since) or (until and day > until):
+            continue
+        conn = _connect_readonly(partition_path(partitions, day))
+        try:
+            yield from conn.execute(sql, params)
+        finally:
+            conn.close()
+
+
+def export_partition(path, output, archive_format: str = "ndjson") -> int:
+    """
+    Write the events of a partition to a gzip-compressed NDJSON or CSV file
+    with the analytics_events columns. Returns the number of events.
+    """
+    conn = _connect_readonly(path)
+    exported = 0
+    try:
+        cursor = conn.execute(
+            f"SELECT {', '.join(EVENT_COLUMNS)} FROM analytics_events ORDER BY id"
+        )
+        with gzip.open(output, "wt", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f) if archive_format == "csv" else None
+            if writer is not None:
+                writer.writerow(EVENT_COLUMNS)
+            while rows := cursor.fetchmany(10_000):
+                if writer is not None:
+                    writer.writerows(rows)
+                else:
+                    for row in rows:
+                        event = dict(zip(EVENT_COLUMNS, row))
+                        # Stored as JSON text, exported as nested JSON
+                        event["data"] = _json_or_none(event["data"])
+                        event["session_context"] = _json_or_none(
+                            event["session_context"]
+                        )
+                        f.write(json.dumps(event, ensure_ascii=False) + "\n")
+                exported += len(rows)
+    finally:
+        conn.close()
+    return exported
+
+
+def rotate_partitions(
+    partitions=partition_dir,
+    archives=archive_dir,
+    keep_days: int = 7,
+    archive_format: str = "ndjson",
+    today: Optional[date] = None,
+    path=db_path,
+) -> List[Path]:
+    """
+    Export the partitions of days before the last keep_days (today included)
+    to compressed archives and delete them. Returns the archives written.
+
+    Only one process rotates at a time, the others return at once. Each day
+    is exported and deleted under the WriteLock of the database at path, so
+    no writer adds to a partition in between. Writers keep yesterday's
+    partition open for events received around midnight, so at least two
+    days are kept. The rollups are left alone, so the summary still counts
+    the archived days.
+    """
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unknown archive format: {archive_format}")
+    if keep_days < 2:
+        raise ValueError("keep_days must be at least 2")
+    today = today or datetime.now(timezone.utc).date()
+    first_kept = (today - timedelta(days=keep_days - 1)).isoformat()
+    old_days = [day for day in partition_days(partitions) if day < first_kept]
+    if not old_days:
+        return []
+
+    archives = Path(archives)
+    archives.mkdir(parents=True, exist_ok=True)
+    lock_fd = os.open(archives / ".rotate.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    write_lock = WriteLock(path)
+    try:
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return []
+
+        written = []
+        for day in old_days:
+            partition = partition_path(partitions, day)
+            archive = archives / f"{PARTITION_PREFIX}{day}.{archive_format}.gz"
+            partial = archive.with_name(archive.name + ".partial")
+            with write_lock:
+                if not partition.exists():
+                    continue  # Rotated by another process meanwhile
+                export_partition(partition, partial, archive_format)
+                os.replace(partial, archive)
+                for suffix in ("", "-wal", "-shm"):
+                    try:
+                        os.remove(f"{partition}{suffix}")
+                    except FileNotFoundError:
+                        pass
+            written.append(archive)
+        return written
+    finally:
+        write_lock.close()
+        os.close(lock_fd)
+
+
+def _epoch(iso_timestamp: str) -> float:
+    try:
+        return datetime.fromisoformat(iso_timestamp).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the analytics database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (
+        ("migrate", "move legacy rows to the compact schema"),
+        ("rollup", "rebuild the rollups from the raw events"),
+        ("partition", "move raw events out of the database into day partitions"),
+    ):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("db_file", nargs="?", default=db_path)
+    commands.choices["partition"].add_argument(
+        "--schema",
+        choices=sorted(SCHEMAS),
+        default=os.environ.get("ANALYTICS_SCHEMA", "legacy"),
+    )
+    rotate = commands.add_parser("rotate", help="archive and delete old partitions")
+    rotate.add_argument("--keep-days", type=int, required=True)
+    rotate.add_argument("--format", choices=ARCHIVE_FORMATS, default="ndjson")
+    query = commands.add_parser("query", help="run SQL on every day partition")
+    query.add_argument("sql")
+    query.add_argument("--since", help="first day, YYYY-MM-DD")
+    query.add_argument("--until", help="last day, YYYY-MM-DD")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        moved = migrate_to_compact(args.db_file)
+        print(f"Migrated {moved} rows in {args.db_file} to the compact schema")
+    elif args.command == "rollup":
+        folded = rebuild_rollups(
+            args.db_file, partitions=partition_dir, archives=archive_dir
+        )
+        print(f"Rebuilt rollups in {args.db_file} from {folded} events")
+    elif args.command == "partition":
+        moved = move_to_partitions(args.db_file, partition_dir, args.schema)
+        print(f"Moved {moved} events from {args.db_file} to {partition_dir}")
+    elif args.command == "rotate":
+        for archive in rotate_partitions(
+            keep_days=args.keep_days, archive_format=args.format
+        ):
+            print(f"Archived {archive}")
+    else:
+        for row in query_partitions(args.sql, since=args.since, until=args.until):
+            print("\t".join("" if value is None else str(value) for value in row))
@@ -0,0 +1,68 @@
+"""Helpers shared by the benchmark scripts"""
+
+import atexit
+import os
+import shutil
+import socket
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Summarize latency samples (seconds) as p50/p99/max in microseconds"""
+    ordered = sorted(samples)
+    p99_index = min(len(ordered) - 1, int(len(ordered) * 0.99))
+    return {
+        "p50_us": statistics.median(ordered) * 1e6,
+        "p99_us": ordered[p99_index] * 1e6,
+        "max_us": ordered[-1] * 1e6,
+    }
+
+
+def time_calls(fn: Callable, args_list: List[tuple]) -> List[float]:
+    """Call fn once per argument tuple and return the per-call durations"""
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def rss_kib() -> int:
+    """Current resident set size of this process in KiB (Linux only, else 0)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def print_row(name: str, stats: Dict[str, float]) -> None:
+    cells = "  ".join(f"{k}={v:10.1f}" for k, v in stats.items())
+    print(f"{name:<24}{cells}")
+
+
+def free_port() -> int:
+    """A TCP port on localhost that is free right now"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def use_temporary_home() -> str:
+    """
+    Point HOME at a temporary directory, removed at exit, and turn off the
+    graph watcher. Call it before importing main, which opens the analytics
+    and booth change databases under HOME.
+    """
+    home = tempfile.mkdtemp(prefix="marketmap-benchmark-")
+    atexit.register(shutil.rmtree, home, ignore_errors=True)
+    os.environ["HOME"] = home
+    os.environ.setdefault("GRAPH_WATCH_INTERVAL", "0")
+    return home
@@ -0,0 +1,141 @@
+"""
+Load test for analytics ingestion: per-request inserts vs the AnalyticsWriter.
+
+Run from backend/:  uv run python -m benchmarks.analytics_ingest [--requests N]
+"""
+
+import argparse
+import json
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from analytics import ANALYTICS_TABLE, INSERT_EVENT, AnalyticsWriter
+from benchmarks._common import percentiles, print_row
+
+SESSION_CONTEXT = {
+    "sessionId": "session_bench",
+    "screenWidth": 390,
+    "screenHeight": 844,
+    "userAgent": "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X)",
+}
+
+
+def make_events(count: int):
+    return [
+        {
+            "type": "userAction",
+            "event": "nodeSelected",
+            "data": {"id": f"n{i}", "label": str(100 + i)},
+            "timestamp": datetime.now().isoformat(),
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_request(path, events):
+    """The handler before the AnalyticsWriter: connect, insert per row, commit"""
+    conn = sqlite3.connect(str(path))
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN TRANSACTION")
+        session_context = json.dumps(SESSION_CONTEXT)
+        for event in events:
+            cursor.execute(
+                INSERT_EVENT,
+                (
+                    SESSION_CONTEXT["sessionId"],
+                    event["type"],
+                    event["event"],
+                    json.dumps(event["data"]),
+                    event["timestamp"],
+                    datetime.now().isoformat(),
+                    session_context,
+                ),
+            )
+        cursor.execute("COMMIT")
+    finally:
+        conn.close()
+
+
+def writer_request(writer, events):
+    """What the handler does now: build the rows and queue them"""
+    session_context = json.dumps(SESSION_CONTEXT)
+    received_at = time.time()
+    rows = [
+        (
+            SESSION_CONTEXT["sessionId"],
+            event["type"],
+            event["event"],
+            event["data"],
+            event["timestamp"],
+            received_at,
+            session_context,
+        )
+        for event in events
+    ]
+    writer.submit(rows)
+
+
+def new_db(directory, name):
+    path = Path(directory) / name
+    conn = sqlite3.connect(str(path))
+    conn.execute(ANALYTICS_TABLE)
+    conn.close()
+    return path
+
+
+def count_rows(path):
+    conn = sqlite3.connect(str(path))
+    try:
+        return conn.execute("SELECT COUNT(*) FROM analytics").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def run(handle, requests, events):
+    samples = []
+    start = time.perf_counter()
+    for _ in range(requests):
+        t = time.perf_counter()
+        handle(events)
+        samples.append(time.perf_counter() - t)
+    return samples, start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--events-per-request", type=int, default=10)
+    args = parser.parse_args()
+    events = make_events(args.events_per_request)
+    total = args.requests * args.events_per_request
+
+    with tempfile.TemporaryDirectory() as directory:
+        legacy_path = new_db(directory, "legacy.db")
+        samples, start = run(
+            lambda e: legacy_request(legacy_path, e), args.requests, events
+        )
+        elapsed = time.perf_counter() - start
+        assert count_rows(legacy_path) == total
+        print_row("legacy per request", percentiles(samples))
+        print(f"{'':<24}{total / elapsed:,.0f} events/s stored")
+
+        writer_path = new_db(directory, "writer.db")
+        writer = AnalyticsWriter(writer_path, max_buffer=total)
+        writer.start()
+        samples, start = run(
+            lambda e: writer_request(writer, e), args.requests, events
+        )
+        writer.flush()
+        elapsed = time.perf_counter() - start
+        writer.stop()
+        assert count_rows(writer_path) == total
+        print_row("writer submit", percentiles(samples))
+        print(f"{'':<24}{total / elapsed:,.0f} events/s stored")
+
+
+if __name__ == "__main__":
+    main()
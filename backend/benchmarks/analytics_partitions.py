@@ -0,0 +1,108 @@
+"""
+Insert throughput into one analytics database that already holds a season of
+events, against a fresh day partition, and the cost of rotating a day out to
+a compressed archive.
+
+Run from backend/:
+    uv run python -m benchmarks.analytics_partitions [--history N] [--events N]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from analytics import (
+    SCHEMAS,
+    AnalyticsWriter,
+    connect_writer,
+    create_rollup_tables,
+    export_partition,
+    partition_days,
+    partition_path,
+)
+from benchmarks.analytics_schema import make_batches
+
+# Events generated at a time while prefilling
+PREFILL_CHUNK = 100_000
+
+
+def prefill(path: Path, schema: str, events: int) -> None:
+    """Store events in large transactions, as a season of traffic would"""
+    conn = connect_writer(path)
+    store = SCHEMAS[schema]()
+    store.create(conn)
+    create_rollup_tables(conn)
+    conn.execute("BEGIN")
+    for seed in range(0, events, PREFILL_CHUNK):
+        for batch in make_batches(min(PREFILL_CHUNK, events - seed), 20, seed):
+            store.insert(
+                conn, [row[:3] + (json.dumps(row[3]),) + row[4:] for row in batch]
+            )
+    conn.execute("COMMIT")
+    conn.close()
+
+
+def write(path: Path, schema: str, batches, partitions=None) -> float:
+    """Seconds for an AnalyticsWriter to store every batch"""
+    writer = AnalyticsWriter(
+        path, schema=schema, partitions=partitions, max_buffer=10**9
+    )
+    writer.start()
+    start = time.perf_counter()
+    for batch in batches:
+        writer.submit(batch)
+    writer.flush()
+    elapsed = time.perf_counter() - start
+    writer.stop()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--history", type=int, default=1_000_000)
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--schema", choices=sorted(SCHEMAS), default="compact")
+    args = parser.parse_args()
+
+    batches = make_batches(args.events, 20, seed=-1)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        single = tmp / "single.db"
+        start = time.perf_counter()
+        prefill(single, args.schema, args.history)
+        print(
+            f"{args.history} stored events ({args.schema}): "
+            f"{os.path.getsize(single) / 2**20:.0f} MiB, "
+            f"prefilled in {time.perf_counter() - start:.1f} s"
+        )
+
+        partitioned = tmp / "rollups.db"
+        partitions = tmp / "partitions"
+        for name, seconds in (
+            ("single database", write(single, args.schema, batches)),
+            (
+                "day partition",
+                write(partitioned, args.schema, batches, partitions=partitions),
+            ),
+        ):
+            print(f"{name:<24}{args.events / seconds:10.0f} events/s")
+
+        day = partition_days(partitions)[0]
+        path = partition_path(partitions, day)
+        for archive_format in ("ndjson", "csv"):
+            archive = tmp / f"archive.{archive_format}.gz"
+            start = time.perf_counter()
+            exported = export_partition(path, archive, archive_format)
+            print(
+                f"archive {archive_format:<8}{exported} events in "
+                f"{time.perf_counter() - start:.2f} s, "
+                f"{os.path.getsize(path) / 2**20:.1f} MiB -> "
+                f"{os.path.getsize(archive) / 2**20:.1f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Compare database size and insert throughput of the legacy and compact
+analytics schemas, and time the migration between them.
+
+Run from backend/:  uv run python -m benchmarks.analytics_schema [--events N]
+"""
+
+import argparse
+import json
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from analytics import AnalyticsWriter, SCHEMAS, connect_writer, migrate_to_compact
+
+EVENTS = [
+    ("userAction", "nodeSelected"),
+    ("userAction", "searchOrigin"),
+    ("userAction", "searchDest"),
+    ("userAction", "clickGetHere"),
+    ("userAction", "clickImHere"),
+    ("navigation", "pathFound"),
+    ("performance", "graphLoad"),
+]
+USER_AGENT = (
+    "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0.0.0 Mobile Safari/537.36"
+)
+
+
+def make_batches(events: int, events_per_session: int, seed: int):
+    """Batches of 10 events as the frontend logger sends them"""
+    rng = random.Random(seed)
+    start = datetime(2026, 6, 6, 9, 0)
+    batches = []
+    for session in range(events // events_per_session):
+        context = json.dumps(
+            {
+                "sessionId": f"session_{session}_{rng.getrandbits(32):x}",
+                "screenWidth": 412,
+                "screenHeight": 915,
+                "userAgent": USER_AGENT,
+                "timestamp": start.isoformat(),
+            }
+        )
+        session_id = json.loads(context)["sessionId"]
+        for _ in range(events_per_session // 10):
+            received = start + timedelta(seconds=rng.randrange(8 * 3600))
+            rows = []
+            for _ in range(10):
+                type_, event = rng.choice(EVENTS)
+                rows.append(
+                    (
+                        session_id,
+                        type_,
+                        event,
+                        {"label": str(rng.randrange(100, 500))},
+                        received.isoformat() + "Z",
+                        received.timestamp(),
+                        context,
+                    )
+                )
+            batches.append(rows)
+    return batches
+
+
+def write_all(path, schema, batches):
+    conn = connect_writer(path)
+    SCHEMAS[schema]().create(conn)
+    conn.close()
+
+    writer = AnalyticsWriter(path, schema=schema, max_buffer=10**9)
+    writer.start()
+    start = time.perf_counter()
+    for rows in batches:
+        writer.submit(rows)
+    writer.flush()
+    elapsed = time.perf_counter() - start
+    writer.stop()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--events-per-session", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    batches = make_batches(args.events, args.events_per_session, args.seed)
+    total = sum(len(rows) for rows in batches)
+    print(f"{total} events in {len(batches)} batches")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for schema in ("legacy", "compact"):
+            path = Path(directory) / f"{schema}.db"
+            elapsed = write_all(path, schema, batches)
+            size = path.stat().st_size / 1024 / 1024
+            print(
+                f"{schema:<10}{total / elapsed:12,.0f} events/s  {size:8.1f} MiB  "
+                f"{path.stat().st_size / total:6.0f} B/event"
+            )
+
+        migrated = Path(directory) / "migrated.db"
+        shutil.copy(Path(directory) / "legacy.db", migrated)
+        start = time.perf_counter()
+        moved = migrate_to_compact(migrated)
+        elapsed = time.perf_counter() - start
+        size = migrated.stat().st_size / 1024 / 1024
+        print(f"migration {moved} rows in {elapsed:.2f} s, {size:.1f} MiB after")
+
+
+if __name__ == "__main__":
+    main()
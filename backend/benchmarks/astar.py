@@ -0,0 +1,93 @@
+"""
+Validate A* routing against Dijkstra and compare search effort and latency.
+
+Run from backend/:  uv run python -m benchmarks.astar [--skip-validation]
+
+Validation checks that A* returns a path of the same cost as Dijkstra for
+every pair of reachable booths and exits non-zero otherwise.
+"""
+
+import argparse
+import random
+import sys
+
+import networkx as nx
+
+from benchmarks._common import percentiles, print_row, time_calls, use_temporary_home
+
+use_temporary_home()
+from main import FILE, prepare_graph  # noqa: E402
+from routing import AStarRouter, booth_nodes  # noqa: E402
+
+
+def validate(G, router, booths) -> int:
+    """Return the number of booth pairs where A* and Dijkstra costs differ"""
+    mismatches = 0
+    pairs = 0
+    for source in booths:
+        costs = nx.single_source_dijkstra_path_length(G, source, weight="weight")
+        for target in booths:
+            if target == source or target not in costs:
+                continue
+            pairs += 1
+            path = router.path(source, target)
+            cost = nx.path_weight(G, path, weight="weight")
+            if abs(cost - costs[target]) > 1e-9:
+                mismatches += 1
+                print(f"MISMATCH {source} -> {target}: {cost} != {costs[target]}")
+    print(f"validated {pairs} booth pairs, {mismatches} mismatches")
+    return mismatches
+
+
+def expanded_nodes(G, pairs, heuristic) -> float:
+    """Mean number of heuristic evaluations (one per queued node) per query"""
+    calls = 0
+
+    def counting(u, v):
+        nonlocal calls
+        calls += 1
+        return heuristic(u, v)
+
+    for source, target in pairs:
+        nx.astar_path(G, source, target, heuristic=counting, weight="weight")
+    return calls / len(pairs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-validation", action="store_true")
+    args = parser.parse_args()
+
+    G = prepare_graph(FILE)
+    router = AStarRouter(G)
+    component = max(nx.connected_components(G), key=len)
+    booths = [node for node in booth_nodes(G) if node in component]
+    rng = random.Random(args.seed)
+    pairs = [tuple(rng.sample(booths, 2)) for _ in range(args.queries)]
+    print(f"heuristic scale {router.scale:.5f} weight per pixel")
+
+    if not args.skip_validation and validate(G, router, booths):
+        sys.exit(1)
+
+    dijkstra_nodes = expanded_nodes(G, pairs, lambda u, v: 0)
+    astar_nodes = expanded_nodes(G, pairs, router.heuristic)
+    print(
+        f"queued nodes per query: dijkstra {dijkstra_nodes:.1f}, "
+        f"A* {astar_nodes:.1f} ({astar_nodes / dijkstra_nodes:.0%})"
+    )
+
+    def bidirectional(source, target):
+        return nx.shortest_path(G, source, target, weight="weight")
+
+    def dijkstra(source, target):
+        return nx.dijkstra_path(G, source, target, weight="weight")
+
+    print_row("shortest_path (bidir.)", percentiles(time_calls(bidirectional, pairs)))
+    print_row("dijkstra_path", percentiles(time_calls(dijkstra, pairs)))
+    print_row("A*", percentiles(time_calls(router.path, pairs)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Latency of cheap endpoints while route planning saturates the server.
+
+Runs one uvicorn worker with the work pool (EXECUTOR_WORKERS=4) and without
+it (EXECUTOR_WORKERS=0, handlers block the event loop). Client processes
+post multi-stop route plans as fast as they can while a probe requests
+/health and /api/graph in turn and records their latency.
+
+Run from backend/:  uv run python -m benchmarks.concurrency [--duration S]
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import networkx as nx
+
+from benchmarks._common import free_port, percentiles, print_row, use_temporary_home
+
+use_temporary_home()
+from benchmarks.workers import wait_healthy  # noqa: E402
+from main import FILE, MAX_ROUTE_STOPS, prepare_graph  # noqa: E402
+from routing import booth_nodes  # noqa: E402
+
+
+def route_plans(count: int):
+    """Route-plan bodies with MAX_ROUTE_STOPS random booths each"""
+    G = prepare_graph(FILE)
+    component = max(nx.connected_components(G), key=len)
+    labels = [
+        G.nodes[node]["label"]
+        for node in booth_nodes(G)
+        if node in component and G.nodes[node].get("label")
+    ]
+    rng = random.Random(0)
+    return [
+        json.dumps(
+            {
+                "origin": rng.choice(labels),
+                "stops": rng.sample(labels, MAX_ROUTE_STOPS),
+            }
+        )
+        for _ in range(count)
+    ]
+
+
+def load_client(port: int, bodies, duration: float, results) -> None:
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    counts = {"ok": 0, "shed": 0}
+    deadline = time.perf_counter() + duration
+    headers = {"Content-Type": "application/json"}
+    try:
+        while time.perf_counter() < deadline:
+            body = bodies[(counts["ok"] + counts["shed"]) % len(bodies)]
+            conn.request("POST", "/api/route-plan", body, headers)
+            response = conn.getresponse()
+            response.read()
+            counts["ok" if response.status == 200 else "shed"] += 1
+    finally:
+        conn.close()
+        results.put(counts)
+
+
+def probe(port: int, duration: float, interval: float = 0.02):
+    """Latency samples (seconds) of /health and /api/graph"""
+    samples = {"/health": [], "/api/graph": []}
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        for path, latencies in samples.items():
+            start = time.perf_counter()
+            conn.request("GET", path)
+            conn.getresponse().read()
+            latencies.append(time.perf_counter() - start)
+        time.sleep(interval)
+    conn.close()
+    return samples
+
+
+def measure(executor_workers: int, clients: int, duration: float, bodies, home):
+    port = free_port()
+    env = dict(
+        os.environ,
+        HOME=home,
+        GRAPH_WATCH_INTERVAL="0",
+        EXECUTOR_WORKERS=str(executor_workers),
+    )
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        wait_healthy(port)
+        results = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(
+                target=load_client,
+                args=(port, bodies[i::clients], duration, results),
+            )
+            for i in range(clients)
+        ]
+        for proc in procs:
+            proc.start()
+        samples = probe(port, duration)
+        counts = [results.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    ok = sum(c["ok"] for c in counts)
+    shed = sum(c["shed"] for c in counts)
+    return samples, ok / duration, shed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    bodies = route_plans(200)
+    with tempfile.TemporaryDirectory() as home:
+        for name, executor_workers in (("inline", 0), ("work pool", 4)):
+            samples, rate, shed = measure(
+                executor_workers, args.clients, args.duration, bodies, home
+            )
+            print(f"{name}: {rate:.0f} route plans/s, {shed} shed with 503")
+            for path, latencies in samples.items():
+                print_row(f"  {path}", percentiles(latencies))
+
+
+if __name__ == "__main__":
+    main()
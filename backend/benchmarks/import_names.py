@@ -0,0 +1,116 @@
+"""
+Time import_booth_names.py against its previous two-pass version (kept in
+benchmarks/_legacy_import_names.py) on a synthetic venue, 10x this map by
+default, and check both write the same names.
+
+The CSV assigns most booths to vendors with one to three booths, writing some
+labels with a dash as vendors do ("A-12").
+
+Run from backend/:  uv run python -m benchmarks.import_names [--booths N]
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+from lxml import etree
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO = os.path.dirname(BACKEND)
+
+# import_booth_names.py is in the repository root, and benchmarks is found
+# when this file is run as a script too
+sys.path[:0] = [REPO, BACKEND]
+import import_booth_names  # noqa: E402
+from benchmarks import _legacy_import_names as legacy  # noqa: E402
+from benchmarks.venue import generate_venue  # noqa: E402
+
+
+def write_csv(graphml: str, path: str, seed: int = 0) -> int:
+    """Assign vendors to 80% of the labelled booths, return the row count"""
+    rng = random.Random(seed)
+    y_label = "{http://www.yworks.com/xml/graphml}NodeLabel"
+    labels = [
+        elem.text
+        for elem in etree.parse(graphml).iter(y_label)
+        if elem.text and elem.text.strip()
+    ]
+    rows = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "label"])
+        i = 0
+        while i < len(labels):
+            count = rng.choice([1, 1, 1, 2, 3])
+            booths = labels[i : i + count]
+            i += count
+            if rng.random() < 0.2:
+                continue
+            booths = [
+                f"{label[0]}-{label[1:]}" if rng.random() < 0.3 else label
+                for label in booths
+            ]
+            writer.writerow([f"Vendor {rows}", ",".join(booths)])
+            rows += 1
+    return rows
+
+
+def names(path: str):
+    """(node id, name, extension) of every node"""
+    result = []
+    for node in etree.parse(path).iter("{*}node"):
+        data = {
+            elem.get("key"): elem.text
+            for elem in node
+            if etree.QName(elem).localname == "data"
+        }
+        result.append((node.get("id"), data.get("d4"), data.get("d10")))
+    return result
+
+
+def timed(fn, *args, **kwargs):
+    """Seconds taken by fn with its output discarded"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        assert fn(*args, **kwargs)
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--booths", type=int, default=3300)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        graphml = os.path.join(tmp, "venue.graphml")
+        vendors = os.path.join(tmp, "vendors.csv")
+        nodes, _, booths = generate_venue(graphml, args.booths)
+        rows = write_csv(graphml, vendors)
+        print(f"{nodes} nodes, {booths} booths, {rows} vendors")
+
+        legacy_out = os.path.join(tmp, "legacy.graphml")
+        new_out = os.path.join(tmp, "new.graphml")
+        update = import_booth_names.update_booth_names
+        for name, fn, kwargs in (
+            ("legacy", legacy.update_booth_names, {"output_file": legacy_out}),
+            ("single pass", update, {"output_file": new_out}),
+            ("dry run", update, {"output_file": new_out, "dry_run": True}),
+        ):
+            samples = [
+                timed(fn, graphml, vendors, **kwargs) for _ in range(args.repeat)
+            ]
+            print(f"{name:<24}{min(samples) * 1000:10.1f} ms")
+
+        same = names(legacy_out) == names(new_out)
+        print(f"Same names and extensions as legacy: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Hit rate and latency of the RouteCache for a skewed route workload.
+
+Endpoints are drawn from a Zipf-like distribution over the booths, so a few
+popular booths (entrance, food court) take most of the requests.
+
+Run from backend/:  uv run python -m benchmarks.route_cache [--requests N]
+"""
+
+import argparse
+import random
+
+import networkx as nx
+
+from benchmarks._common import percentiles, print_row, time_calls, use_temporary_home
+
+use_temporary_home()
+from main import FILE, prepare_graph  # noqa: E402
+from routing import RouteCache, booth_nodes  # noqa: E402
+
+
+def skewed_pairs(nodes, count: int, exponent: float, seed: int = 0):
+    rng = random.Random(seed)
+    ranked = list(nodes)
+    rng.shuffle(ranked)
+    weights = [1 / (rank + 1) ** exponent for rank in range(len(ranked))]
+    picks = rng.choices(ranked, weights=weights, k=count * 2)
+    return list(zip(picks[::2], picks[1::2]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--exponent", type=float, default=1.0)
+    args = parser.parse_args()
+
+    G = prepare_graph(FILE)
+    component = max(nx.connected_components(G), key=len)
+    booths = [node for node in booth_nodes(G) if node in component]
+    pairs = skewed_pairs(booths, args.requests, args.exponent)
+
+    def search(source, target):
+        return nx.shortest_path(G, source, target, weight="weight")
+
+    print(f"{len(booths)} booths, {args.requests} requests, zipf s={args.exponent}")
+    for size in (64, 256, 1024, 4096):
+        cache = RouteCache(size)
+
+        def cached(source, target):
+            path = cache.get(1, source, target)
+            if path is None:
+                path = search(source, target)
+                cache.put(1, source, target, path)
+            return path
+
+        samples = time_calls(cached, pairs)
+        stats = cache.stats()
+        print_row(f"cache {size}", percentiles(samples))
+        print(
+            f"{'':<24}hit_rate={stats['hit_rate']:.1%}  "
+            f"evictions={stats['evictions']}"
+        )
+
+    print_row("no cache", percentiles(time_calls(search, pairs[:2000])))
+
+
+if __name__ == "__main__":
+    main()
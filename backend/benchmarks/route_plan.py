@@ -0,0 +1,70 @@
+"""
+Latency and tour quality of the multi-stop route planner on random lists.
+
+Run from backend/:  uv run python -m benchmarks.route_plan [--plans N]
+"""
+
+import argparse
+import random
+import statistics
+
+import networkx as nx
+
+from benchmarks._common import percentiles, print_row, time_calls, use_temporary_home
+
+use_temporary_home()
+from main import FILE, ROUTE_PLAN_TIME_BUDGET, prepare_graph  # noqa: E402
+from routing import booth_nodes, plan_route  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--plans", type=int, default=500)
+    parser.add_argument("--min-stops", type=int, default=5)
+    parser.add_argument("--max-stops", type=int, default=15)
+    parser.add_argument("--target-ms", type=float, default=100.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    G = prepare_graph(FILE)
+    component = max(nx.connected_components(G), key=len)
+    booths = [node for node in booth_nodes(G) if node in component]
+    rng = random.Random(args.seed)
+    plans = []
+    for _ in range(args.plans):
+        size = rng.randint(args.min_stops, args.max_stops)
+        origin, *stops = rng.sample(booths, size + 1)
+        plans.append((origin, stops))
+
+    def plan(origin, stops):
+        return plan_route(G, origin, stops, time_budget=ROUTE_PLAN_TIME_BUDGET)
+
+    samples = time_calls(plan, plans)
+    stats = percentiles(samples)
+    print_row("plan_route", stats)
+    p99_ms = stats["p99_us"] / 1000
+    verdict = "OK" if p99_ms <= args.target_ms else "OVER TARGET"
+    print(f"p99 {p99_ms:.1f} ms vs target {args.target_ms} ms: {verdict}")
+
+    # Walk length against visiting the stops in the order given, as chained
+    # single-pair requests do, and against nearest neighbour without 2-opt
+    as_given = []
+    nearest_only = []
+    for origin, stops in plans:
+        _, _, planned = plan(origin, stops)
+        walk = [origin] + stops
+        chained = sum(
+            nx.shortest_path_length(G, a, b, weight="weight")
+            for a, b in zip(walk, walk[1:])
+        )
+        _, _, greedy = plan_route(G, origin, stops, time_budget=0)
+        as_given.append(planned / chained)
+        nearest_only.append(planned / greedy)
+    print(
+        f"planned walk / stops in given order: {statistics.mean(as_given):.2f}, "
+        f"/ nearest neighbour only: {statistics.mean(nearest_only):.3f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Compare per-request Dijkstra with the precomputed RouteTable.
+
+Run from backend/:  uv run python -m benchmarks.routing [--queries N]
+"""
+
+import argparse
+import random
+import tracemalloc
+
+import networkx as nx
+
+from benchmarks._common import (
+    percentiles,
+    print_row,
+    rss_kib,
+    time_calls,
+    use_temporary_home,
+)
+
+use_temporary_home()
+from main import FILE, prepare_graph  # noqa: E402
+from routing import RouteTable, booth_nodes  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    G = prepare_graph(FILE)
+    # Only sample booths that can reach each other
+    component = max(nx.connected_components(G), key=len)
+    booths = [node for node in booth_nodes(G) if node in component]
+    rng = random.Random(args.seed)
+    pairs = [tuple(rng.sample(booths, 2)) for _ in range(args.queries)]
+    print(f"{G.number_of_nodes()} nodes, {len(booths)} booths, {len(pairs)} queries")
+
+    def dijkstra(source, target):
+        return nx.shortest_path(G, source, target, weight="weight")
+
+    rss_before = rss_kib()
+    tracemalloc.start()
+    table = RouteTable(G)
+    table.build(booths)
+    table_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = rss_kib()
+
+    print_row("dijkstra", percentiles(time_calls(dijkstra, pairs)))
+    print_row("route table", percentiles(time_calls(table.path, pairs)))
+    print(
+        f"route table: {len(table)} rows, {table.nbytes() / 1024:.1f} KiB of rows, "
+        f"{table_bytes / 1024:.1f} KiB traced, RSS +{rss_after - rss_before} KiB"
+    )
+
+
+if __name__ == "__main__":
+    main()
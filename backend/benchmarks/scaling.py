@@ -0,0 +1,116 @@
+"""
+Scaling curves for bigger venues: load time, memory and route latency of
+synthetic venues from benchmarks.venue at multiples of flea_market.graphml.
+
+Run from backend/:
+    uv run python -m benchmarks.scaling [--scales 1 5 10 25 50] [--output F]
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import networkx as nx
+
+from benchmarks._common import percentiles, time_calls
+from benchmarks.venue import generate_venue
+from graph_artifact import compile_graph, load_compiled_market_graph
+from market_graph import graph_to_payloads, load_market_graph
+from payloads import PreparedPayload
+from routing import booth_nodes, plan_route
+
+# Booths in flea_market.graphml, scale 1
+BASE_BOOTHS = 330
+
+
+def seconds(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def retained_kib(fn, *args) -> int:
+    """Python memory still allocated by fn's result, in KiB"""
+    gc.collect()
+    tracemalloc.start()
+    result = fn(*args)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current // 1024
+
+
+def measure(path: str, routes: int, stops: int):
+    row = {"file_kib": os.path.getsize(path) // 1024}
+
+    market, row["load_s"] = seconds(load_market_graph, path)
+    G = market.graph
+    row["nodes"] = G.number_of_nodes()
+    row["edges"] = G.number_of_edges()
+    _, row["cytoscape_s"] = seconds(graph_to_payloads, G)
+    payload, row["encode_s"] = seconds(PreparedPayload, market.elements)
+    row["graph_gzip_kib"] = len(payload.variants["gzip"]) // 1024
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact = compile_graph(path, os.path.join(tmp, "venue.graphbin"))
+        _, row["artifact_load_s"] = seconds(load_compiled_market_graph, path, artifact)
+    row["graph_kib"] = retained_kib(load_market_graph, path)
+
+    rng = random.Random(0)
+    booths = booth_nodes(G)
+    pairs = [tuple(rng.sample(booths, 2)) for _ in range(routes)]
+    samples = time_calls(
+        lambda s, t: nx.shortest_path(G, s, t, weight="weight"), pairs
+    )
+    row["route"] = percentiles(samples)
+    plans = [(rng.choice(booths), rng.sample(booths, stops)) for _ in range(10)]
+    samples = time_calls(lambda o, s: plan_route(G, o, s), plans)
+    row["route_plan"] = percentiles(samples)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--scales", type=float, nargs="+", default=[1, 5, 10, 25, 50]
+    )
+    parser.add_argument("--routes", type=int, default=100)
+    parser.add_argument("--stops", type=int, default=10)
+    parser.add_argument("--output", help="also write the rows as JSON")
+    args = parser.parse_args()
+
+    print(
+        f"{'scale':>6}{'nodes':>8}{'load s':>9}{'cyto s':>8}{'enc s':>8}"
+        f"{'mmap s':>8}{'graph MiB':>11}{'gzip KiB':>10}"
+        f"{'route p50 ms':>14}{'p99 ms':>9}{'plan p50 ms':>13}"
+    )
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            path = os.path.join(tmp, f"venue_{scale:g}.graphml")
+            generate_venue(path, int(BASE_BOOTHS * scale))
+            row = {"scale": scale, **measure(path, args.routes, args.stops)}
+            rows.append(row)
+            print(
+                f"{scale:>6g}{row['nodes']:>8}{row['load_s']:9.2f}"
+                f"{row['cytoscape_s']:8.2f}{row['encode_s']:8.2f}"
+                f"{row['artifact_load_s']:8.2f}{row['graph_kib'] / 1024:11.1f}"
+                f"{row['graph_gzip_kib']:10}"
+                f"{row['route']['p50_us'] / 1000:14.2f}"
+                f"{row['route']['p99_us'] / 1000:9.2f}"
+                f"{row['route_plan']['p50_us'] / 1000:13.2f}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Latency of SearchIndex queries against a linear scan of the booth list, as
+the frontend filters /api/booths, on this map and a synthetic venue.
+
+Queries are booth labels, label and vendor name prefixes, vendor words with a
+typo and categories. "cold" queries run with an empty match cache.
+
+Run from backend/:  uv run python -m benchmarks.search [--booths N]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks._common import percentiles, print_row, time_calls, use_temporary_home
+from benchmarks.venue import generate_venue
+
+use_temporary_home()
+from main import FILE  # noqa: E402
+from market_graph import load_market_graph  # noqa: E402
+from search import SearchIndex  # noqa: E402
+
+
+def with_typo(rng: random.Random, word: str) -> str:
+    """word with two neighbouring letters swapped"""
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 2)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2 :]
+
+
+def make_queries(index: SearchIndex, count: int, seed: int = 0):
+    rng = random.Random(seed)
+    docs = index.docs
+    named = [doc for doc in docs if doc["name"]] or docs
+    queries = []
+    for _ in range(count):
+        kind = rng.randrange(5)
+        if kind == 0:
+            queries.append(rng.choice(docs)["label"])
+        elif kind == 1:
+            queries.append(rng.choice(docs)["label"][:2])
+        elif kind == 2:
+            queries.append((rng.choice(named)["name"] or "")[:5])
+        elif kind == 3:
+            words = (rng.choice(named)["name"] or "").split()
+            queries.append(with_typo(rng, max(words, key=len)) if words else "")
+        else:
+            queries.append(rng.choice(docs)["category"])
+    return queries
+
+
+def linear_scan(booths, query: str):
+    """Substring filter over the booth list, as done client-side today"""
+    query = query.lower()
+    return [
+        booth
+        for booth in booths
+        if any(
+            query in str(booth.get(field) or "").lower()
+            for field in ("label", "name", "category", "description")
+        )
+    ]
+
+
+def run(name: str, path: str, queries_count: int):
+    market = load_market_graph(path)
+    start = time.perf_counter()
+    index = SearchIndex(market.graph)
+    build = time.perf_counter() - start
+    print(
+        f"{name}: {len(index.docs)} booths, {len(index._terms)} terms, "
+        f"index built in {build * 1000:.1f} ms"
+    )
+
+    queries = make_queries(index, queries_count)
+    cold = []
+    for query in queries:
+        index._matches.clear()
+        cold.extend(time_calls(index.search, [(query,)]))
+    print_row("search cold", percentiles(cold))
+    warm = time_calls(index.search, [(query,) for query in queries])
+    print_row("search warm", percentiles(warm))
+    booths = market.booths
+    print_row(
+        "linear scan",
+        percentiles(time_calls(linear_scan, [(booths, q) for q in queries])),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--booths", type=int, default=16500)
+    args = parser.parse_args()
+
+    run(FILE, FILE, args.queries)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "venue.graphml")
+        generate_venue(path, args.booths)
+        run(f"venue {args.booths}", path, args.queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Compare the single-parse graph loader and the compiled artifact with the
+previous startup pipeline.
+
+Run from backend/:  uv run python -m benchmarks.startup [--repeat N]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+
+import networkx as nx
+
+from benchmarks._common import use_temporary_home
+from graph_artifact import compile_graph, load_compiled_market_graph
+
+use_temporary_home()
+from main import FILE  # noqa: E402
+from market_graph import (  # noqa: E402
+    GRAPHML_NS,
+    Y_NS,
+    apply_default_attributes,
+    graph_to_payloads,
+    load_market_graph,
+)
+
+
+def legacy_prepare_graph(file_path: str):
+    """prepare_graph as it was before the single-parse loader: two XML parses"""
+    G = nx.read_graphml(file_path).to_undirected()
+    apply_default_attributes(G)
+
+    root = ET.parse(file_path).getroot()
+    for node in root.iter(GRAPHML_NS + "node"):
+        geometry = node.find(f".//{Y_NS}Geometry")
+        if geometry is not None:
+            G.nodes[node.get("id")]["width"] = float(geometry.get("width", 30.0))
+            G.nodes[node.get("id")]["height"] = float(geometry.get("height", 30.0))
+    return G
+
+
+def legacy_startup(file_path: str):
+    """startup_event before: prepare_graph, then load_graphml_to_cytoscape"""
+    G = legacy_prepare_graph(file_path)
+    elements, _ = graph_to_payloads(legacy_prepare_graph(file_path))
+    return G, elements
+
+
+def measure(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(FILE)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact = compile_graph(FILE, os.path.join(tmp, "bench.graphbin"))
+        compiled = load_compiled_market_graph(FILE, artifact)
+        parsed = load_market_graph(FILE)
+        assert compiled.elements == parsed.elements
+        assert compiled.booths == parsed.booths
+        assert [list(nbrs) for _, nbrs in compiled.graph.adjacency()] == [
+            list(nbrs) for _, nbrs in parsed.graph.adjacency()
+        ]
+
+        for name, fn in (
+            ("legacy startup (4 parses)", legacy_startup),
+            ("load_market_graph", load_market_graph),
+            ("compiled artifact", lambda f: load_compiled_market_graph(f, artifact)),
+        ):
+            samples = measure(fn, args.repeat)
+            print(
+                f"{name:<28}median={statistics.median(samples):8.1f} ms  "
+                f"min={min(samples):8.1f} ms"
+            )
+        print(f"artifact size: {os.path.getsize(artifact) / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+Benchmark suite: micro-benchmarks of the graph loading and lookup functions
+and a load test of the API, written to a JSON file for comparing commits.
+
+The load test starts uvicorn in this process (or targets --url) and runs
+virtual phones that open the map like the frontend does: fetch /api/graph
+and /api/booths, then alternate shortest-path lookups between popular booths
+with analytics batches. Analytics go to a temporary HOME.
+
+Run from backend/:
+    uv run python -m benchmarks.suite [--users N] [--duration S] [--output F]
+    uv run python -m benchmarks.suite --compare old.json new.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+import httpx
+import networkx as nx
+import uvicorn
+
+from benchmarks._common import free_port, percentiles, time_calls, use_temporary_home
+from routing import booth_nodes
+
+# A slower p50 than this ratio is reported as a regression by --compare
+REGRESSION_RATIO = 1.2
+
+
+def run_micro(app, repeat: int):
+    """Timings of the loading and lookup functions, keyed by function name"""
+    G = app.prepare_graph(app.FILE)
+    label_index = app.build_label_index(G)
+    labels = [attrs["label"] for _, attrs in G.nodes(data=True) if attrs.get("label")]
+    # Raw labels, normalized variants and misses, as clients send them
+    lookups = labels + [f" {label.lower()} " for label in labels] + ["no-such-booth"]
+
+    results = {}
+    for name, fn, args_list in (
+        ("prepare_graph", app.prepare_graph, [(app.FILE,)] * repeat),
+        (
+            "load_graphml_to_cytoscape",
+            app.load_graphml_to_cytoscape,
+            [(app.FILE,)] * repeat,
+        ),
+        ("load_booths", app.load_booths, [(app.FILE,)] * repeat),
+        (
+            "build_graph_snapshot",
+            app.build_graph_snapshot,
+            [(app.FILE, 1)] * repeat,
+        ),
+        (
+            "find_node_by_label",
+            app.find_node_by_label,
+            [(label_index, label) for label in lookups],
+        ),
+    ):
+        samples = time_calls(fn, args_list)
+        results[name] = {"calls": len(samples), **percentiles(samples)}
+    return results
+
+
+def start_server(app_module, port: int):
+    """Run uvicorn on a thread of this process, return the server"""
+    config = uvicorn.Config(
+        app_module.app, host="127.0.0.1", port=port, log_level="warning"
+    )
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 60
+    while not server.started:
+        if time.monotonic() > deadline or not thread.is_alive():
+            raise RuntimeError("uvicorn did not start")
+        time.sleep(0.05)
+    server.thread = thread
+    return server
+
+
+def analytics_batch(rng: random.Random, session: str, labels):
+    events = [
+        {
+            "type": "userAction",
+            "event": rng.choice(["nodeSelected", "routeRequested", "search"]),
+            "data": {"label": rng.choice(labels)},
+            "timestamp": datetime.now().isoformat(),
+        }
+        for _ in range(5)
+    ]
+    return {
+        "events": events,
+        "sessionContext": {
+            "sessionId": session,
+            "screenWidth": 390,
+            "screenHeight": 844,
+            "userAgent": "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X)",
+        },
+    }
+
+
+async def virtual_user(client, user: int, labels, weights, deadline, samples):
+    rng = random.Random(user)
+    session = f"session_bench_{user}"
+
+    async def timed(endpoint, method, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            ok = response.status_code < 400
+        except Exception:
+            ok = False
+        samples.setdefault(endpoint, []).append((time.perf_counter() - start, ok))
+
+    # Opening the map, as the browser does with compression
+    gzip = {"Accept-Encoding": "gzip"}
+    await timed("/api/graph", "GET", "/api/graph", headers=gzip)
+    await timed("/api/booths", "GET", "/api/booths", headers=gzip)
+
+    while time.perf_counter() < deadline:
+        start, end = rng.choices(labels, weights=weights, k=2)
+        await timed(
+            "/api/shortest-path",
+            "GET",
+            f"/api/shortest-path/-/{quote(start)}/-/{quote(end)}",
+        )
+        await timed(
+            "/api/analytics/batch",
+            "POST",
+            "/api/analytics/batch",
+            json=analytics_batch(rng, session, labels),
+        )
+        # Think time between taps
+        await asyncio.sleep(rng.uniform(0.05, 0.5))
+
+
+async def drive(url: str, users: int, duration: float, labels):
+    # Popular booths (entrance, food court) take most route requests
+    ranked = random.Random(0).sample(labels, len(labels))
+    weights = [1 / (rank + 1) for rank in range(len(ranked))]
+    samples = {}
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(
+            *(
+                virtual_user(client, user, ranked, weights, deadline, samples)
+                for user in range(users)
+            )
+        )
+        elapsed = time.perf_counter() - start
+    return samples, elapsed
+
+
+def run_scenario(app_module, url, users: int, duration: float):
+    # Booths of the largest component, the map has unconnected parts
+    G = app_module.prepare_graph(app_module.FILE)
+    component = max(nx.connected_components(G), key=len)
+    labels = sorted(
+        {
+            G.nodes[node]["label"]
+            for node in booth_nodes(G)
+            if node in component and G.nodes[node].get("label")
+        }
+    )
+
+    server = None
+    if url is None:
+        server = start_server(app_module, free_port())
+        url = f"http://127.0.0.1:{server.config.port}"
+    try:
+        samples, elapsed = asyncio.run(drive(url, users, duration, labels))
+    finally:
+        if server is not None:
+            server.should_exit = True
+            server.thread.join()
+
+    endpoints = {}
+    total = 0
+    for endpoint, results in sorted(samples.items()):
+        latencies = [latency for latency, _ in results]
+        endpoints[endpoint] = {
+            "requests": len(results),
+            "errors": sum(1 for _, ok in results if not ok),
+            **percentiles(latencies),
+        }
+        total += len(results)
+    return {
+        "url": url,
+        "users": users,
+        "duration_s": elapsed,
+        "requests": total,
+        "requests_per_s": total / elapsed,
+        "endpoints": endpoints,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old_path: str, new_path: str) -> int:
+    """Print p50 changes between two result files, return 1 on regressions"""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    rows = []
+    for name, stats in new["micro"].items():
+        if name in old["micro"]:
+            rows.append((name, old["micro"][name]["p50_us"], stats["p50_us"]))
+    for name, stats in new["scenario"]["endpoints"].items():
+        if name in old["scenario"]["endpoints"]:
+            before = old["scenario"]["endpoints"][name]["p50_us"]
+            rows.append((name, before, stats["p50_us"]))
+
+    print(f"{old['meta']['commit']} -> {new['meta']['commit']} (p50 us)")
+    regressions = 0
+    for name, before, after in rows:
+        ratio = after / before if before else float("inf")
+        flag = "  REGRESSION" if ratio > REGRESSION_RATIO else ""
+        regressions += bool(flag)
+        print(f"{name:<28}{before:12.1f}{after:12.1f}{ratio:8.2f}x{flag}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--url", help="load test a running server instead")
+    parser.add_argument("--output", help="default: benchmarks/results/<commit>.json")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare))
+
+    use_temporary_home()
+    import main as app_module
+
+    print("Running micro-benchmarks...")
+    micro = run_micro(app_module, args.repeat)
+    print(f"Load testing with {args.users} users for {args.duration:.0f} s...")
+    scenario = run_scenario(app_module, args.url, args.users, args.duration)
+
+    commit = git_commit()
+    results = {
+        "meta": {
+            "commit": commit,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "environment": {
+                name: os.environ.get(name)
+                for name in ("ROUTING_ENGINE", "ANALYTICS_SCHEMA", "EXECUTOR_WORKERS")
+            },
+        },
+        "micro": micro,
+        "scenario": scenario,
+    }
+
+    output = args.output or os.path.join(
+        os.path.dirname(__file__), "results", f"{commit or 'unknown'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    for name, stats in micro.items():
+        print(
+            f"{name:<28}p50={stats['p50_us']:10.1f} us  "
+            f"p99={stats['p99_us']:10.1f} us"
+        )
+    print(f"{scenario['requests']} requests, {scenario['requests_per_s']:.0f} req/s")
+    for name, stats in scenario["endpoints"].items():
+        print(
+            f"{name:<28}p50={stats['p50_us']:10.1f} us  "
+            f"p99={stats['p99_us']:10.1f} us  errors={stats['errors']}"
+        )
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Generate a synthetic venue as yEd GraphML with the key schema of
+flea_market.graphml (d0-d19).
+
+The layout is a grid of vertical aisles. Each aisle is a column of walkway
+nodes (30x30 ellipses, as drawn in yEd) with a booth on either side of every
+walkway node. Cross aisles join neighbouring aisles at the top, at the
+bottom and every --cross-every walkway nodes. Booths are rectangles, with a
+hexagon (food) every 40 booths. Most have a vendor name and a category, and
+some are extensions of the booth before them.
+
+Run from backend/:
+    uv run python -m benchmarks.venue --booths 16500 -o /tmp/venue.graphml
+"""
+
+import argparse
+import math
+import random
+from xml.sax.saxutils import escape
+
+HEADER = """<?xml version='1.0' encoding='UTF-8'?>
+<graphml xmlns="http://graphml.graphdrawing.org/xmlns" \
+xmlns:java="http://www.yworks.com/xml/yfiles-common/1.0/java" \
+xmlns:sys="http://www.yworks.com/xml/yfiles-common/markup/primitives/2.0" \
+xmlns:x="http://www.yworks.com/xml/yfiles-common/markup/2.0" \
+xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" \
+xmlns:y="http://www.yworks.com/xml/graphml" \
+xmlns:yed="http://www.yworks.com/xml/yed/3" \
+xsi:schemaLocation="http://graphml.graphdrawing.org/xmlns \
+http://www.yworks.com/xml/schema/graphml/1.1/ygraphml.xsd">
+  <!--Generated by benchmarks/venue.py-->
+  <key attr.name="Description" attr.type="string" for="graph" id="d0"/>
+  <key for="port" id="d1" yfiles.type="portgraphics"/>
+  <key for="port" id="d2" yfiles.type="portgeometry"/>
+  <key for="port" id="d3" yfiles.type="portuserdata"/>
+  <key attr.name="name" attr.type="string" for="node" id="d4">
+    <default xml:space="preserve">booth</default>
+  </key>
+  <key attr.name="category" attr.type="string" for="node" id="d5">
+    <default xml:space="preserve">Category1</default>
+  </key>
+  <key attr.name="height" attr.type="double" for="node" id="d6">
+    <default xml:space="preserve">30.0</default>
+  </key>
+  <key attr.name="width" attr.type="double" for="node" id="d7">
+    <default xml:space="preserve">30.0</default>
+  </key>
+  <key attr.name="status" attr.type="string" for="node" id="d8">
+    <default xml:space="preserve">active</default>
+  </key>
+  <key attr.name="type" attr.type="string" for="node" id="d9">
+    <default xml:space="preserve">walkway</default>
+  </key>
+  <key attr.name="extension" attr.type="string" for="node" id="d10">
+    <default xml:space="preserve">0</default>
+  </key>
+  <key attr.name="url" attr.type="string" for="node" id="d11"/>
+  <key attr.name="description" attr.type="string" for="node" id="d12"/>
+  <key for="node" id="d13" yfiles.type="nodegraphics"/>
+  <key for="graphml" id="d14" yfiles.type="resources"/>
+  <key attr.name="weight" attr.type="double" for="edge" id="d15">
+    <default xml:space="preserve">1.0</default>
+  </key>
+  <key for="edge" id="d16" yfiles.type="portconstraints"/>
+  <key attr.name="url" attr.type="string" for="edge" id="d17"/>
+  <key attr.name="description" attr.type="string" for="edge" id="d18"/>
+  <key for="edge" id="d19" yfiles.type="edgegraphics"/>
+  <graph edgedefault="directed" id="G">
+    <data key="d0" xml:space="preserve"/>
+"""
+
+FOOTER = """  </graph>
+  <data key="d14">
+    <y:Resources/>
+  </data>
+</graphml>
+"""
+
+NODE = """    <node id="{id}">
+{data}      <data key="d13">
+        <y:ShapeNode>
+          <y:Geometry height="{height}" width="{width}" x="{x}" y="{y}"/>
+          <y:Fill color="{color}" transparent="false"/>
+          <y:BorderStyle color="#000000" raised="false" type="line" width="1.0"/>
+          <y:NodeLabel alignment="center" autoSizePolicy="content" \
+fontFamily="Dialog" fontSize="12" fontStyle="plain" hasBackgroundColor="false" \
+hasLineColor="false" horizontalTextPosition="center" iconTextGap="4" \
+modelName="custom" textColor="#000000" verticalTextPosition="bottom" \
+visible="true" xml:space="preserve">{label}</y:NodeLabel>
+          <y:Shape type="{shape}"/>
+        </y:ShapeNode>
+      </data>
+    </node>
+"""
+
+EDGE = """    <edge id="{id}" source="{source}" target="{target}">
+      <data key="d19">
+        <y:PolyLineEdge>
+          <y:Path sx="0.0" sy="0.0" tx="0.0" ty="0.0"/>
+          <y:LineStyle color="#000000" type="line" width="1.0"/>
+          <y:Arrows source="none" target="none"/>
+          <y:BendStyle smoothed="false"/>
+        </y:PolyLineEdge>
+      </data>
+    </edge>
+"""
+
+CATEGORIES = ["Antiques", "Clothing", "Electronics", "Food", "Books", "Toys", "Tools"]
+WORDS = ["Golden", "Corner", "Maple", "River", "Vintage", "Urban", "Lucky", "Sunny"]
+TRADES = ["Finds", "Goods", "Treasures", "Supply", "Market", "Traders", "Collectibles"]
+
+BOOTH_WIDTH = 80.0
+BOOTH_HEIGHT = 100.0
+WALKWAY_SIZE = 30.0
+# Width of an aisle column: booth, walkway, booth and a gap
+AISLE_PITCH = 2 * BOOTH_WIDTH + WALKWAY_SIZE + 60.0
+
+
+def generate_venue(path: str, booths: int, cross_every: int = 10, seed: int = 0):
+    """
+    Write a venue with at least `booths` booths to path.
+
+    Returns (node count, edge count, booth count).
+    """
+    rng = random.Random(seed)
+    # Roughly square: aisles * length walkway nodes with two booths each
+    length = max(4, math.ceil(math.sqrt(booths / 2)))
+    aisles = max(2, math.ceil(booths / (2 * length)))
+
+    nodes = 0
+    edges = 0
+    booth_count = 0
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(HEADER)
+
+        def node(label, shape, x, y, width, height, data="", color="#FFCC00"):
+            nonlocal nodes
+            node_id = f"n{nodes}"
+            nodes += 1
+            f.write(
+                NODE.format(
+                    id=node_id,
+                    data=data,
+                    height=height,
+                    width=width,
+                    x=x,
+                    y=y,
+                    color=color,
+                    label=escape(label),
+                    shape=shape,
+                )
+            )
+            return node_id
+
+        def edge(source, target):
+            nonlocal edges
+            f.write(EDGE.format(id=f"e{edges}", source=source, target=target))
+            edges += 1
+
+        walkways = []
+        for aisle in range(aisles):
+            column = []
+            left = aisle * AISLE_PITCH
+            walkway_x = left + BOOTH_WIDTH
+            for step in range(length):
+                y = step * BOOTH_HEIGHT
+                walkway = node(
+                    "", "ellipse", walkway_x, y + 35.0, WALKWAY_SIZE, WALKWAY_SIZE
+                )
+                if column:
+                    edge(column[-1], walkway)
+                column.append(walkway)
+
+                for side, x in ((0, left), (1, walkway_x + WALKWAY_SIZE)):
+                    booth_count += 1
+                    label = f"{_aisle_code(aisle)}{2 * step + side + 1}"
+                    booth = node(
+                        label,
+                        "hexagon" if booth_count % 40 == 0 else "rectangle",
+                        x,
+                        y,
+                        BOOTH_WIDTH,
+                        BOOTH_HEIGHT,
+                        data=_booth_data(rng, label),
+                    )
+                    edge(walkway, booth)
+            walkways.append(column)
+
+        # Cross aisles between neighbouring columns
+        for left_column, right_column in zip(walkways, walkways[1:]):
+            for step in range(length):
+                if step in (0, length - 1) or step % cross_every == 0:
+                    edge(left_column[step], right_column[step])
+
+        f.write(FOOTER)
+
+    return nodes, edges, booth_count
+
+
+def _aisle_code(aisle: int) -> str:
+    """A, B, ..., Z, AA, AB, ... like spreadsheet columns"""
+    code = ""
+    aisle += 1
+    while aisle:
+        aisle, rest = divmod(aisle - 1, 26)
+        code = chr(ord("A") + rest) + code
+    return code
+
+
+def _booth_data(rng: random.Random, label: str) -> str:
+    lines = []
+    if rng.random() < 0.7:
+        name = f"{rng.choice(WORDS)} {rng.choice(TRADES)} {label}"
+        lines.append(f'      <data key="d4" xml:space="preserve">{escape(name)}</data>')
+        category = rng.choice(CATEGORIES)
+        lines.append(f'      <data key="d5" xml:space="preserve">{category}</data>')
+    if rng.random() < 0.1:
+        lines.append('      <data key="d10" xml:space="preserve">1</data>')
+    return "".join(line + "\n" for line in lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--booths", type=int, default=3300)
+    parser.add_argument("--cross-every", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="venue.graphml")
+    args = parser.parse_args()
+
+    nodes, edges, booths = generate_venue(
+        args.output, args.booths, args.cross_every, args.seed
+    )
+    print(f"Wrote {args.output}: {nodes} nodes, {edges} edges, {booths} booths")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Memory and latency of serving many venues from one process under a memory
+budget, against keeping every venue loaded.
+
+Writes --venues synthetic venues of 1x to 5x this map and sends a skewed
+stream of /api/<venue>/graph and /api/<venue>/search requests, a few venues
+taking most of them. Each budget runs in a fresh process, so the peak RSS is
+its own. Requests that had to load their venue are reported separately.
+
+Run from backend/:  uv run python -m benchmarks.venues [--venues N]
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks._common import percentiles, rss_kib, use_temporary_home
+from benchmarks.venue import generate_venue
+
+
+def write_venues(directory: str, count: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    for i in range(count):
+        generate_venue(
+            os.path.join(directory, f"venue{i:02d}.graphml"), rng.randint(330, 1650)
+        )
+
+
+def run(directory: str, budget_mb: float, requests: int, exponent: float) -> dict:
+    """Serve the workload in this process and return its measurements"""
+    os.environ.update(
+        VENUES_DIR=directory,
+        VENUE_MEMORY_BUDGET_MB=str(budget_mb),
+        VENUE_PRELOAD="",
+        GRAPH_WATCH_INTERVAL="0",
+    )
+    use_temporary_home()
+    from fastapi.testclient import TestClient
+
+    import main
+
+    names = [name for name in main.venue_registry.names() if name.startswith("venue")]
+    rng = random.Random(1)
+    weights = [1 / (rank + 1) ** exponent for rank in range(len(names))]
+    picks = rng.choices(names, weights=weights, k=requests)
+
+    warm, cold = [], []
+    with TestClient(main.app) as client:
+        for i, name in enumerate(picks):
+            path = f"/api/{name}/graph" if i % 2 else f"/api/{name}/search?q=iron"
+            loads = main.venue_registry.loads
+            start = time.perf_counter()
+            response = client.get(path)
+            elapsed = time.perf_counter() - start
+            assert response.status_code == 200, response.text
+            (cold if main.venue_registry.loads > loads else warm).append(elapsed)
+        stats = main.venue_registry.stats()
+
+    return {
+        "budget_mb": budget_mb,
+        "venues": len(names),
+        "loaded": len(stats["loaded"]),
+        "estimated_mb": stats["memory"] / 2**20,
+        "loads": stats["loads"],
+        "evictions": stats["evictions"],
+        "rss_mb": rss_kib() / 1024,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "warm": percentiles(warm),
+        "cold_requests": len(cold),
+        "cold": percentiles(cold) if cold else {"p50_us": 0.0},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--venues", type=int, default=24)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--exponent", type=float, default=1.2)
+    parser.add_argument(
+        "--budgets",
+        type=float,
+        nargs="+",
+        default=[100_000, 128, 64],
+        help="memory budgets in MiB, the first one large enough for all venues",
+    )
+    parser.add_argument("--run", nargs=2, metavar=("DIR", "BUDGET"), help="internal")
+    args = parser.parse_args()
+
+    if args.run:
+        result = run(args.run[0], float(args.run[1]), args.requests, args.exponent)
+        print(json.dumps(result))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_venues(tmp, args.venues)
+        print(f"{args.venues} venues, {args.requests} requests, zipf s={args.exponent}")
+        for budget in args.budgets:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.venues", "--run", tmp, str(budget)]
+                + ["--requests", str(args.requests), "--exponent", str(args.exponent)],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            warm, cold = result["warm"], result["cold"]
+            print(
+                f"budget {budget:>8g} MiB: {result['loaded']:3d} loaded "
+                f"(~{result['estimated_mb']:.0f} MiB), {result['loads']} loads, "
+                f"{result['evictions']} evictions, peak RSS "
+                f"{result['peak_rss_mb']:.0f} MiB, RSS {result['rss_mb']:.0f} MiB"
+            )
+            print(
+                f"    warm p50 {warm['p50_us'] / 1000:.2f} ms "
+                f"p99 {warm['p99_us'] / 1000:.2f} ms, "
+                f"{result['cold_requests']} cold p50 {cold['p50_us'] / 1000:.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Throughput and per-worker memory of `uvicorn --workers N`, which starts every
+worker from scratch, and of serve.py, which forks them after loading the
+graph, for N = 1..max.
+
+Starts the app on a free port for each launcher and worker count, drives
+shortest-path requests from client processes for a fixed time and reads RSS
+and PSS (resident memory with shared pages split between the processes
+sharing them) of every worker from /proc, and the PSS of all processes
+including the parent. Analytics go to a temporary HOME.
+
+Run from backend/:  uv run python -m benchmarks.workers [--max-workers N]
+"""
+
+import argparse
+import http.client
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import quote
+
+import networkx as nx
+
+from benchmarks._common import free_port, use_temporary_home
+from graph_artifact import artifact_path, compile_graph
+
+use_temporary_home()
+from main import FILE, prepare_graph  # noqa: E402
+from routing import booth_nodes  # noqa: E402
+
+
+def route_paths(count: int):
+    """Shortest-path URLs between random booths of the largest component"""
+    G = prepare_graph(FILE)
+    component = max(nx.connected_components(G), key=len)
+    labels = [
+        G.nodes[node]["label"]
+        for node in booth_nodes(G)
+        if node in component and G.nodes[node].get("label")
+    ]
+    rng = random.Random(0)
+    return [
+        f"/api/shortest-path/-/{quote(rng.choice(labels))}"
+        f"/-/{quote(rng.choice(labels))}"
+        for _ in range(count)
+    ]
+
+
+def client(port: int, paths, duration: float, results) -> None:
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    done = 0
+    deadline = time.perf_counter() + duration
+    try:
+        while time.perf_counter() < deadline:
+            conn.request("GET", paths[done % len(paths)])
+            conn.getresponse().read()
+            done += 1
+    finally:
+        conn.close()
+        results.put(done)
+
+
+def wait_healthy(port: int, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not become healthy")
+
+
+def worker_pids(server_pid: int, workers: int, launcher: str):
+    """The serving processes: the server itself, or its children"""
+    if launcher == "uvicorn" and workers == 1:
+        return [server_pid]
+    pids = []
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            status = (entry / "status").read_text()
+            cmdline = (entry / "cmdline").read_bytes()
+        except OSError:
+            continue
+        if f"\nPPid:\t{server_pid}\n" not in status:
+            continue
+        # serve.py forks its workers, uvicorn spawns them
+        if launcher == "serve" or b"spawn_main" in cmdline:
+            pids.append(int(entry.name))
+    return pids
+
+
+def memory_kib(pid: int):
+    """(RSS, PSS) of a process in KiB"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in ("Rss", "Pss"):
+                values[name] = int(rest.split()[0])
+    return values["Rss"], values["Pss"]
+
+
+def measure(
+    launcher: str, workers: int, clients: int, duration: float, paths, home: str
+):
+    port = free_port()
+    env = dict(os.environ, HOME=home, GRAPH_WATCH_INTERVAL="0")
+    command = [sys.executable, "serve.py"]
+    if launcher == "uvicorn":
+        command = [sys.executable, "-m", "uvicorn", "main:app"]
+    server = subprocess.Popen(
+        command
+        + ["--port", str(port), "--workers", str(workers)]
+        + ["--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        wait_healthy(port)
+        # Every worker answers only after its startup, give the rest time
+        time.sleep(1 + workers * 0.5)
+
+        results = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(
+                target=client, args=(port, paths[i::clients], duration, results)
+            )
+            for i in range(clients)
+        ]
+        for proc in procs:
+            proc.start()
+        total = sum(results.get() for _ in procs)
+        for proc in procs:
+            proc.join()
+
+        pids = worker_pids(server.pid, workers, launcher)
+        memory = [memory_kib(pid) for pid in pids]
+        # The parent holds the pages serve.py's workers share with it
+        total_pss = sum(p for _, p in memory)
+        if server.pid not in pids:
+            total_pss += memory_kib(server.pid)[1]
+    finally:
+        server.terminate()
+        server.wait()
+
+    rss = sum(r for r, _ in memory) / max(len(memory), 1)
+    pss = sum(p for _, p in memory) / max(len(memory), 1)
+    return total / duration, rss, pss, total_pss
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--clients-per-worker", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument(
+        "--launchers",
+        nargs="+",
+        choices=["uvicorn", "serve"],
+        default=["uvicorn", "serve"],
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(artifact_path(FILE)):
+        compile_graph(FILE)
+    paths = route_paths(2000)
+
+    print(
+        f"{'launcher':<10}{'workers':<10}{'req/s':>10}{'speedup':>10}"
+        f"{'RSS KiB':>12}{'PSS KiB':>12}{'total PSS':>12}"
+    )
+    with tempfile.TemporaryDirectory() as home:
+        for launcher in args.launchers:
+            baseline = None
+            for workers in range(1, args.max_workers + 1):
+                rate, rss, pss, total_pss = measure(
+                    launcher,
+                    workers,
+                    workers * args.clients_per_worker,
+                    args.duration,
+                    paths,
+                    home,
+                )
+                baseline = baseline or rate
+                print(
+                    f"{launcher:<10}{workers:<10}{rate:10.0f}"
+                    f"{rate / baseline:10.2f}{rss:12.0f}{pss:12.0f}"
+                    f"{total_pss:12.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
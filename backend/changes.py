@@ -0,0 +1,379 @@
+"""
+Runtime booth changes (status and vendor name) with a versioned change log.
+
+Changes are stored in a SQLite database shared by the worker processes, so
+every worker numbers and serves them alike. Every change gets the next
+version number of its venue. Each worker keeps a ChangeLog per venue in
+memory: the most recent changes for clients catching up with ?since=, the
+current override of every changed booth for rebuilding snapshots, and the
+server-sent event streams that changes are pushed to. Workers poll the
+database for changes made by the others. Changes are kept across restarts;
+edit the GraphML to make them permanent.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+CHANGE_TABLES = """
+CREATE TABLE IF NOT EXISTS booth_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,  -- order over all venues
+    venue TEXT NOT NULL,
+    version INTEGER NOT NULL,  -- per venue, as served to clients
+    node_id TEXT NOT NULL,
+    label TEXT NOT NULL,
+    fields TEXT NOT NULL,  -- JSON object of the changed fields
+    changed_at REAL NOT NULL,
+    UNIQUE (venue, version)
+);
+CREATE TABLE IF NOT EXISTS booth_overrides (
+    venue TEXT NOT NULL,
+    label TEXT NOT NULL,
+    fields TEXT NOT NULL,  -- JSON object of the current runtime fields
+    PRIMARY KEY (venue, label)
+);
+"""
+
+
+class Subscriber:
+    """
+    Encoded events waiting to be sent on one event stream, ending with None
+    when the stream was dropped
+    """
+
+    def __init__(self, max_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(max_size)
+        # Set when events were dropped, the stream has to be restarted
+        self.lagging = False
+
+
+class ChangeStore:
+    """
+    Booth changes of every venue in one SQLite database.
+
+    A change is numbered inside its write transaction, so concurrent writers
+    in several processes get consecutive versions per venue. Each change also
+    gets a sequence number over all venues. poll() reads the changes after
+    the last sequence number seen in a thread and applies them, in order, to
+    this process's ChangeLogs on the event loop. The changes of a venue
+    beyond max_size are dropped; its booth_overrides row keeps their effect.
+
+    The connection is opened in the process that uses it, so a store created
+    before the workers are forked is safe to use in each of them.
+    """
+
+    def __init__(self, path, max_size: int = 10000):
+        self.path = str(path)
+        self.max_size = max_size
+        self._logs: Dict[str, "ChangeLog"] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        # Connections inherited across a fork, kept so they are never closed
+        self._inherited: List[sqlite3.Connection] = []
+        self._seq: Optional[int] = None  # last sequence number polled
+        self._lock = threading.Lock()
+        # One poll at a time, so changes are applied in the order read
+        self._poll_lock = asyncio.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            if self._conn is not None:
+                self._inherited.append(self._conn)
+            conn = sqlite3.connect(
+                self.path, check_same_thread=False, isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.executescript(CHANGE_TABLES)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def log(self, venue: str, subscriber_queue: int = 256) -> "ChangeLog":
+        """The ChangeLog of a venue, loaded from the database"""
+        log = ChangeLog(self, venue, subscriber_queue)
+        with self._lock:
+            self._logs[venue] = log
+        # Registered first, so a change stored meanwhile is polled into it
+        log.reload()
+        return log
+
+    def load(self, venue: str) -> Tuple[List[Dict], Dict[str, Dict[str, str]]]:
+        """The venue's recent changes, oldest first, and its overrides"""
+        with self._lock:
+            conn = self._connection()
+            # One read transaction, so the overrides match the changes
+            conn.execute("BEGIN")
+            try:
+                if self._seq is None:
+                    self._seq = _last_seq(conn)
+                rows = conn.execute(
+                    "SELECT version, node_id, label, fields FROM booth_changes "
+                    "WHERE venue = ? ORDER BY version DESC LIMIT ?",
+                    (venue, self.max_size),
+                ).fetchall()
+                overrides = {
+                    label: json.loads(fields)
+                    for label, fields in conn.execute(
+                        "SELECT label, fields FROM booth_overrides WHERE venue = ?",
+                        (venue,),
+                    )
+                }
+            finally:
+                conn.execute("COMMIT")
+        changes = [_change(*row) for row in reversed(rows)]
+        return changes, overrides
+
+    def insert(self, venue: str, node_id: str, label: str, fields: Dict) -> Dict:
+        """Store a change under the venue's next version and return it"""
+        with self._lock:
+            conn = self._connection()
+            # Take the write lock first, so no other writer reads the same
+            # last version
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = conn.execute(
+                    "SELECT COALESCE(MAX(version), 0) + 1 FROM booth_changes "
+                    "WHERE venue = ?",
+                    (venue,),
+                ).fetchone()[0]
+                conn.execute(
+                    "INSERT INTO booth_changes "
+                    "(venue, version, node_id, label, fields, changed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (venue, version, node_id, label, json.dumps(fields), time.time()),
+                )
+                row = conn.execute(
+                    "SELECT fields FROM booth_overrides WHERE venue = ? AND label = ?",
+                    (venue, label),
+                ).fetchone()
+                current = _merge_fields(json.loads(row[0]) if row else {}, fields)
+                if current:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO booth_overrides "
+                        "(venue, label, fields) VALUES (?, ?, ?)",
+                        (venue, label, json.dumps(current)),
+                    )
+                else:
+                    conn.execute(
+                        "DELETE FROM booth_overrides WHERE venue = ? AND label = ?",
+                        (venue, label),
+                    )
+                conn.execute(
+                    "DELETE FROM booth_changes WHERE venue = ? AND version <= ?",
+                    (venue, version - self.max_size),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return _change(version, node_id, label, json.dumps(fields))
+
+    def fetch(self) -> List[Tuple[str, Dict]]:
+        """(venue, change) stored since the last fetch, by any process"""
+        with self._lock:
+            conn = self._connection()
+            if self._seq is None:
+                self._seq = _last_seq(conn)
+            rows = conn.execute(
+                "SELECT seq, venue, version, node_id, label, fields "
+                "FROM booth_changes WHERE seq > ? ORDER BY seq",
+                (self._seq,),
+            ).fetchall()
+            if rows:
+                self._seq = rows[-1][0]
+        return [(venue, _change(*change)) for _, venue, *change in rows]
+
+    async def poll(self) -> int:
+        """
+        Apply the changes stored since the last poll, by any process, to the
+        ChangeLogs of this one. Returns the number of changes read.
+        """
+        async with self._poll_lock:
+            changes = await asyncio.to_thread(self.fetch)
+            with self._lock:
+                logs = dict(self._logs)
+            for venue, change in changes:
+                log = logs.get(venue)
+                if log is not None:
+                    log.apply(change)
+        return len(changes)
+
+    async def watch(self, interval: float) -> None:
+        """Poll for changes made by other processes every interval seconds"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.poll()
+            except Exception as e:
+                print(f"WARNING: Failed to read booth changes: {e}")
+
+
+class ChangeLog:
+    """
+    Versioned log of the booth changes of one venue.
+
+    Changes are applied on the event loop, which also owns the subscriber
+    queues, while record() and since() wait for the database in a thread.
+    overrides() may be called from the thread building a snapshot, so the
+    log and overrides are guarded by a lock.
+    """
+
+    def __init__(self, store: ChangeStore, venue: str, subscriber_queue: int = 256):
+        self.store = store
+        self.venue = venue
+        self._log: deque = deque(maxlen=store.max_size)
+        # label -> {field: value}, the current runtime values per booth
+        self._overrides: Dict[str, Dict[str, str]] = {}
+        self._subscriber_queue = subscriber_queue
+        self._subscribers: Set[Subscriber] = set()
+        self._lock = threading.Lock()
+        self.dropped_subscribers = 0
+        # Called on the event loop after changes were applied
+        self.listener: Optional[Callable[[], None]] = None
+        self.version = 0
+
+    def reload(self) -> None:
+        """Replace the log and overrides with the venue's stored ones"""
+        changes, overrides = self.store.load(self.venue)
+        with self._lock:
+            self._log.clear()
+            self._log.extend(changes)
+            self._overrides = overrides
+            self.version = changes[-1]["version"] if changes else 0
+
+    async def record(self, node_id: str, label: str, fields: Dict[str, str]) -> Dict:
+        """Store a change and apply it, with any earlier ones, to the log"""
+        change = await asyncio.to_thread(
+            self.store.insert, self.venue, node_id, label, fields
+        )
+        await self.store.poll()
+        return change
+
+    def apply(self, change: Dict) -> None:
+        """Append a stored change to the log and push it to the subscribers"""
+        with self._lock:
+            if change["version"] <= self.version:
+                # Already loaded with the log
+                return
+            missed = change["version"] > self.version + 1
+        if missed:
+            # Changes were dropped from the store before this process read
+            # them. Start over from the store, and end the streams so their
+            # clients catch up with Last-Event-ID or refetch.
+            self.reload()
+            for subscriber in list(self._subscribers):
+                self._drop(subscriber)
+        else:
+            with self._lock:
+                self.version = change["version"]
+                self._log.append(change)
+                fields = {
+                    name: value
+                    for name, value in change.items()
+                    if name not in ("version", "id", "label")
+                }
+                label = change["label"]
+                current = _merge_fields(self._overrides.get(label, {}), fields)
+                if current:
+                    self._overrides[label] = current
+                else:
+                    self._overrides.pop(label, None)
+
+            event = encode_event(change)
+            for subscriber in list(self._subscribers):
+                try:
+                    subscriber.queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    # Too slow to keep up: its stream ends once the queue is
+                    # drained, and the client resumes from the log on
+                    # reconnect
+                    self._drop(subscriber)
+
+        if self.listener is not None:
+            self.listener()
+
+    def _drop(self, subscriber: Subscriber) -> None:
+        subscriber.lagging = True
+        self._subscribers.discard(subscriber)
+        self.dropped_subscribers += 1
+        try:
+            # Wakes a stream waiting on an empty queue
+            subscriber.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass  # Ends once the queue is drained
+
+    async def since(self, version: int) -> Optional[List[Dict]]:
+        """
+        Changes after version, oldest first.
+
+        None when the log no longer holds all of them, or version is not one
+        the store has reached, so the client has to refetch the full
+        payloads.
+        """
+        # The version may come from a worker that read the store more recently
+        await self.store.poll()
+        with self._lock:
+            if version > self.version:
+                return None
+            oldest = self._log[0]["version"] if self._log else self.version + 1
+            if version < oldest - 1:
+                return None
+            return [change for change in self._log if change["version"] > version]
+
+    def overrides(self) -> Tuple[Dict[str, Dict[str, str]], int]:
+        """Copy of the current overrides per label and the version they reach"""
+        with self._lock:
+            overrides = {
+                label: dict(fields) for label, fields in self._overrides.items()
+            }
+            return overrides, self.version
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber(self._subscriber_queue)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "version": self.version,
+                "logged": len(self._log),
+                "booths": len(self._overrides),
+                "subscribers": len(self._subscribers),
+                "droppedSubscribers": self.dropped_subscribers,
+            }
+
+
+def _last_seq(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM booth_changes").fetchone()[0]
+
+
+def _merge_fields(current: Dict, fields: Dict) -> Dict:
+    """Fields of current updated with fields, a None value clears the field"""
+    merged = dict(current)
+    for name, value in fields.items():
+        if value is None:
+            merged.pop(name, None)
+        else:
+            merged[name] = value
+    return merged
+
+
+def _change(version: int, node_id: str, label: str, fields: str) -> Dict:
+    change = {"version": version, "id": node_id, "label": label}
+    change.update(json.loads(fields))
+    return change
+
+
+def encode_event(change: Dict) -> bytes:
+    """Server-sent event for a change, encoded once for every subscriber"""
+    data = json.dumps(change, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {change['version']}\ndata: {data}\n\n".encode()
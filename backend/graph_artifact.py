@@ -0,0 +1,239 @@
+"""
+Compiled binary snapshot of the prepared market graph.
+
+The artifact is built from the GraphML file ahead of time and loaded with
+mmap, so a starting worker skips XML parsing and every worker on the host
+reads the same page-cache pages. Layout, all numbers in native byte order:
+
+    header    magic, format version, byte order, source sha256,
+              node count, adjacency entry count, metadata offset/length
+    weights   float64 per adjacency entry
+    center_x  float64 per node
+    center_y  float64 per node
+    indptr    uint32 per node + 1 (CSR row offsets)
+    indices   uint32 per adjacency entry (neighbour node index)
+    edge_ids  uint32 per adjacency entry (index into the metadata edges)
+    metadata  UTF-8 JSON: graph attributes, node ids, node and edge attributes
+
+Rows list neighbours in the prepared graph's adjacency order, so the graph
+rebuilt from an artifact iterates, and therefore routes, exactly like the
+one parsed from GraphML.
+
+Build it with:  python graph_artifact.py flea_market.graphml [output]
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import List, Optional
+
+import networkx as nx
+
+from market_graph import MarketGraph, graph_to_payloads, load_market_graph
+from routing import node_center
+
+MAGIC = b"MMGRAPH\0"
+# Bump whenever the layout or the metadata changes
+FORMAT_VERSION = 1
+BYTEORDER = b"<" if sys.byteorder == "little" else b">"
+HEADER = struct.Struct("<8sI1s3x32sIIQQ")
+ARTIFACT_SUFFIX = ".graphbin"
+
+
+def artifact_path(file_path: str) -> str:
+    """Default artifact location for a GraphML file"""
+    return os.path.splitext(file_path)[0] + ARTIFACT_SUFFIX
+
+
+def source_digest(file_path: str) -> bytes:
+    """sha256 of the GraphML file the artifact is versioned by"""
+    with open(file_path, "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def write_artifact(G, digest: bytes, output: str) -> None:
+    """Serialize a prepared graph, replacing output atomically"""
+    nodes = list(G.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+
+    edge_attrs = []
+    edge_index = {}
+    for u, v, attrs in G.edges(data=True):
+        edge_index[u, v] = edge_index[v, u] = len(edge_attrs)
+        edge_attrs.append(attrs)
+
+    weights = array("d")
+    indptr = array("I", [0])
+    indices = array("I")
+    edge_ids = array("I")
+    for u, neighbours in G.adjacency():
+        for v, attrs in neighbours.items():
+            weights.append(attrs.get("weight", 1))
+            indices.append(index[v])
+            edge_ids.append(edge_index[u, v])
+        indptr.append(len(indices))
+
+    centers = [node_center(attrs) for _, attrs in G.nodes(data=True)]
+    center_x = array("d", (x for x, _ in centers))
+    center_y = array("d", (y for _, y in centers))
+
+    metadata = json.dumps(
+        {
+            "graph": G.graph,
+            "nodes": nodes,
+            "node_attrs": [attrs for _, attrs in G.nodes(data=True)],
+            "edge_attrs": edge_attrs,
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+    sections = [weights, center_x, center_y, indptr, indices, edge_ids]
+    meta_offset = HEADER.size + sum(a.itemsize * len(a) for a in sections)
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        BYTEORDER,
+        digest,
+        len(nodes),
+        len(indices),
+        meta_offset,
+        len(metadata),
+    )
+
+    # Workers that mapped the old file keep reading it until they reload
+    tmp_path = f"{output}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        for section in sections:
+            section.tofile(f)
+        f.write(metadata)
+    os.replace(tmp_path, output)
+
+
+def compile_graph(file_path: str, output: Optional[str] = None) -> str:
+    """Parse the GraphML file and write its artifact, returning the path"""
+    digest = source_digest(file_path)
+    output = output or artifact_path(file_path)
+    write_artifact(load_market_graph(file_path).graph, digest, output)
+    return output
+
+
+class CompiledGraph:
+    """
+    A memory-mapped artifact.
+
+    The numeric sections are exposed as read-only memoryviews straight into
+    the mapping: indptr/indices/weights/edge_ids form the CSR adjacency and
+    center_x/center_y the node coordinates, all indexed by position in nodes.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+
+        if len(view) < HEADER.size:
+            raise ValueError(f"{path} is not a graph artifact")
+        (
+            magic,
+            format_version,
+            byteorder,
+            digest,
+            node_count,
+            entry_count,
+            meta_offset,
+            meta_length,
+        ) = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a graph artifact")
+        if format_version != FORMAT_VERSION or byteorder != BYTEORDER:
+            raise ValueError(f"{path} was built by an incompatible version")
+        self.source_sha256 = digest
+
+        offset = HEADER.size
+
+        def section(typecode: str, count: int) -> memoryview:
+            nonlocal offset
+            size = array(typecode).itemsize * count
+            data = view[offset : offset + size].cast(typecode)
+            offset += size
+            return data
+
+        self.weights = section("d", entry_count)
+        self.center_x = section("d", node_count)
+        self.center_y = section("d", node_count)
+        self.indptr = section("I", node_count + 1)
+        self.indices = section("I", entry_count)
+        self.edge_ids = section("I", entry_count)
+        if offset != meta_offset or meta_offset + meta_length > len(view):
+            raise ValueError(f"{path} is truncated or corrupt")
+
+        metadata = json.loads(bytes(view[meta_offset : meta_offset + meta_length]))
+        self.graph_attrs = metadata["graph"]
+        self.nodes: List[str] = metadata["nodes"]
+        self.node_attrs: List[dict] = metadata["node_attrs"]
+        self.edge_attrs: List[dict] = metadata["edge_attrs"]
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def neighbours(self, i: int) -> memoryview:
+        """Indices of the neighbours of node i"""
+        return self.indices[self.indptr[i] : self.indptr[i + 1]]
+
+    def to_networkx(self):
+        """Rebuild the prepared NetworkX graph"""
+        G = nx.Graph()
+        G.graph.update(self.graph_attrs)
+        G.add_nodes_from(zip(self.nodes, self.node_attrs))
+
+        # Fill the adjacency directly, row by row, to keep the neighbour order.
+        # Both directions of an edge share one attribute dict, as in add_edge.
+        nodes, indices, edge_ids = self.nodes, self.indices, self.edge_ids
+        indptr, edge_attrs = self.indptr, self.edge_attrs
+        adj = G._adj
+        for i, node in enumerate(nodes):
+            row = adj[node]
+            for k in range(indptr[i], indptr[i + 1]):
+                row[nodes[indices[k]]] = edge_attrs[edge_ids[k]]
+        return G
+
+
+def load_compiled_market_graph(
+    file_path: str, path: Optional[str] = None
+) -> Optional[MarketGraph]:
+    """
+    Build the MarketGraph from the artifact of file_path.
+
+    Returns None when there is no artifact or it was built from a different
+    version of the file, so the caller can fall back to parsing GraphML.
+    """
+    path = path or artifact_path(file_path)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        compiled = CompiledGraph(path)
+    except ValueError as e:
+        print(f"WARNING: Ignoring graph artifact: {e}")
+        return None
+    if compiled.source_sha256 != source_digest(file_path):
+        print(f"WARNING: {path} is out of date with {file_path}, rebuild it")
+        return None
+
+    G = compiled.to_networkx()
+    elements, booths = graph_to_payloads(G)
+    return MarketGraph(G, elements, booths)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print(f"usage: {sys.argv[0]} GRAPHML [OUTPUT]")
+        sys.exit(2)
+    output = compile_graph(*sys.argv[1:])
+    print(f"Wrote {output} ({os.path.getsize(output)} bytes)")
@@ -1,23 +1,134 @@
+import asyncio
+import hmac
 import json
-import sqlite3
-import xml.etree.ElementTree as ET
-from datetime import datetime
-from pathlib import Path
-from typing import Any, Dict, List, Optional
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
 
 import networkx as nx
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
-from pydantic import BaseModel
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, Field
+
+from analytics import (
+    AnalyticsWriter,
+    analytics_summary,
+    archive_dir,
+    db_path,
+    init_analytics_db,
+    log_dir,
+    partition_days,
+    partition_dir,
+    rotate_partitions,
+)
+from changes import ChangeLog, ChangeStore, encode_event
+from graph_artifact import load_compiled_market_graph
+from market_graph import MarketGraph, graph_to_payloads, load_market_graph
+from metrics import (
+    STAGE_SECONDS,
+    CallbackMetric,
+    Histogram,
+    MetricsMiddleware,
+    REGISTRY,
+)
+from payloads import PreparedPayload
+from routing import (
+    AStarRouter,
+    RouteCache,
+    RouteTable,
+    booth_nodes,
+    plan_route,
+)
+from search import SearchIndex
+from tiles import TileIndex
+from venues import Venue, VenueRegistry
+from workpool import PoolFull, WorkPool
 
 
 FILE = "flea_market.graphml"
-# Global caches
-_prepared_graph_cache = None  # NetworkX graph
-_cytoscape_elements_cache = None  # Cytoscape format
+# "dijkstra" searches per request, "table" serves routes from a RouteTable,
+# "astar" searches per request guided by node coordinates
+ROUTING_ENGINE = os.environ.get("ROUTING_ENGINE", "dijkstra")
+# "legacy" stores one self-contained row per event, "compact" is normalized
+ANALYTICS_SCHEMA = os.environ.get("ANALYTICS_SCHEMA", "legacy")
+# Days of raw analytics events kept in day partitions before they are
+# archived as compressed "ndjson" or "csv" and deleted, 0 keeps them all and
+# 1 is refused since writers may still add to yesterday's partition
+ANALYTICS_KEEP_DAYS = int(os.environ.get("ANALYTICS_KEEP_DAYS", "0"))
+ANALYTICS_ARCHIVE_FORMAT = os.environ.get("ANALYTICS_ARCHIVE_FORMAT", "ndjson")
+# Seconds between checks for analytics partitions to archive
+ANALYTICS_ROTATE_INTERVAL = 3600.0
+# Upper bound on stops per /api/route-plan request and its 2-opt time budget
+MAX_ROUTE_STOPS = 30
+ROUTE_PLAN_TIME_BUDGET = 0.05
+# Seconds between checks of FILE for changes, 0 disables the watcher
+GRAPH_WATCH_INTERVAL = float(os.environ.get("GRAPH_WATCH_INTERVAL", "2"))
+# Token required by the /api/admin endpoints, which are disabled without one
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+# Shortest paths kept in the route cache (0 disables it) and their lifetime
+ROUTE_CACHE_SIZE = int(os.environ.get("ROUTE_CACHE_SIZE", "4096"))
+ROUTE_CACHE_TTL = float(os.environ.get("ROUTE_CACHE_TTL", "3600"))
+# Edge length of the square tiles served by /api/tiles, in map units
+TILE_SIZE = float(os.environ.get("TILE_SIZE", "1000"))
+# Upper bound on results per /api/search request
+MAX_SEARCH_RESULTS = 100
+# Booth changes kept per venue for ?since= catch-up, and the delay after a
+# change before the full payloads and indexes are rebuilt with it
+CHANGE_LOG_SIZE = 10000
+CHANGE_REFRESH_DELAY = 1.0
+# Booth changes of all workers, and the seconds between checks for changes
+# made by the other workers
+CHANGES_DB = log_dir / "booth_changes.db"
+CHANGE_POLL_INTERVAL = 0.25
+# Seconds between keep-alive comments on idle booth change streams
+CHANGE_STREAM_KEEPALIVE = 15.0
+CHANGES_GONE = "Changes no longer available, fetch /api/booths again"
+# FILE is the default venue, served by the unscoped routes. Every other venue
+# is a <name>.graphml file in VENUES_DIR, served at /api/<name>/... for each of
+# VENUE_ROUTES.
+DEFAULT_VENUE = os.path.splitext(FILE)[0]
+VENUES_DIR = os.environ.get("VENUES_DIR", "venues")
+VENUE_ROUTES = [
+    "/api/graph",
+    "/api/tiles",
+    "/api/tiles/{tile_x}/{tile_y}",
+    "/api/booths",
+    "/api/booths/changes",
+    "/api/booths/changes/stream",
+    "/api/search",
+    "/api/shortest-path/-/{start_label:path}/-/{end_label:path}",
+    "/api/route-plan",
+]
+# Estimated memory of the loaded venues, in MiB, beyond which the least
+# recently used are unloaded
+VENUE_MEMORY_BUDGET_MB = float(os.environ.get("VENUE_MEMORY_BUDGET_MB", "512"))
+# Comma-separated venues loaded at startup, the others load on first use
+VENUE_PRELOAD = [
+    name.strip()
+    for name in os.environ.get("VENUE_PRELOAD", DEFAULT_VENUE).split(",")
+    if name.strip()
+]
+# Threads for blocking handler work, 0 runs it on the event loop
+EXECUTOR_WORKERS = int(os.environ.get("EXECUTOR_WORKERS", "4"))
+# Per endpoint: (jobs running at once, jobs waiting before 503)
+ENDPOINT_LIMITS = {
+    "shortest_path": (4, 64),
+    "route_plan": (2, 16),
+    "analytics_summary": (1, 8),
+}
 
 app = FastAPI()
 
+REQUEST_SECONDS = Histogram(
+    "marketmap_http_request_duration_seconds",
+    "HTTP request duration by method, route template and status.",
+    ["method", "route", "status"],
+)
+app.add_middleware(MetricsMiddleware, histogram=REQUEST_SECONDS)
+
 
 # Define models for the analytics endpoint
 class LogEvent(BaseModel):
@@ -32,152 +143,550 @@ class AnalyticsBatch(BaseModel):
     sessionContext: Optional[Dict[str, Any]] = None
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Preload graph data on app startup"""
-    global _prepared_graph_cache, _cytoscape_elements_cache
+class RoutePlanRequest(BaseModel):
+    origin: str
+    stops: List[str]
+    returnToOrigin: bool = False
 
-    try:
-        print("Preloading graph data...")
-        # Load and prepare the NetworkX graph
-        _prepared_graph_cache = prepare_graph(FILE)
 
-        # Convert to Cytoscape format for the /api/graph endpoint
-        graph_data = load_graphml_to_cytoscape(FILE)
-        _cytoscape_elements_cache = graph_data
+class BoothUpdate(BaseModel):
+    # null clears the runtime value, so the map's value shows again
+    status: Optional[str] = Field(None, min_length=1, max_length=64)
+    name: Optional[str] = Field(None, min_length=1, max_length=200)
 
-        print("Graph data preloaded successfully!")
-    except Exception as e:
-        print(f"WARNING: Failed to preload graph data: {e}")
 
+@app.on_event("startup")
+async def startup_event():
+    """Preload graph data on app startup"""
+    global _graph_watch_task, _analytics_rotate_task, _change_poll_task
+
+    analytics_writer.start()
+    work_pool.start()
+    _change_poll_task = asyncio.create_task(change_store.watch(CHANGE_POLL_INTERVAL))
+    if ANALYTICS_KEEP_DAYS == 1:
+        print("WARNING: ANALYTICS_KEEP_DAYS must be 0 or at least 2, not rotating")
+    elif ANALYTICS_KEEP_DAYS > 0:
+        _analytics_rotate_task = asyncio.create_task(
+            rotate_analytics(ANALYTICS_ROTATE_INTERVAL)
+        )
+
+    print(f"Preloading graph data of {', '.join(VENUE_PRELOAD) or 'no venues'}...")
+    venue_registry.preload(VENUE_PRELOAD)
 
-# Determine the log directory
-def get_log_directory():
-    # First try to use user's home directory
-    try:
-        home_dir = Path.home()
-        log_dir = home_dir / "marketmap" / "logs"
-        log_dir.mkdir(parents=True, exist_ok=True)
-        return log_dir
-    except Exception:
-        # Fall back to current directory if home is not available
-        fallback_dir = Path(".") / "logs"
-        fallback_dir.mkdir(exist_ok=True)
-        return fallback_dir
-
-
-# Get log directory and create db path
-log_dir = get_log_directory()
-db_path = log_dir / "analytics.db"
-db_exists = db_path.exists()
-
-
-# Initialize the database if it doesn't exist
-def init_analytics_db():
-    if not db_exists:
-        conn = sqlite3.connect(str(db_path))
-        cursor = conn.cursor()
-        cursor.execute("""
-        CREATE TABLE analytics (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_id TEXT,
-            type TEXT,
-            event TEXT,
-            data TEXT,
-            timestamp TEXT,
-            received_at TEXT,
-            session_context TEXT
+    if GRAPH_WATCH_INTERVAL > 0:
+        _graph_watch_task = asyncio.create_task(
+            venue_registry.watch(GRAPH_WATCH_INTERVAL)
         )
-        """)
-        conn.commit()
-        conn.close()
 
 
-# Initialize DB on startup
-init_analytics_db()
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Write out buffered analytics before exiting"""
+    if _graph_watch_task is not None:
+        _graph_watch_task.cancel()
+    if _analytics_rotate_task is not None:
+        _analytics_rotate_task.cancel()
+    if _change_poll_task is not None:
+        _change_poll_task.cancel()
+    for venue in venue_registry.venues():
+        venue.store.cancel_refresh()
+    work_pool.shutdown()
+    analytics_writer.stop()
 
 
-def prepare_graph(file_path: str):
-    G = nx.read_graphml(file_path).to_undirected()
+def graph_file_stamp(file_path: str):
+    """Identify the current version of a file by its mtime and size"""
+    stat = os.stat(file_path)
+    return (stat.st_mtime_ns, stat.st_size)
 
-    apply_default_attributes(G)
-    add_node_dimensions(G, file_path)
 
-    return G
+class GraphSnapshot(NamedTuple):
+    """
+    Everything derived from one version of the GraphML file.
 
+    Built completely before it is published and never modified afterwards, so
+    a request that took a snapshot keeps a consistent view across a reload.
+    """
 
-def add_node_dimensions(G, file_path: str):
-    """Parse GraphML file to extract and add node height and width to graph"""
+    version: int
+    # Version of the snapshot its layout was loaded with, kept by refreshes
+    # for booth changes, so cached routes outlive them
+    layout_version: int
+    stamp: tuple  # graph_file_stamp of the file it was built from
+    graph: Any  # prepared NetworkX graph
+    label_index: Dict[str, str]  # label/vendor name -> node id
+    router: Any  # RouteTable or AStarRouter, None for plain Dijkstra
+    elements: Dict  # Cytoscape format
+    booths: List
+    graph_payload: PreparedPayload  # encoded elements for /api/graph
+    booths_payload: PreparedPayload  # encoded booths for /api/booths
+    tiles: TileIndex  # per-tile payloads for /api/tiles and bbox queries
+    search: SearchIndex  # booth search for /api/search
+    changes_version: int  # last booth change applied to all of the above
+    overrides: Dict[str, Dict[str, str]]  # booth changes applied, by label
+
+
+def build_graph_snapshot(
+    file_path: str, version: int, changes: Optional[ChangeLog] = None
+) -> GraphSnapshot:
+    """Parse the file and build every structure served from it"""
+    stamp = graph_file_stamp(file_path)
+
+    # Use the compiled artifact when it matches the file, otherwise parse the
+    # GraphML once. Parsing also rejects graphs with multiple edges.
+    with STAGE_SECONDS.time("graph_parse"):
+        market = load_compiled_market_graph(file_path) or load_market_graph(
+            file_path
+        )
+    return derive_graph_snapshot(market, version, stamp, changes)
 
-    tree = ET.parse(file_path)
-    root = tree.getroot()
 
-    namespaces = {"graphml": "http://graphml.graphdrawing.org/xmlns"}
+def derive_graph_snapshot(
+    market: MarketGraph,
+    version: int,
+    stamp: tuple,
+    changes: Optional[ChangeLog] = None,
+    router: Any = None,
+    layout_version: Optional[int] = None,
+) -> GraphSnapshot:
+    """
+    Build the indexes and payloads of a parsed graph with the booth changes
+    applied. The graph is modified, so it must not belong to a published
+    snapshot. A router is built unless one for the same layout is passed,
+    along with the layout_version it was built for.
+    """
+    overrides, changes_version = changes.overrides() if changes else ({}, 0)
+    if overrides:
+        with STAGE_SECONDS.time("graph_changes"):
+            if apply_booth_overrides(market.graph, overrides):
+                market = MarketGraph(market.graph, *graph_to_payloads(market.graph))
+
+    with STAGE_SECONDS.time("graph_label_index"):
+        label_index = build_label_index(market.graph)
+
+    if router is None:
+        with STAGE_SECONDS.time("graph_router"):
+            if ROUTING_ENGINE == "table":
+                # Precompute routes from every booth, other sources are built
+                # lazily
+                router = RouteTable(market.graph)
+                router.build(booth_nodes(market.graph))
+            elif ROUTING_ENGINE == "astar":
+                router = AStarRouter(market.graph)
+
+    with STAGE_SECONDS.time("graph_payloads"):
+        graph_payload = PreparedPayload(market.elements)
+        booths_payload = PreparedPayload(market.booths)
+    with STAGE_SECONDS.time("graph_tiles"):
+        tiles = TileIndex(market.elements, TILE_SIZE)
+    with STAGE_SECONDS.time("graph_search"):
+        search = SearchIndex(market.graph)
+
+    return GraphSnapshot(
+        version=version,
+        layout_version=version if layout_version is None else layout_version,
+        stamp=stamp,
+        graph=market.graph,
+        label_index=label_index,
+        router=router,
+        elements=market.elements,
+        booths=market.booths,
+        graph_payload=graph_payload,
+        booths_payload=booths_payload,
+        tiles=tiles,
+        search=search,
+        changes_version=changes_version,
+        overrides=overrides,
+    )
+
+
+def apply_booth_overrides(G, overrides: Dict[str, Dict[str, str]]) -> int:
+    """Set runtime booth attributes by label, return the booths changed"""
+    nodes_by_label = {
+        attrs["label"]: node
+        for node, attrs in G.nodes(data=True)
+        if attrs.get("label") and attrs["label"].strip()
+    }
+    changed = 0
+    for label, fields in overrides.items():
+        node = nodes_by_label.get(label)
+        if node is not None:
+            G.nodes[node].update(fields)
+            changed += 1
+    return changed
+
+
+class GraphStore:
+    """
+    Holds the current GraphSnapshot of a GraphML file.
 
-    # Find all node elements
-    for node in root.findall(".//graphml:node", namespaces):
-        node_id = node.get("id")
-        geometry = node.find(
-            ".//y:Geometry", {"y": "http://www.yworks.com/xml/graphml"}
+    A reload builds a complete new snapshot and then replaces the reference
+    in one assignment. Handlers read the store's current() once and use that
+    snapshot for the whole request. A failed build leaves the previous
+    snapshot in place.
+    """
+
+    def __init__(self, file_path: str, changes: Optional[ChangeLog] = None):
+        self.file_path = file_path
+        self.changes = changes
+        self.snapshot: Optional[GraphSnapshot] = None
+        self.metrics = {
+            "version": 0,
+            "reloads": 0,
+            "refreshes": 0,
+            "failures": 0,
+            "last_reload_seconds": None,
+            "last_reload_at": None,
+            "last_error": None,
+        }
+        self._failed_stamp = None
+        self._lock = threading.Lock()  # one build at a time
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def current(self) -> GraphSnapshot:
+        """Return the published snapshot, loading the first one if needed"""
+        snapshot = self.snapshot
+        if snapshot is None:
+            snapshot = self.load()
+        return snapshot
+
+    def load(self) -> GraphSnapshot:
+        """Build a snapshot from the file and publish it (blocking)"""
+        with self._lock:
+            start = time.perf_counter()
+            version = self.metrics["version"] + 1
+            try:
+                snapshot = build_graph_snapshot(self.file_path, version, self.changes)
+            except Exception as e:
+                # Do not retry a broken file until it changes again
+                self._failed_stamp = graph_file_stamp(self.file_path)
+                self.metrics["failures"] += 1
+                self.metrics["last_error"] = str(e)
+                raise
+
+            self.snapshot = snapshot
+            self.metrics["version"] = version
+            self.metrics["reloads"] += 1
+            self.metrics["last_reload_seconds"] = time.perf_counter() - start
+            self.metrics["last_reload_at"] = time.time()
+            self.metrics["last_error"] = None
+            return snapshot
+
+    def refresh(self) -> Optional[GraphSnapshot]:
+        """
+        Rebuild the published snapshot with the latest booth changes from its
+        own graph, without reading the file (blocking)
+        """
+        with self._lock:
+            base = self.snapshot
+            if base is None:
+                # Unloaded, the next load applies the changes
+                return None
+            version = self.metrics["version"] + 1
+            overrides, _ = self.changes.overrides() if self.changes else ({}, 0)
+            if any(
+                set(fields) - set(overrides.get(label, {}))
+                for label, fields in base.overrides.items()
+            ):
+                # A cleared field takes its value from the file again
+                snapshot = build_graph_snapshot(self.file_path, version, self.changes)
+                if snapshot.stamp == base.stamp:
+                    snapshot = snapshot._replace(layout_version=base.layout_version)
+            else:
+                market = MarketGraph(base.graph.copy(), base.elements, base.booths)
+                # Changes do not move booths, so the router is reused
+                snapshot = derive_graph_snapshot(
+                    market,
+                    version,
+                    base.stamp,
+                    self.changes,
+                    router=base.router,
+                    layout_version=base.layout_version,
+                )
+            self.snapshot = snapshot
+            self.metrics["version"] = version
+            self.metrics["refreshes"] += 1
+            return snapshot
+
+    def unload(self) -> None:
+        """Drop the published snapshot, the next current() builds a new one"""
+        with self._lock:
+            self.snapshot = None
+
+    def schedule_refresh(self, delay: float) -> None:
+        """Refresh once, delay seconds after the first of a burst of changes"""
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_later(delay))
+
+    def cancel_refresh(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+
+    async def _refresh_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        # Changes from now on schedule another refresh
+        self._refresh_task = None
+        try:
+            await asyncio.to_thread(self.refresh)
+        except Exception as e:
+            print(f"WARNING: Failed to apply booth changes: {e}")
+
+    def is_stale(self) -> bool:
+        """Whether the file changed since the published snapshot was built"""
+        stamp = graph_file_stamp(self.file_path)
+        current = self.snapshot.stamp if self.snapshot is not None else None
+        return stamp != current and stamp != self._failed_stamp
+
+    async def reload(self) -> GraphSnapshot:
+        """Build and publish a snapshot off the event loop"""
+        return await asyncio.to_thread(self.load)
+
+
+def make_venue(name: str, file_path: str) -> Venue:
+    changes = change_store.log(name)
+    store = GraphStore(file_path, changes)
+    # Changes from this worker or polled from the others
+    changes.listener = lambda: store.schedule_refresh(CHANGE_REFRESH_DELAY)
+    return Venue(
+        name,
+        store,
+        RouteCache(ROUTE_CACHE_SIZE, ROUTE_CACHE_TTL),
+        changes,
+    )
+
+
+change_store = ChangeStore(CHANGES_DB, CHANGE_LOG_SIZE)
+_change_poll_task = None
+
+
+venue_registry = VenueRegistry(
+    VENUES_DIR,
+    make_venue(DEFAULT_VENUE, FILE),
+    make_venue,
+    int(VENUE_MEMORY_BUDGET_MB * 2**20),
+    # First path segments of the unscoped routes cannot name a venue
+    reserved={"admin", "analytics", "venues"}
+    | {path.split("/")[2] for path in VENUE_ROUTES},
+)
+# The default venue's store and booth changes
+graph_store = venue_registry.default.store
+booth_changes = venue_registry.default.changes
+_graph_watch_task = None
+work_pool = WorkPool(EXECUTOR_WORKERS, ENDPOINT_LIMITS)
+
+
+# Read when /metrics is scraped, nothing is updated per request
+CallbackMetric(
+    "marketmap_graph_version",
+    "Version of the published graph snapshot.",
+    lambda: graph_store.metrics["version"],
+)
+CallbackMetric(
+    "marketmap_graph_reloads_total",
+    "Graph snapshots built, by result.",
+    lambda: {
+        ("success",): graph_store.metrics["reloads"],
+        ("failure",): graph_store.metrics["failures"],
+    },
+    ["result"],
+    type="counter",
+)
+CallbackMetric(
+    "marketmap_graph_last_reload_seconds",
+    "Build time of the published graph snapshot.",
+    lambda: graph_store.metrics["last_reload_seconds"],
+)
+CallbackMetric(
+    "marketmap_route_cache_entries",
+    "Paths held by the route caches of all venues.",
+    lambda: sum(len(venue.route_cache) for venue in venue_registry.venues()),
+)
+CallbackMetric(
+    "marketmap_route_cache_events_total",
+    "Route cache lookups and removals by kind, over all venues.",
+    lambda: {
+        (event,): sum(
+            getattr(venue.route_cache, counter) for venue in venue_registry.venues()
         )
-        if geometry is not None:
-            width = float(geometry.get("width", 30.0))
-            height = float(geometry.get("height", 30.0))
-
-            G.nodes[node_id]["width"] = width
-            G.nodes[node_id]["height"] = height
-
-
-def apply_default_attributes(G):
-    node_default = G.graph["node_default"]
-    edge_default = G.graph["edge_default"]
-
-    # Find rectangular(booths) nodes connected to multiple nodes
-    # some are acceptable in specific cases, but not in general
-    # rectangle_connections = {}
-    # for node, attrs in G.nodes(data=True):
-    #     if attrs.get("shape_type") == "rectangle":
-    #         rectangle_connections[node] = set()
-    #         for neighbor in G.neighbors(node):
-    #             neighbor_type = G.nodes[neighbor].get("shape_type", "unknown")
-    #             rectangle_connections[node].add(neighbor_type)
-    #
-    # for node, types in rectangle_connections.items():
-    #     if len(types) > 1:
-    #         node_label = G.nodes[node].get("label", "unknown")
-    #         print(
-    #             f"Rectangle node {node_label} is connected to multiple node types: {', '.join(types)}"
-    #         )
-
-    # Find all pairs of nodes with multiple edges
-    multi_edges = []
-    for u, v in G.edges():
-        if G.number_of_edges(u, v) > 1:
-            multi_edges.append((u, v))
-
-    if multi_edges:
-        for u, v in multi_edges:
-            print(f"Nodes {u}, {v} have {G.number_of_edges(u, v)} edges between them\n")
-        raise ValueError(
-            "Multiple edges detected between nodes, multiple edges not supported"
+        for event, counter in (
+            ("hit", "hits"),
+            ("miss", "misses"),
+            ("eviction", "evictions"),
+            ("expiration", "expirations"),
+            ("invalidation", "invalidations"),
         )
+    },
+    ["event"],
+    type="counter",
+)
+CallbackMetric(
+    "marketmap_booth_changes_version",
+    "Version of the last runtime booth change of the default venue.",
+    lambda: booth_changes.version,
+)
+CallbackMetric(
+    "marketmap_booth_change_streams",
+    "Open server-sent event streams of booth changes, over all venues.",
+    lambda: sum(
+        venue.changes.stats()["subscribers"] for venue in venue_registry.venues()
+    ),
+)
+CallbackMetric(
+    "marketmap_venues_loaded",
+    "Venues with a loaded graph snapshot.",
+    lambda: len(venue_registry.loaded()),
+)
+CallbackMetric(
+    "marketmap_venue_memory_bytes",
+    "Estimated memory of the loaded venue snapshots.",
+    venue_registry.memory,
+)
+CallbackMetric(
+    "marketmap_venue_events_total",
+    "Venue snapshots loaded on demand or at startup, and unloaded for memory.",
+    lambda: {
+        ("load",): venue_registry.loads,
+        ("eviction",): venue_registry.evictions,
+    },
+    ["event"],
+    type="counter",
+)
+CallbackMetric(
+    "marketmap_route_table_rows",
+    "Source rows built in the route table of the default venue.",
+    lambda: (
+        len(graph_store.snapshot.router)
+        if graph_store.snapshot is not None
+        and isinstance(graph_store.snapshot.router, RouteTable)
+        else None
+    ),
+)
+CallbackMetric(
+    "marketmap_work_pool_jobs",
+    "Jobs per endpoint waiting for or running on the work pool.",
+    lambda: {
+        (endpoint, state): stats[state]
+        for endpoint, stats in work_pool.stats()["endpoints"].items()
+        for state in ("queued", "running")
+    },
+    ["endpoint", "state"],
+)
+CallbackMetric(
+    "marketmap_work_pool_rejected_total",
+    "Jobs refused because the endpoint queue was full.",
+    lambda: {
+        (endpoint,): stats["rejected"]
+        for endpoint, stats in work_pool.stats()["endpoints"].items()
+    },
+    ["endpoint"],
+    type="counter",
+)
+
+
+# Initialize DB on startup
+init_analytics_db(ANALYTICS_SCHEMA, partitioned=True)
+analytics_writer = AnalyticsWriter(
+    db_path, schema=ANALYTICS_SCHEMA, partitions=partition_dir
+)
+_analytics_rotate_task = None
+
+
+async def rotate_analytics(interval: float) -> None:
+    """Archive the analytics partitions older than ANALYTICS_KEEP_DAYS"""
+    while True:
+        try:
+            archives = await asyncio.to_thread(
+                rotate_partitions,
+                partition_dir,
+                archive_dir,
+                ANALYTICS_KEEP_DAYS,
+                ANALYTICS_ARCHIVE_FORMAT,
+            )
+            for archive in archives:
+                print(f"Archived analytics partition to {archive}")
+        except Exception as e:
+            print(f"WARNING: Failed to archive analytics partitions: {e}")
+        await asyncio.sleep(interval)
+
+
+CallbackMetric(
+    "marketmap_analytics_buffer_depth",
+    "Analytics events buffered and not yet written.",
+    lambda: analytics_writer.depth,
+)
+CallbackMetric(
+    "marketmap_analytics_events_total",
+    "Analytics events by outcome.",
+    lambda: {
+        ("submitted",): analytics_writer.submitted,
+        ("written",): analytics_writer.written,
+        ("rejected",): analytics_writer.rejected,
+        ("failed",): analytics_writer.failed,
+    },
+    ["outcome"],
+    type="counter",
+)
+CallbackMetric(
+    "marketmap_analytics_partitions",
+    "Days of raw analytics events not yet archived.",
+    lambda: len(partition_days(partition_dir)),
+)
+
+
+def prepare_graph(file_path: str):
+    return load_market_graph(file_path).graph
 
-    for node in G.nodes():
-        attrs = node_default | G.nodes[node]
-        nx.set_node_attributes(G, {node: attrs})
 
-    for u, v in G.edges():
-        edge_attrs = G.edges[u, v]
-        attrs = edge_default | edge_attrs
-        nx.set_edge_attributes(G, {(u, v): attrs})
+def normalize_label(label: str) -> str:
+    """Normalize a label the same way import_booth_names.py does"""
+    return label.strip().lower().replace("-", "")
 
 
-# Find a node by its label attribute
-def find_node_by_label(G, target_label):
-    for node, attrs in G.nodes(data=True):
-        if attrs.get("label") == target_label:
-            return node
-    return None
+def build_label_index(G) -> Dict[str, str]:
+    """
+    Map booth labels and vendor names to node ids.
+
+    Keys are the raw label, the normalized label, the vendor name and the
+    normalized vendor name. On collisions the earlier kind wins, and for vendor
+    names the main booth wins over its extensions.
+    """
+    index = {}
+    nodes = sorted(
+        G.nodes(data=True), key=lambda node: node[1].get("extension", "0") != "0"
+    )
+
+    # Walkway nodes carry whitespace labels, which would otherwise match a
+    # blank or punctuation-only target
+    for node, attrs in nodes:
+        label = attrs.get("label")
+        if label and label.strip():
+            index.setdefault(label, node)
+    for node, attrs in nodes:
+        label = attrs.get("label")
+        if label and normalize_label(label):
+            index.setdefault(normalize_label(label), node)
+
+    default_name = G.graph["node_default"].get("name")
+    for node, attrs in nodes:
+        name = attrs.get("name")
+        if name and name.strip() and name != default_name:
+            index.setdefault(name, node)
+    for node, attrs in nodes:
+        name = attrs.get("name")
+        if name and normalize_label(name) and name != default_name:
+            index.setdefault(normalize_label(name), node)
+
+    return index
+
+
+# Find a node by its label, normalized label or vendor name
+def find_node_by_label(label_index, target_label):
+    if not normalize_label(target_label):
+        return None
+    node = label_index.get(target_label)
+    if node is None:
+        node = label_index.get(normalize_label(target_label))
+    return node
 
 
 def load_graphml_to_cytoscape(file_path: str) -> Dict:
@@ -185,50 +694,7 @@ def load_graphml_to_cytoscape(file_path: str) -> Dict:
     Load GraphML file and convert to Cytoscape.js format
     """
     try:
-        G = prepare_graph(file_path)
-
-        # Convert to Cytoscape.js format
-        elements = {"nodes": [], "edges": []}
-
-        # Add nodes with their positions and data
-        for node in G.nodes(data=True):
-            top_y = float(node[1].get("y", 0))
-            node_height = float(node[1].get("height", 0))
-            center_y = top_y + (node_height / 2)
-
-            left_x = float(node[1].get("x", 0))
-            node_width = float(node[1].get("width", 0))
-            center_x = left_x + (node_width / 2)
-
-            node_data = {
-                "data": {
-                    "id": str(node[0]),
-                    "label": node[1].get("label", str(node[0])),
-                    "width": node[1].get("width", 30),
-                    "height": node[1].get("height", 30),
-                    "shape_type": node[1].get("shape_type", "rhomboid"),
-                    "name": node[1].get("name", "no_name"),
-                    "category": node[1].get("category", "no_cat").lower(),
-                    "extension": node[1].get("extension", "no_ext").lower(),
-                },
-                "position": {"x": center_x, "y": center_y},
-                "pannable": "true",
-            }
-            elements["nodes"].append(node_data)
-
-        # Add edges
-        for edge in G.edges(data=True):
-            edge_data = {
-                "data": {
-                    "id": f"edge_{edge[0]}_{edge[1]}",
-                    "source": str(edge[0]),
-                    "target": str(edge[1]),
-                }
-            }
-            elements["edges"].append(edge_data)
-
-        return elements
-
+        return load_market_graph(file_path).elements
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -238,109 +704,472 @@ def load_booths(file_path: str) -> List:
     Load GraphML file and return booths
     """
     try:
-        G = prepare_graph(file_path)
-        booths = []
-        for node_id, attrs in G.nodes(data=True):
-            booth = {"id": str(node_id)}
-            for k, v in attrs.items():
-                booth[k] = v.lower() if k == "category" else v
-            booths.append(booth)
-
-        return booths
+        return load_market_graph(file_path).booths
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.exception_handler(PoolFull)
+async def pool_full_handler(request: Request, exc: PoolFull):
+    """Shed load with 503 when an endpoint has too many requests queued"""
+    return JSONResponse(
+        status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"}
+    )
+
+
 @app.post("/api/analytics/batch")
 async def log_analytics_batch(batch: AnalyticsBatch):
     """Endpoint to receive batched analytics logs from frontend"""
-    conn = sqlite3.connect(str(db_path))
-    cursor = conn.cursor()
+    # Extract session_id from context if available
+    session_id = "unknown"
+    session_context = "{}"
+
+    if batch.sessionContext:
+        session_context = json.dumps(batch.sessionContext)
+        session_id = batch.sessionContext.get("sessionId", "unknown")
+
+    # Only queue the events, the analytics writer stores them in the background
+    received_at = time.time()
+    rows = [
+        (
+            session_id,
+            event.type,
+            event.event,
+            event.data,
+            event.timestamp,
+            received_at,
+            session_context,
+        )
+        for event in batch.events
+    ]
+    if not analytics_writer.submit(rows):
+        raise HTTPException(
+            status_code=503,
+            detail="Analytics buffer is full, try again later",
+            headers={"Retry-After": "5"},
+        )
 
-    try:
-        # Use a transaction for better performance
-        cursor.execute("BEGIN TRANSACTION")
-
-        # Extract session_id from context if available
-        session_id = "unknown"
-        session_context = "{}"
-
-        if batch.sessionContext:
-            session_context = json.dumps(batch.sessionContext)
-            session_id = batch.sessionContext.get("sessionId", "unknown")
-
-        for event in batch.events:
-            cursor.execute(
-                "INSERT INTO analytics (session_id, type, event, data, timestamp, received_at, session_context) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                (
-                    session_id,
-                    event.type,
-                    event.event,
-                    json.dumps(event.data),
-                    event.timestamp,
-                    datetime.now().isoformat(),
-                    session_context,
-                ),
-            )
+    return {"success": True, "count": len(batch.events)}
 
-        cursor.execute("COMMIT")
-        return {"success": True, "count": len(batch.events)}
 
+@app.get("/api/analytics/summary")
+async def get_analytics_summary(hours: int = 24, limit: int = 10):
+    """Hourly counts for the last `hours` hours plus top booths and routes"""
+    try:
+        return await work_pool.run(
+            "analytics_summary",
+            analytics_summary,
+            db_path,
+            time.time() - hours * 3600,
+            limit,
+        )
+    except PoolFull:
+        raise
     except Exception as e:
-        cursor.execute("ROLLBACK")
         raise HTTPException(
-            status_code=500, detail=f"Failed to store analytics: {str(e)}"
+            status_code=500, detail=f"Failed to read analytics: {str(e)}"
         )
 
-    finally:
-        conn.close()
+
+async def open_venue(request: Request) -> Venue:
+    """The venue named in the path, loaded, or the default venue"""
+    name = request.path_params.get("venue_id", DEFAULT_VENUE)
+    try:
+        opened = await venue_registry.open(name)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load {name}: {e}")
+    if opened is None:
+        raise HTTPException(status_code=404, detail=f"Venue not found: {name}")
+    venue, request.state.snapshot = opened
+    return venue
+
+
+async def venue_snapshot(
+    request: Request, venue: Venue = Depends(open_venue)
+) -> GraphSnapshot:
+    """
+    The snapshot open_venue loaded, used for the whole request even if the
+    venue is unloaded meanwhile
+    """
+    return request.state.snapshot
+
+
+@app.get("/api/venues")
+async def get_venues():
+    """Names of the venues, the default one served by the unscoped routes first"""
+    return {"default": DEFAULT_VENUE, "venues": venue_registry.names()}
 
 
 @app.get("/api/graph")
-async def get_graph():
-    """API endpoint to get the graph data"""
-    global _cytoscape_elements_cache
+async def get_graph(
+    request: Request,
+    bbox: Optional[str] = None,
+    snapshot: GraphSnapshot = Depends(venue_snapshot),
+):
+    """
+    API endpoint to get the graph data.
 
+    With bbox=min_x,min_y,max_x,max_y only the nodes centered in the box are
+    returned, with the edges touching them and those edges' other ends.
+    """
+    if bbox is not None:
+        box = parse_bbox(bbox)
+        return with_changes_version(
+            JSONResponse(snapshot.tiles.query(*box)), snapshot
+        )
     try:
-        # Return cached data if available
-        if _cytoscape_elements_cache is not None:
-            return _cytoscape_elements_cache
-
-        # Fallback to loading fresh data
-        graph_data = load_graphml_to_cytoscape(FILE)
-        return graph_data
+        return with_changes_version(snapshot.graph_payload.response(request), snapshot)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def with_changes_version(response: Response, snapshot: GraphSnapshot) -> Response:
+    """Tell the client the last booth change in the payload, for ?since="""
+    response.headers["X-Changes-Version"] = str(snapshot.changes_version)
+    return response
+
+
+def parse_bbox(bbox: str) -> List[float]:
+    try:
+        box = [float(value) for value in bbox.split(",")]
+    except ValueError:
+        box = []
+    if (
+        len(box) != 4
+        or not all(math.isfinite(value) for value in box)
+        or box[0] > box[2]
+        or box[1] > box[3]
+    ):
+        raise HTTPException(
+            status_code=422, detail="bbox must be min_x,min_y,max_x,max_y"
+        )
+    return box
+
+
+@app.get("/api/tiles")
+async def get_tiles(
+    request: Request, snapshot: GraphSnapshot = Depends(venue_snapshot)
+):
+    """Tile size, map bounds and the tiles that hold nodes, with their ETags"""
+    return with_changes_version(snapshot.tiles.manifest.response(request), snapshot)
+
+
+@app.get("/api/tiles/{tile_x}/{tile_y}")
+async def get_tile(
+    tile_x: int,
+    tile_y: int,
+    request: Request,
+    snapshot: GraphSnapshot = Depends(venue_snapshot),
+):
+    """Nodes centered in one tile, the edges touching them and their other ends"""
+    payload = snapshot.tiles.payloads.get((tile_x, tile_y))
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Tile not found")
+    return with_changes_version(payload.response(request), snapshot)
+
+
 @app.get("/api/booths")
-async def get_booths():
+async def get_booths(
+    request: Request, snapshot: GraphSnapshot = Depends(venue_snapshot)
+):
     """API endpoint to get the booth data"""
     try:
-        booth_data = load_booths(FILE)
-        return booth_data
+        return with_changes_version(snapshot.booths_payload.response(request), snapshot)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/shortest-path/-/{start_label:path}/-/{end_label:path}")
-async def get_shortest_path(start_label: str, end_label: str):
-    global _prepared_graph_cache
+@app.get("/api/booths/changes")
+async def get_booth_changes(since: int, venue: Venue = Depends(open_venue)):
+    """Booth changes after the X-Changes-Version of the client's payloads"""
+    changes = await venue.changes.since(since)
+    if changes is None:
+        raise HTTPException(status_code=410, detail=CHANGES_GONE)
+    return {"version": venue.changes.version, "changes": changes}
 
-    # Use cached graph if available
-    if _prepared_graph_cache is not None:
-        G = _prepared_graph_cache
-    else:
-        G = prepare_graph(FILE)
 
-    start_node = find_node_by_label(G, start_label)
-    end_node = find_node_by_label(G, end_label)
-    path = nx.shortest_path(G, start_node, end_node, weight="weight")
+@app.get("/api/booths/changes/stream")
+async def stream_booth_changes(
+    since: Optional[int] = None,
+    last_event_id: Optional[str] = Header(None),
+    venue: Venue = Depends(open_venue),
+):
+    """
+    Server-sent events with every booth change as it happens. Changes after
+    Last-Event-ID (on reconnect) or since are sent first.
+    """
+    if last_event_id is not None:
+        try:
+            since = int(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=422, detail="Invalid Last-Event-ID")
+
+    # since() applies the changes polled from other workers, subscribe right
+    # after it so none is sent twice or missed
+    backlog = []
+    if since is not None:
+        backlog = await venue.changes.since(since)
+        if backlog is None:
+            raise HTTPException(status_code=410, detail=CHANGES_GONE)
+    subscriber = venue.changes.subscribe()
+
+    return StreamingResponse(
+        change_events(venue.changes, subscriber, backlog),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def change_events(changes: ChangeLog, subscriber, backlog: List[Dict]):
+    try:
+        for change in backlog:
+            yield encode_event(change)
+        while True:
+            if subscriber.lagging and subscriber.queue.empty():
+                # Events were dropped, the client reconnects with Last-Event-ID
+                return
+            try:
+                event = await asyncio.wait_for(
+                    subscriber.queue.get(), CHANGE_STREAM_KEEPALIVE
+                )
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            if event is None:
+                return
+            yield event
+    finally:
+        changes.unsubscribe(subscriber)
 
+
+@app.get("/api/search")
+async def search_booths(
+    q: str = "",
+    category: Optional[str] = None,
+    limit: int = 20,
+    snapshot: GraphSnapshot = Depends(venue_snapshot),
+):
+    """
+    Booths matching every word of q by label, vendor name, category or
+    description, tolerating typos, with match counts per category
+    """
+    if not 1 <= limit <= MAX_SEARCH_RESULTS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"limit must be between 1 and {MAX_SEARCH_RESULTS}",
+        )
+    with STAGE_SECONDS.time("search"):
+        return snapshot.search.search(q, category, limit)
+
+
+@app.get("/api/shortest-path/-/{start_label:path}/-/{end_label:path}")
+async def get_shortest_path(
+    start_label: str,
+    end_label: str,
+    venue: Venue = Depends(open_venue),
+    snapshot: GraphSnapshot = Depends(venue_snapshot),
+):
+
+    with STAGE_SECONDS.time("label_lookup"):
+        start_node = find_node_by_label(snapshot.label_index, start_label)
+        end_node = find_node_by_label(snapshot.label_index, end_label)
+    if start_node is None:
+        raise HTTPException(status_code=404, detail=f"Booth not found: {start_label}")
+    if end_node is None:
+        raise HTTPException(status_code=404, detail=f"Booth not found: {end_label}")
+
+    # Popular routes are served from the cache without touching the pool
+    path = venue.route_cache.get(snapshot.layout_version, start_node, end_node)
+    if path is None:
+        try:
+            path = await work_pool.run(
+                "shortest_path", find_path, snapshot, start_node, end_node
+            )
+        except nx.NetworkXNoPath as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        venue.route_cache.put(snapshot.layout_version, start_node, end_node, path)
     return {"path": path}
 
 
+def find_path(snapshot: GraphSnapshot, start_node: str, end_node: str) -> List[str]:
+    with STAGE_SECONDS.time("path_search"):
+        if snapshot.router is not None:
+            return snapshot.router.path(start_node, end_node)
+        return nx.shortest_path(snapshot.graph, start_node, end_node, weight="weight")
+
+
+@app.post("/api/route-plan")
+async def get_route_plan(
+    plan: RoutePlanRequest, snapshot: GraphSnapshot = Depends(venue_snapshot)
+):
+    """Visiting order and stitched path for an origin and a list of booths"""
+    if len(plan.stops) > MAX_ROUTE_STOPS:
+        raise HTTPException(
+            status_code=422, detail=f"At most {MAX_ROUTE_STOPS} stops are supported"
+        )
+
+    label_index = snapshot.label_index
+
+    # Resolve every label, remembering which label the client used per node
+    labels_by_node = {}
+    with STAGE_SECONDS.time("label_lookup"):
+        for label in [plan.origin] + plan.stops:
+            node = find_node_by_label(label_index, label)
+            if node is None:
+                raise HTTPException(
+                    status_code=404, detail=f"Booth not found: {label}"
+                )
+            labels_by_node.setdefault(node, label)
+        origin = find_node_by_label(label_index, plan.origin)
+        stops = [find_node_by_label(label_index, label) for label in plan.stops]
+
+    try:
+        order, path, distance = await work_pool.run(
+            "route_plan",
+            plan_stops,
+            snapshot.graph,
+            origin,
+            stops,
+            plan.returnToOrigin,
+        )
+    except nx.NetworkXNoPath as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    return {
+        "order": [labels_by_node[node] for node in order],
+        "path": path,
+        "distance": distance,
+    }
+
+
+def plan_stops(G, origin: str, stops: List[str], return_to_origin: bool):
+    with STAGE_SECONDS.time("route_plan"):
+        return plan_route(
+            G,
+            origin,
+            stops,
+            return_to_origin=return_to_origin,
+            time_budget=ROUTE_PLAN_TIME_BUDGET,
+        )
+
+
+def check_admin_token(token: Optional[str]):
+    """Reject admin requests without the configured token"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if token is None or not hmac.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def find_venue(name: Optional[str]) -> Venue:
+    """The venue of an admin request's ?venue=, the default one without it"""
+    venue = venue_registry.get(name or DEFAULT_VENUE)
+    if venue is None:
+        raise HTTPException(status_code=404, detail=f"Venue not found: {name}")
+    return venue
+
+
+@app.get("/api/admin/venues")
+async def get_venues_status(x_admin_token: Optional[str] = Header(None)):
+    """Loaded venues with their estimated memory, and load/eviction counters"""
+    check_admin_token(x_admin_token)
+    return venue_registry.stats()
+
+
+@app.get("/api/admin/reload")
+async def get_reload_status(
+    venue: Optional[str] = None, x_admin_token: Optional[str] = Header(None)
+):
+    """Version and timing of the graph snapshot reloads"""
+    check_admin_token(x_admin_token)
+    return find_venue(venue).store.metrics
+
+
+@app.post("/api/admin/reload")
+async def reload_graph(
+    venue: Optional[str] = None, x_admin_token: Optional[str] = Header(None)
+):
+    """Rebuild a venue's graph snapshot from its file in the background"""
+    check_admin_token(x_admin_token)
+    target = find_venue(venue)
+    try:
+        await target.store.reload()
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Reload failed: {str(e)}")
+    venue_registry.touch(target)
+    return target.store.metrics
+
+
+@app.patch("/api/admin/booths/{label:path}")
+async def update_booth(
+    label: str,
+    update: BoothUpdate,
+    venue: Optional[str] = None,
+    x_admin_token: Optional[str] = Header(None),
+):
+    """Change a booth's status or vendor name at runtime and push it to clients"""
+    check_admin_token(x_admin_token)
+    fields = update.model_dump(exclude_unset=True)
+    if not fields:
+        raise HTTPException(status_code=422, detail="Nothing to update")
+
+    target, snapshot = await venue_registry.open(find_venue(venue).name)
+    node = find_node_by_label(snapshot.label_index, label)
+    if node is None:
+        raise HTTPException(status_code=404, detail=f"Booth not found: {label}")
+
+    # Changes are keyed by the drawn label so they survive map reloads
+    label = snapshot.graph.nodes[node].get("label") or node
+    return await target.changes.record(node, label, fields)
+
+
+@app.get("/api/admin/booths/changes")
+async def get_booth_changes_status(
+    venue: Optional[str] = None, x_admin_token: Optional[str] = Header(None)
+):
+    """Version, log size and stream subscribers of the booth change log"""
+    check_admin_token(x_admin_token)
+    return find_venue(venue).changes.stats()
+
+
+@app.get("/api/admin/pool")
+async def get_pool_status(x_admin_token: Optional[str] = Header(None)):
+    """Queue depth and counters of the work pool per endpoint"""
+    check_admin_token(x_admin_token)
+    return work_pool.stats()
+
+
+@app.get("/api/admin/route-cache")
+async def get_route_cache_status(
+    venue: Optional[str] = None, x_admin_token: Optional[str] = Header(None)
+):
+    """Size and hit/miss/eviction counters of the route cache"""
+    check_admin_token(x_admin_token)
+    return find_venue(venue).route_cache.stats()
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text exposition of this worker's metrics"""
+    return Response(
+        content=REGISTRY.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint for container orchestration"""
     return {"status": "healthy", "service": "flea-market-api"}
+
+
+# Venue-scoped copies of VENUE_ROUTES, e.g. /api/{venue_id}/graph. open_venue
+# reads venue_id from the path. Added last, so the fixed /api/admin/... and
+# /api/analytics/... routes match first.
+for route in list(app.routes):
+    if isinstance(route, APIRoute) and route.path in VENUE_ROUTES:
+        app.add_api_route(
+            "/api/{venue_id}" + route.path.removeprefix("/api"),
+            route.endpoint,
+            methods=list(route.methods),
+            name=f"venue_{route.name}",
+        )
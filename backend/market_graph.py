@@ -0,0 +1,270 @@
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, NamedTuple
+
+import networkx as nx
+
+from routing import node_center
+
+GRAPHML_NS = "{http://graphml.graphdrawing.org/xmlns}"
+Y_NS = "{http://www.yworks.com/xml/graphml}"
+# GraphML attr.type -> Python type, same mapping as networkx's GraphML reader
+GRAPHML_TYPES = {
+    "integer": int,
+    "int": int,
+    "long": int,
+    "float": float,
+    "double": float,
+    "boolean": bool,
+    "string": str,
+    "yfiles": str,
+}
+GRAPHML_BOOLS = {"true": True, "false": False, "0": False, "1": True}
+YFILES_NODE_TYPES = ("GenericNode", "ShapeNode", "SVGNode", "ImageNode")
+YFILES_EDGE_TYPES = (
+    "PolyLineEdge",
+    "SplineEdge",
+    "QuadCurveEdge",
+    "BezierEdge",
+    "ArcEdge",
+)
+
+
+class MarketGraph(NamedTuple):
+    """Everything the API serves, built from a single parse of the GraphML"""
+
+    graph: Any  # prepared, undirected NetworkX graph used for routing
+    elements: Dict  # Cytoscape format
+    booths: List
+
+
+def load_market_graph(file_path: str) -> MarketGraph:
+    """
+    Parse the GraphML file once and build the routing graph, the Cytoscape
+    elements and the booth list from it.
+
+    The graph matches nx.read_graphml(file_path).to_undirected() with default
+    attributes applied and node width/height taken from y:Geometry.
+    """
+    keys = {}
+    node_default = {}
+    edge_default = {}
+    graph_data = {}
+    nodes = []
+    edges = []
+    dimensions = {}
+    seen_edges = set()
+    multigraph = False
+
+    for _, elem in ET.iterparse(file_path):
+        tag = elem.tag
+        if tag == GRAPHML_NS + "key":
+            key_id, key = parse_graphml_key(elem)
+            keys[key_id] = key
+            default = elem.find(GRAPHML_NS + "default")
+            if default is not None:
+                value = decode_graphml_value(key["type"], default.text)
+                if key["for"] == "node":
+                    node_default[key["name"]] = value
+                elif key["for"] == "edge":
+                    edge_default[key["name"]] = value
+
+        elif tag == GRAPHML_NS + "node":
+            node_id = elem.get("id")
+            nodes.append((node_id, decode_data_elements(keys, elem)))
+            geometry = elem.find(f".//{Y_NS}Geometry")
+            if geometry is not None:
+                dimensions[node_id] = (
+                    float(geometry.get("width", 30.0)),
+                    float(geometry.get("height", 30.0)),
+                )
+            elem.clear()
+
+        elif tag == GRAPHML_NS + "edge":
+            source = elem.get("source")
+            target = elem.get("target")
+            attrs = decode_data_elements(keys, elem)
+            if elem.get("id"):
+                attrs["id"] = elem.get("id")
+            if (source, target) in seen_edges:
+                multigraph = True
+            seen_edges.add((source, target))
+            edges.append((source, target, attrs))
+            elem.clear()
+
+        elif tag == GRAPHML_NS + "graph":
+            graph_data = decode_data_elements(keys, elem)
+
+    # Parallel edges are kept so apply_default_attributes can report them
+    G = nx.MultiGraph() if multigraph else nx.Graph()
+    G.graph.update(node_default=node_default, edge_default=edge_default)
+    G.graph.update(graph_data)
+    G.add_nodes_from(nodes)
+    # Insert edges grouped by source node, as a converted directed graph would
+    node_order = {node_id: i for i, (node_id, _) in enumerate(nodes)}
+    edges.sort(key=lambda edge: node_order.get(edge[0], len(node_order)))
+    G.add_edges_from(edges)
+
+    apply_default_attributes(G)
+    for node_id, (width, height) in dimensions.items():
+        G.nodes[node_id]["width"] = width
+        G.nodes[node_id]["height"] = height
+
+    elements, booths = graph_to_payloads(G)
+    return MarketGraph(G, elements, booths)
+
+
+def parse_graphml_key(key_elem):
+    """Return the id and the name/type/domain of a GraphML <key> element"""
+    attr_name = key_elem.get("attr.name")
+    attr_type = key_elem.get("attr.type", "string")
+    if key_elem.get("yfiles.type") is not None:
+        attr_name = key_elem.get("yfiles.type")
+        attr_type = "yfiles"
+    if attr_name is None:
+        raise ValueError(f"Unknown key for id {key_elem.get('id')}.")
+
+    key = {
+        "name": attr_name,
+        "type": GRAPHML_TYPES[attr_type],
+        "for": key_elem.get("for"),
+    }
+    return key_elem.get("id"), key
+
+
+def decode_graphml_value(python_type, text: str):
+    if python_type is bool:
+        return GRAPHML_BOOLS[text.lower()]
+    return python_type(text)
+
+
+def decode_data_elements(keys, elem) -> Dict:
+    """Decode the <data> children of a GraphML element like networkx does"""
+    data = {}
+    for data_elem in elem.findall(GRAPHML_NS + "data"):
+        key_id = data_elem.get("key")
+        if key_id not in keys:
+            raise ValueError(f"Bad GraphML data: no key {key_id}")
+        key = keys[key_id]
+        text = data_elem.text
+
+        if len(data_elem) == 0:
+            if text is None:
+                data[key["name"]] = ""
+            else:
+                data[key["name"]] = decode_graphml_value(key["type"], text)
+            continue
+
+        # Subelements are yfiles graphics, pull out shape, position and label
+        node_label = None
+        generic_node = data_elem.find(Y_NS + "GenericNode")
+        if generic_node is not None:
+            data["shape_type"] = generic_node.get("configuration")
+        for node_type in YFILES_NODE_TYPES:
+            prefix = f"{Y_NS}{node_type}/{Y_NS}"
+            geometry = data_elem.find(prefix + "Geometry")
+            if geometry is not None:
+                data["x"] = geometry.get("x")
+                data["y"] = geometry.get("y")
+            if node_label is None:
+                node_label = data_elem.find(prefix + "NodeLabel")
+            shape = data_elem.find(prefix + "Shape")
+            if shape is not None:
+                data["shape_type"] = shape.get("type")
+        if node_label is not None:
+            data["label"] = node_label.text
+
+        for edge_type in YFILES_EDGE_TYPES:
+            edge_label = data_elem.find(f"{Y_NS}{edge_type}/{Y_NS}EdgeLabel")
+            if edge_label is not None:
+                data["label"] = edge_label.text
+                break
+
+    return data
+
+
+def apply_default_attributes(G):
+    node_default = G.graph["node_default"]
+    edge_default = G.graph["edge_default"]
+
+    # Find rectangular(booths) nodes connected to multiple nodes
+    # some are acceptable in specific cases, but not in general
+    # rectangle_connections = {}
+    # for node, attrs in G.nodes(data=True):
+    #     if attrs.get("shape_type") == "rectangle":
+    #         rectangle_connections[node] = set()
+    #         for neighbor in G.neighbors(node):
+    #             neighbor_type = G.nodes[neighbor].get("shape_type", "unknown")
+    #             rectangle_connections[node].add(neighbor_type)
+    #
+    # for node, types in rectangle_connections.items():
+    #     if len(types) > 1:
+    #         node_label = G.nodes[node].get("label", "unknown")
+    #         print(
+    #             f"Rectangle node {node_label} is connected to multiple node types: {', '.join(types)}"
+    #         )
+
+    # Find all pairs of nodes with multiple edges
+    multi_edges = []
+    for u, v in G.edges():
+        if G.number_of_edges(u, v) > 1:
+            multi_edges.append((u, v))
+
+    if multi_edges:
+        for u, v in multi_edges:
+            print(f"Nodes {u}, {v} have {G.number_of_edges(u, v)} edges between them\n")
+        raise ValueError(
+            "Multiple edges detected between nodes, multiple edges not supported"
+        )
+
+    # Merge defaults in place, attributes set on the element take precedence
+    for _, attrs in G.nodes(data=True):
+        for key, value in node_default.items():
+            attrs.setdefault(key, value)
+
+    for _, _, attrs in G.edges(data=True):
+        for key, value in edge_default.items():
+            attrs.setdefault(key, value)
+
+
+def graph_to_payloads(G):
+    """Build the Cytoscape elements and the booth list in one pass over G"""
+    elements = {"nodes": [], "edges": []}
+    booths = []
+
+    # Add nodes with their positions and data
+    for node_id, attrs in G.nodes(data=True):
+        center_x, center_y = node_center(attrs)
+
+        node_data = {
+            "data": {
+                "id": str(node_id),
+                "label": attrs.get("label", str(node_id)),
+                "width": attrs.get("width", 30),
+                "height": attrs.get("height", 30),
+                "shape_type": attrs.get("shape_type", "rhomboid"),
+                "name": attrs.get("name", "no_name"),
+                "category": attrs.get("category", "no_cat").lower(),
+                "extension": attrs.get("extension", "no_ext").lower(),
+            },
+            "position": {"x": center_x, "y": center_y},
+            "pannable": "true",
+        }
+        elements["nodes"].append(node_data)
+
+        booth = {"id": str(node_id)}
+        for k, v in attrs.items():
+            booth[k] = v.lower() if k == "category" else v
+        booths.append(booth)
+
+    # Add edges
+    for source, target in G.edges():
+        edge_data = {
+            "data": {
+                "id": f"edge_{source}_{target}",
+                "source": str(source),
+                "target": str(target),
+            }
+        }
+        elements["edges"].append(edge_data)
+
+    return elements, booths
@@ -0,0 +1,217 @@
+"""
+Minimal Prometheus metrics: histograms, scrape-time callbacks and the text
+exposition format, without a client library.
+
+Observing a histogram costs a bisect and a few increments under a lock, so
+the timers stay on in production. Values owned by other objects (buffer
+depth, cache counters, reload metrics) are read by callbacks when /metrics
+is scraped instead of being updated on every request.
+"""
+
+import bisect
+import threading
+from time import perf_counter
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Seconds, from 100us to 10s
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Registry:
+    """The metrics rendered by /metrics"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class Histogram:
+    """Latency histogram with one series per combination of label values"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Registry = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket (the last is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def time(self, *labels: str) -> "Timer":
+        """Context manager observing the duration of its with block"""
+        return Timer(self, labels)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            series = [
+                (labels, list(counts), total)
+                for labels, (counts, total) in self._series.items()
+            ]
+
+        lines = []
+        for labels, counts, total in sorted(series):
+            base = list(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    f"{self.name}_bucket{_labels(base + [('le', le)])} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_labels(base)} {total!r}")
+            lines.append(f"{self.name}_count{_labels(base)} {cumulative}")
+        return lines
+
+
+class Timer:
+    """Returned by Histogram.time(), half the cost of a @contextmanager"""
+
+    __slots__ = ("_histogram", "_labels", "_start")
+
+    def __init__(self, histogram: Histogram, labels: Tuple[str, ...]):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self):
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._histogram.observe(perf_counter() - self._start, *self._labels)
+
+
+class CallbackMetric:
+    """
+    A gauge or counter whose value is read when the metrics are scraped.
+
+    fn returns a number, or a dict from label value tuples to numbers.
+    Series whose value is None are skipped.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        fn: Callable,
+        labelnames: Sequence[str] = (),
+        type: str = "gauge",
+        registry: Registry = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.type = type
+        self._fn = fn
+        registry.register(self)
+
+    def collect(self) -> List[str]:
+        values = self._fn()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [
+            f"{self.name}{_labels(zip(self.labelnames, labels))} {float(value)!r}"
+            for labels, value in sorted(values.items())
+            if value is not None
+        ]
+
+
+def _labels(pairs) -> str:
+    pairs = list(pairs)
+    if not pairs:
+        return ""
+    body = ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs)
+    return "{" + body + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Stages of request handling, graph loading and analytics writing
+STAGE_SECONDS = Histogram(
+    "marketmap_stage_duration_seconds",
+    "Duration of instrumented processing stages.",
+    ["stage"],
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware observing request duration per route template"""
+
+    def __init__(self, app, histogram: Histogram):
+        self.app = app
+        self.histogram = histogram
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope, its template
+            # keeps the label count bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            self.histogram.observe(
+                perf_counter() - start, scope["method"], route, str(status)
+            )
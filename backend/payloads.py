@@ -0,0 +1,102 @@
+import gzip
+import hashlib
+import json
+from typing import Any, Dict
+
+import zstandard
+from fastapi import Request, Response
+
+GZIP_LEVEL = 9
+ZSTD_LEVEL = 10
+
+
+class PreparedPayload:
+    """
+    A JSON response body encoded once and served many times.
+
+    Holds the encoded JSON, gzip and zstd variants of it and a strong ETag
+    per variant. response() picks the variant from Accept-Encoding and
+    answers 304 when If-None-Match matches, so serving it never re-encodes
+    or re-compresses anything.
+    """
+
+    def __init__(self, content: Any):
+        # Same encoding as FastAPI's JSONResponse
+        self.body = json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+
+        self.variants: Dict[str, bytes] = {
+            "identity": self.body,
+            "gzip": gzip.compress(self.body, GZIP_LEVEL, mtime=0),
+            "zstd": zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(self.body),
+        }
+
+        # Strong ETags have to differ between encodings of the same body
+        self.etags = {
+            encoding: f'"{digest}-{encoding}"' for encoding in self.variants
+        }
+        self.etags["identity"] = f'"{digest}"'
+
+    def response(self, request: Request) -> Response:
+        encoding = self._choose_encoding(request.headers.get("accept-encoding", ""))
+        headers = {
+            "ETag": self.etags[encoding],
+            "Vary": "Accept-Encoding",
+            "Cache-Control": "no-cache",
+        }
+
+        if self._matches(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(
+            content=self.variants[encoding],
+            media_type="application/json",
+            headers=headers,
+        )
+
+    def _choose_encoding(self, accept_encoding: str) -> str:
+        accepted = set()
+        for item in accept_encoding.split(","):
+            coding, _, params = item.partition(";")
+            if _qvalue(params) > 0:
+                accepted.add(coding.strip().lower())
+
+        for encoding in ("zstd", "gzip"):
+            if encoding in accepted:
+                return encoding
+        return "identity"
+
+    def _matches(self, if_none_match: str) -> bool:
+        """Weak comparison against the ETag of any variant (RFC 9110)"""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        etags = set(self.etags.values())
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag in etags:
+                return True
+        return False
+
+
+def _qvalue(params: str) -> float:
+    """Return the q value of an Accept-Encoding item's parameters"""
+    for param in params.split(";"):
+        name, _, value = param.strip().partition("=")
+        if name.lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
@@ -0,0 +1,365 @@
+from array import array
+from collections import OrderedDict
+from heapq import heappop, heappush
+from itertools import count
+from time import monotonic, perf_counter
+from math import hypot, inf
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import networkx as nx
+
+# Shape types that represent booths (see clean_graph.py)
+BOOTH_SHAPES = ("rectangle", "hexagon", "roundrectangle")
+
+
+def node_center(attrs) -> Tuple[float, float]:
+    """Center of a node from its top-left x/y and its width/height"""
+    center_x = float(attrs.get("x", 0)) + float(attrs.get("width", 0)) / 2
+    center_y = float(attrs.get("y", 0)) + float(attrs.get("height", 0)) / 2
+    return center_x, center_y
+
+
+def booth_nodes(G) -> List[Hashable]:
+    """Return the ids of all booth nodes in the graph"""
+    return [
+        node
+        for node, attrs in G.nodes(data=True)
+        if attrs.get("shape_type") in BOOTH_SHAPES
+    ]
+
+
+class RouteTable:
+    """
+    Shortest-path predecessor table over a static graph.
+
+    Nodes are mapped to dense integer indices. For every source that has been
+    built, one array row holds the index of each node's predecessor on the
+    shortest-path tree rooted at that source (-1 for the source itself and for
+    unreachable nodes). A route lookup walks the row from the target back to
+    the source, so it costs O(path length) and never runs Dijkstra.
+
+    Rows are built eagerly with build() or lazily on first use of a source.
+    """
+
+    def __init__(self, G, weight: str = "weight"):
+        self._G = G
+        self._weight = weight
+        self.nodes: List[Hashable] = list(G.nodes())
+        self.index: Dict[Hashable, int] = {n: i for i, n in enumerate(self.nodes)}
+        # Smallest signed typecode that can hold every index plus the -1 sentinel
+        self._typecode = "h" if len(self.nodes) < 2**15 else "i"
+        self._rows: Dict[int, array] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def build(self, sources: Optional[Iterable[Hashable]] = None) -> None:
+        """Build rows for the given sources, or for every node if None"""
+        if sources is None:
+            sources = self.nodes
+        for source in sources:
+            self._row(self._node_index(source))
+
+    def nbytes(self) -> int:
+        """Approximate size of the built rows in bytes"""
+        return sum(row.itemsize * len(row) for row in self._rows.values())
+
+    def path(self, source: Hashable, target: Hashable) -> List[Hashable]:
+        """Return the shortest path from source to target as a list of node ids"""
+        source_idx = self._node_index(source)
+        target_idx = self._node_index(target)
+        row = self._row(source_idx)
+
+        indices = [target_idx]
+        current = target_idx
+        while current != source_idx:
+            current = row[current]
+            if current < 0:
+                raise nx.NetworkXNoPath(f"No path between {source} and {target}.")
+            indices.append(current)
+
+        return [self.nodes[i] for i in reversed(indices)]
+
+    def _node_index(self, node: Hashable) -> int:
+        try:
+            return self.index[node]
+        except KeyError:
+            raise nx.NodeNotFound(f"Node {node} not in G")
+
+    def _row(self, source_idx: int) -> array:
+        row = self._rows.get(source_idx)
+        if row is None:
+            row = array(self._typecode, [-1]) * len(self.nodes)
+            pred, _ = nx.dijkstra_predecessor_and_distance(
+                self._G, self.nodes[source_idx], weight=self._weight
+            )
+            for node, parents in pred.items():
+                if parents:
+                    row[self.index[node]] = self.index[parents[0]]
+            self._rows[source_idx] = row
+        return row
+
+
+class AStarRouter:
+    """
+    A* search with a straight-line heuristic on node centers.
+
+    Edge weights are walking costs, not pixels, so distances are converted
+    with the smallest weight per pixel over all edges. Every edge then costs
+    at least scale * its length, which keeps the heuristic admissible and
+    consistent and the paths as short as Dijkstra's.
+    """
+
+    def __init__(self, G, weight: str = "weight"):
+        self._G = G
+        self._weight = weight
+        self.centers = {node: node_center(attrs) for node, attrs in G.nodes(data=True)}
+        self.scale = self._heuristic_scale()
+
+    def heuristic(self, u: Hashable, v: Hashable) -> float:
+        (ux, uy), (vx, vy) = self.centers[u], self.centers[v]
+        return self.scale * hypot(ux - vx, uy - vy)
+
+    def path(self, source: Hashable, target: Hashable) -> List[Hashable]:
+        return nx.astar_path(
+            self._G, source, target, heuristic=self.heuristic, weight=self._weight
+        )
+
+    def _heuristic_scale(self) -> float:
+        scale = inf
+        for u, v, attrs in self._G.edges(data=True):
+            length = hypot(
+                self.centers[u][0] - self.centers[v][0],
+                self.centers[u][1] - self.centers[v][1],
+            )
+            if length > 0:
+                scale = min(scale, attrs.get(self._weight, 1) / length)
+        # No usable edge leaves a zero heuristic, which is plain Dijkstra
+        return 0.0 if scale == inf else scale
+
+
+class RouteCache:
+    """
+    LRU cache of shortest paths with a time to live.
+
+    The graph is undirected, so a path and its reverse share one entry keyed
+    on the ordered node pair, and a lookup in the other direction returns the
+    stored path reversed. Entries belong to one version of the graph's
+    layout: using a newer version drops them all, and results computed on an
+    older one are not stored.
+    """
+
+    def __init__(self, max_size: int = 4096, ttl: float = 3600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._version = None
+
+        # Counters, only for reporting
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self, version: int, source: Hashable, target: Hashable
+    ) -> Optional[List[Hashable]]:
+        """The cached path from source to target, None on a miss"""
+        if self.max_size <= 0 or not self._use_version(version):
+            self.misses += 1
+            return None
+
+        key, reverse = _pair_key(source, target)
+        entry = self._entries.get(key)
+        if entry is not None and self.ttl > 0 and monotonic() - entry[1] > self.ttl:
+            del self._entries[key]
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        path = entry[0]
+        return list(reversed(path)) if reverse else list(path)
+
+    def put(
+        self, version: int, source: Hashable, target: Hashable, path: List[Hashable]
+    ) -> None:
+        if self.max_size <= 0 or not self._use_version(version):
+            return
+        key, reverse = _pair_key(source, target)
+        stored = tuple(reversed(path)) if reverse else tuple(path)
+        self._entries[key] = (stored, monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry, e.g. when the graph is unloaded"""
+        if self._entries:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "version": self._version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    def _use_version(self, version: int) -> bool:
+        """Switch to a newer graph version, False for an outdated one"""
+        if self._version is None or version > self._version:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+            self._version = version
+        return version == self._version
+
+
+def _pair_key(source: Hashable, target: Hashable):
+    """Key for an unordered node pair and whether (source, target) is reversed"""
+    if source <= target:
+        return (source, target), False
+    return (target, source), True
+
+
+def terminal_dijkstra(G, source: Hashable, terminals, weight: str = "weight"):
+    """
+    Dijkstra from source that stops once every terminal is settled.
+
+    Returns (dist, pred) for the settled nodes. Terminals that cannot be
+    reached are simply missing from dist.
+    """
+    adj = G._adj
+    dist = {}
+    pred = {source: None}
+    seen = {source: 0.0}
+    remaining = set(terminals)
+    remaining.discard(source)
+    counter = count()
+    heap = [(0.0, next(counter), source)]
+
+    while heap:
+        d, _, node = heappop(heap)
+        if node in dist:
+            continue
+        dist[node] = d
+        remaining.discard(node)
+        if not remaining:
+            break
+        for neighbor, attrs in adj[node].items():
+            nd = d + attrs.get(weight, 1)
+            if neighbor not in dist and nd < seen.get(neighbor, inf):
+                seen[neighbor] = nd
+                pred[neighbor] = node
+                heappush(heap, (nd, next(counter), neighbor))
+
+    return dist, pred
+
+
+def plan_route(
+    G,
+    origin: Hashable,
+    stops: Iterable[Hashable],
+    return_to_origin: bool = False,
+    time_budget: float = 0.05,
+    weight: str = "weight",
+):
+    """
+    Order stops into a short walk from origin and stitch the full path.
+
+    Runs one terminal-bounded Dijkstra per terminal to get the pairwise
+    distances, builds a nearest-neighbour tour and improves it with 2-opt
+    until no move helps or time_budget seconds have passed.
+
+    Returns (order, path, distance) where order lists the stops in visiting
+    order. Raises nx.NetworkXNoPath if a stop cannot be reached.
+    """
+    deadline = perf_counter() + time_budget
+    stops = [stop for stop in dict.fromkeys(stops) if stop != origin]
+    terminals = [origin] + stops
+
+    searches = [terminal_dijkstra(G, t, terminals, weight) for t in terminals]
+    matrix = []
+    for i, (dist, _) in enumerate(searches):
+        row = []
+        for j, target in enumerate(terminals):
+            if target not in dist:
+                raise nx.NetworkXNoPath(
+                    f"No path between {terminals[i]} and {target}."
+                )
+            row.append(dist[target])
+        matrix.append(row)
+
+    tour = _nearest_neighbour_tour(matrix)
+    if return_to_origin:
+        tour.append(0)
+    tour = _two_opt(tour, matrix, deadline, closed=return_to_origin)
+
+    path = [origin]
+    for a, b in zip(tour, tour[1:]):
+        path.extend(_walk_back(searches[a][1], terminals[b])[1:])
+    distance = sum(matrix[a][b] for a, b in zip(tour, tour[1:]))
+    order = [terminals[i] for i in tour if i != 0]
+
+    return order, path, distance
+
+
+def _walk_back(pred, target) -> List[Hashable]:
+    path = [target]
+    while pred[path[-1]] is not None:
+        path.append(pred[path[-1]])
+    path.reverse()
+    return path
+
+
+def _nearest_neighbour_tour(matrix) -> List[int]:
+    unvisited = set(range(1, len(matrix)))
+    tour = [0]
+    while unvisited:
+        row = matrix[tour[-1]]
+        nearest = min(unvisited, key=lambda j: (row[j], j))
+        unvisited.remove(nearest)
+        tour.append(nearest)
+    return tour
+
+
+def _two_opt(tour: List[int], matrix, deadline: float, closed: bool) -> List[int]:
+    """
+    Reverse tour segments while that shortens the walk. The first node is
+    fixed, and so is the last one for a closed tour back to the origin.
+    """
+    last = len(tour) - 1 if closed else len(tour)
+    improved = True
+    while improved and perf_counter() < deadline:
+        improved = False
+        for i in range(1, last - 1):
+            a, b = tour[i - 1], tour[i]
+            for j in range(i + 1, last):
+                c = tour[j]
+                d = tour[j + 1] if j + 1 < len(tour) else None
+                before = matrix[a][b] + (matrix[c][d] if d is not None else 0)
+                after = matrix[a][c] + (matrix[b][d] if d is not None else 0)
+                if after < before - 1e-9:
+                    tour[i : j + 1] = reversed(tour[i : j + 1])
+                    improved = True
+                    break
+            if improved:
+                break
+    return tour
@@ -0,0 +1,259 @@
+"""
+In-memory booth search over label, vendor name, category and description.
+
+Field values are split into lowercase terms. A query term matches an indexed
+term exactly, as a prefix (a sorted term list and bisect) or within a small
+edit distance, found through a padded bigram index over the terms. Every
+query term has to match for a booth to be a result. Booths are ranked by how
+well and in which field their terms matched, main booths before extensions.
+"""
+
+import bisect
+import re
+from collections import Counter, OrderedDict, defaultdict
+from itertools import islice
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from routing import booth_nodes
+
+# Relative weight of a match in each field
+FIELD_WEIGHTS = {"label": 4.0, "name": 3.0, "category": 2.0, "description": 1.0}
+# Score of a match kind, fuzzy matches are divided by their edit distance
+EXACT, PREFIX, FUZZY = 1.0, 0.6, 0.4
+# Query terms whose matches are kept per index, most searches repeat
+MATCH_CACHE_SIZE = 1024
+
+TERM_RE = re.compile(r"[^\W_]+")
+
+
+def terms(text: str) -> List[str]:
+    """Lowercase alphanumeric runs of text"""
+    return TERM_RE.findall(text.lower())
+
+
+def max_typos(term: str) -> int:
+    """Edit distance tolerated for a query term, none for booth numbers"""
+    if len(term) < 3 or any(char.isdigit() for char in term):
+        return 0
+    return 1 if len(term) < 6 else 2
+
+
+def bigrams(term: str) -> List[str]:
+    padded = f"${term}$"
+    return [padded[i : i + 2] for i in range(len(padded) - 1)]
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance with transpositions, or limit + 1 past limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = None
+    row = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, row = previous, row, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            row[j] = min(previous[j] + 1, row[j - 1] + 1, previous[j - 1] + cost)
+            if (
+                before is not None
+                and j > 1
+                and a[i - 1] == b[j - 2]
+                and a[i - 2] == b[j - 1]
+            ):
+                row[j] = min(row[j], before[j - 2] + 1)
+        if min(row) > limit:
+            return limit + 1
+    return row[-1]
+
+
+class TermMatch(NamedTuple):
+    scores: Dict[int, float]  # doc -> best score of the term's matches
+    ranked: List[int]  # docs by descending score
+    facets: Counter  # category -> matching docs
+
+
+class SearchIndex:
+    """
+    Search index over the booths of a prepared graph.
+
+    Built once per graph load. Category facets (booth count per category and
+    the booths of each category) are precomputed, so filtering by category
+    and counting facets never scans the booths.
+    """
+
+    def __init__(self, G):
+        default_name = G.graph["node_default"].get("name")
+        nodes = sorted(
+            booth_nodes(G),
+            key=lambda node: (
+                G.nodes[node].get("extension", "0") != "0",
+                G.nodes[node].get("label", ""),
+            ),
+        )
+
+        self.docs: List[Dict] = []
+        # term -> {doc: best field weight of the term in that doc}
+        postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        category_docs: Dict[str, List[int]] = defaultdict(list)
+        for doc, node in enumerate(nodes):
+            attrs = G.nodes[node]
+            name = attrs.get("name")
+            if name == default_name:
+                name = None
+            category = (attrs.get("category") or "").lower()
+            self.docs.append(
+                {
+                    "id": str(node),
+                    "label": attrs.get("label"),
+                    "name": name,
+                    "category": category,
+                }
+            )
+            if category:
+                category_docs[category].append(doc)
+
+            fields = {
+                "label": attrs.get("label"),
+                "name": name,
+                "category": category,
+                "description": attrs.get("description"),
+            }
+            for field, value in fields.items():
+                if not value:
+                    continue
+                field_terms = terms(value)
+                if field == "label":
+                    # "A-12" is also found as "a12"
+                    field_terms.append("".join(field_terms))
+                weight = FIELD_WEIGHTS[field]
+                for term in field_terms:
+                    if postings[term].get(doc, 0.0) < weight:
+                        postings[term][doc] = weight
+
+        self._postings = dict(postings)
+        self._terms = sorted(self._postings)
+        self._bigrams: Dict[str, List[str]] = defaultdict(list)
+        for term in self._terms:
+            for gram in set(bigrams(term)):
+                self._bigrams[gram].append(term)
+
+        self._category_lists = dict(category_docs)
+        self._category_docs = {
+            category: frozenset(docs) for category, docs in category_docs.items()
+        }
+        self.facets = {
+            category: len(docs) for category, docs in sorted(category_docs.items())
+        }
+        self._doc_categories = [doc["category"] for doc in self.docs]
+        self._matches: "OrderedDict[str, TermMatch]" = OrderedDict()
+
+    def search(
+        self, query: str, category: Optional[str] = None, limit: int = 20
+    ) -> Dict:
+        """
+        Ranked booths matching every term of query.
+
+        facets counts the matches per category before the category filter is
+        applied. An empty query lists the booths of category, or all booths.
+        """
+        category = category.lower() if category else None
+        query_terms = terms(query)
+
+        if not query_terms:
+            if category is None:
+                docs = range(len(self.docs))
+            else:
+                docs = self._category_lists.get(category, [])
+            return {
+                "total": len(docs),
+                "results": [self._result(doc, 0.0) for doc in docs[:limit]],
+                "facets": self.facets,
+            }
+
+        matches = [self._match(term) for term in query_terms]
+        if len(matches) == 1:
+            scores, ranked, facets = matches[0]
+        else:
+            # Booths matching every term, starting from the rarest term
+            matches.sort(key=lambda match: len(match.scores))
+            scores = {
+                doc: sum(match.scores.get(doc, 0.0) for match in matches)
+                for doc in matches[0].scores
+                if all(doc in match.scores for match in matches[1:])
+            }
+            ranked = self._rank(scores)
+            facets = self._facets(scores)
+
+        if category is None:
+            total = len(scores)
+            best = ranked[:limit]
+        else:
+            allowed = self._category_docs.get(category, frozenset())
+            total = facets.get(category, 0)
+            best = list(islice((doc for doc in ranked if doc in allowed), limit))
+        return {
+            "total": total,
+            "results": [self._result(doc, scores[doc]) for doc in best],
+            "facets": dict(sorted(facets.items())),
+        }
+
+    def _match(self, query_term: str) -> "TermMatch":
+        """Best score per booth for one query term, cached per term"""
+        match = self._matches.get(query_term)
+        if match is not None:
+            self._matches.move_to_end(query_term)
+            return match
+
+        expansion = self._expand(query_term)
+        if len(expansion) == 1 and expansion[0][1] == EXACT:
+            # Whole words, the postings are the scores
+            scores = self._postings[expansion[0][0]]
+        else:
+            scores = {}
+            for term, kind in expansion:
+                for doc, weight in self._postings[term].items():
+                    score = kind * weight
+                    if score > scores.get(doc, 0.0):
+                        scores[doc] = score
+        match = TermMatch(scores, self._rank(scores), self._facets(scores))
+
+        self._matches[query_term] = match
+        if len(self._matches) > MATCH_CACHE_SIZE:
+            self._matches.popitem(last=False)
+        return match
+
+    def _expand(self, query_term: str) -> List[Tuple[str, float]]:
+        """Indexed terms matching query_term, with the score of the match kind"""
+        matches: Dict[str, float] = {}
+        start = bisect.bisect_left(self._terms, query_term)
+        for term in islice(self._terms, start, None):
+            if not term.startswith(query_term):
+                break
+            matches[term] = EXACT if term == query_term else PREFIX
+
+        typos = max_typos(query_term)
+        if typos:
+            grams = set(bigrams(query_term))
+            # Each edit breaks at most two of the padded bigrams
+            needed = len(grams) - 2 * typos
+            shared = Counter(
+                term for gram in grams for term in self._bigrams.get(gram, ())
+            )
+            for term, count in shared.items():
+                if count < needed or term in matches:
+                    continue
+                distance = edit_distance(query_term, term, typos)
+                if distance <= typos:
+                    matches[term] = FUZZY / distance
+        return list(matches.items())
+
+    @staticmethod
+    def _rank(scores: Dict[int, float]) -> List[int]:
+        """Docs by descending score, ties in index order (main booths first)"""
+        return sorted(sorted(scores), key=scores.__getitem__, reverse=True)
+
+    def _facets(self, scores: Dict[int, float]) -> Counter:
+        return Counter(map(self._doc_categories.__getitem__, scores))
+
+    def _result(self, doc: int, score: float) -> Dict:
+        return {**self.docs[doc], "score": round(score, 3)}
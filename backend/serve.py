@@ -0,0 +1,108 @@
+"""
+Serve the API from worker processes forked after the graph is loaded.
+
+`uvicorn --workers N` spawns fresh interpreters, so every worker builds its
+own graph, label index, router, payloads and search index. This builds the
+preloaded venues once, moves them out of the garbage collector's reach and
+forks WEB_CONCURRENCY workers that share those pages copy-on-write and accept
+on one listening socket. A snapshot a worker builds later, after a map reload,
+booth changes or for a venue loaded on demand, is that worker's own.
+
+A worker that exits unexpectedly is replaced by a new fork of the parent.
+
+Run from backend/:  uv run python serve.py [--host HOST] [--port PORT]
+"""
+
+import argparse
+import gc
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+import uvicorn
+
+import main as api
+
+# Seconds between checks for workers that exited
+SUPERVISE_INTERVAL = 0.5
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    # asyncio sets TCP_NODELAY on accepted connections only when the proto is
+    # explicit, otherwise small responses wait for delayed ACKs (~40 ms)
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(config: uvicorn.Config, sock: socket.socket) -> None:
+    # The parent's handlers only stop the workers
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers", type=int, default=int(os.environ.get("WEB_CONCURRENCY", "1"))
+    )
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    print(f"Loading {', '.join(api.VENUE_PRELOAD) or 'no venues'} before forking...")
+    api.venue_registry.preload(api.VENUE_PRELOAD)
+    # Collections in the workers would otherwise write to every tracked
+    # object's header, copying the pages they share with the parent
+    gc.collect()
+    gc.freeze()
+
+    sock = bind_socket(args.host, args.port)
+    config = uvicorn.Config(api.app, log_level=args.log_level)
+    context = multiprocessing.get_context("fork")
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    def fork_worker():
+        process = context.Process(target=run_worker, args=(config, sock))
+        process.start()
+        return process
+
+    workers = [fork_worker() for _ in range(max(args.workers, 1))]
+    print(
+        f"Serving on {args.host}:{args.port} with {len(workers)} workers "
+        f"(pids {', '.join(str(worker.pid) for worker in workers)})"
+    )
+    while not stopping:
+        time.sleep(SUPERVISE_INTERVAL)
+        for i, worker in enumerate(workers):
+            if not worker.is_alive() and not stopping:
+                print(
+                    f"WARNING: Worker {worker.pid} exited with {worker.exitcode}, "
+                    "forking a new one"
+                )
+                workers[i] = fork_worker()
+
+    for worker in workers:
+        worker.terminate()
+    for worker in workers:
+        worker.join()
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
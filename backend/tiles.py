@@ -0,0 +1,116 @@
+import math
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from payloads import PreparedPayload
+
+TileKey = Tuple[int, int]
+
+
+class TileIndex:
+    """
+    Uniform grid over the node centers of the Cytoscape elements.
+
+    Each tile holds the nodes whose center falls inside it and every edge
+    with an endpoint among them. The far endpoint of an edge that leaves the
+    tile is included too, so a tile renders on its own. Clients merging
+    tiles drop the repeated ids. Every tile is encoded once into a
+    PreparedPayload with its own ETag, and so is the manifest that lists them.
+    """
+
+    def __init__(self, elements: Dict, tile_size: float):
+        self.tile_size = tile_size
+        self._nodes = {node["data"]["id"]: node for node in elements["nodes"]}
+        self._node_tile: Dict[str, TileKey] = {}
+        self._tile_nodes: Dict[TileKey, List[Dict]] = defaultdict(list)
+        self._tile_edges: Dict[TileKey, List[Dict]] = defaultdict(list)
+
+        for node in elements["nodes"]:
+            key = self.tile_key(node["position"]["x"], node["position"]["y"])
+            self._node_tile[node["data"]["id"]] = key
+            self._tile_nodes[key].append(node)
+
+        for edge in elements["edges"]:
+            source = self._node_tile[edge["data"]["source"]]
+            target = self._node_tile[edge["data"]["target"]]
+            self._tile_edges[source].append(edge)
+            if target != source:
+                self._tile_edges[target].append(edge)
+
+        self.payloads: Dict[TileKey, PreparedPayload] = {
+            key: PreparedPayload(
+                {"tile": list(key), **self._elements(nodes, self._tile_edges[key])}
+            )
+            for key, nodes in self._tile_nodes.items()
+        }
+        self.manifest = PreparedPayload(self._manifest(elements))
+
+    def tile_key(self, x: float, y: float) -> TileKey:
+        return math.floor(x / self.tile_size), math.floor(y / self.tile_size)
+
+    def query(self, min_x: float, min_y: float, max_x: float, max_y: float) -> Dict:
+        """Elements whose node centers lie in the bounding box"""
+        first_x, first_y = self.tile_key(min_x, min_y)
+        last_x, last_y = self.tile_key(max_x, max_y)
+        area = (last_x - first_x + 1) * (last_y - first_y + 1)
+        if area > len(self._tile_nodes):
+            # Large boxes over a sparse grid, scan the occupied tiles only
+            keys = [
+                (tx, ty)
+                for tx, ty in self._tile_nodes
+                if first_x <= tx <= last_x and first_y <= ty <= last_y
+            ]
+        else:
+            keys = [
+                (tx, ty)
+                for tx in range(first_x, last_x + 1)
+                for ty in range(first_y, last_y + 1)
+                if (tx, ty) in self._tile_nodes
+            ]
+
+        nodes = []
+        edges = {}
+        for key in keys:
+            for node in self._tile_nodes[key]:
+                position = node["position"]
+                if min_x <= position["x"] <= max_x and min_y <= position["y"] <= max_y:
+                    nodes.append(node)
+            for edge in self._tile_edges[key]:
+                edges[edge["data"]["id"]] = edge
+
+        ids = {node["data"]["id"] for node in nodes}
+        touching = [
+            edge
+            for edge in edges.values()
+            if edge["data"]["source"] in ids or edge["data"]["target"] in ids
+        ]
+        return self._elements(nodes, touching)
+
+    def _elements(self, nodes: List[Dict], edges: List[Dict]) -> Dict:
+        """Cytoscape elements for nodes and edges plus the edges' far ends"""
+        ids = {node["data"]["id"] for node in nodes}
+        external = {}
+        for edge in edges:
+            for end in (edge["data"]["source"], edge["data"]["target"]):
+                if end not in ids:
+                    external.setdefault(end, self._nodes[end])
+        return {"nodes": nodes + list(external.values()), "edges": edges}
+
+    def _manifest(self, elements: Dict) -> Dict:
+        xs = [node["position"]["x"] for node in elements["nodes"]]
+        ys = [node["position"]["y"] for node in elements["nodes"]]
+        size = self.tile_size
+        return {
+            "tileSize": size,
+            "bounds": [min(xs), min(ys), max(xs), max(ys)] if xs else None,
+            "tiles": [
+                {
+                    "x": tx,
+                    "y": ty,
+                    "bbox": [tx * size, ty * size, (tx + 1) * size, (ty + 1) * size],
+                    "nodes": len(self._tile_nodes[(tx, ty)]),
+                    "etag": self.payloads[(tx, ty)].etags["identity"],
+                }
+                for tx, ty in sorted(self._tile_nodes)
+            ],
+        }
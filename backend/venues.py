@@ -0,0 +1,236 @@
+"""
+Several venues served by one process, each from its own GraphML file.
+
+The default venue is the map served at /api/graph and the other unscoped
+routes. Every <name>.graphml file in the venues directory is served at
+/api/<name>/graph and so on. A venue's snapshot is built on first use and,
+when the loaded venues are estimated to exceed the memory budget, the least
+recently used ones are dropped again. Their booth changes are kept and
+applied again when they are next loaded.
+"""
+
+import asyncio
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+VENUE_NAME = re.compile(r"[a-z0-9][a-z0-9_-]{0,63}")
+
+# Memory held by a loaded snapshot per node and per edge, on top of its
+# encoded payloads: the graph, Cytoscape elements and indexes. Measured with
+# tracemalloc at 1x, 10x and 50x the size of flea_market.graphml.
+ELEMENT_BYTES = 2048
+
+
+def snapshot_bytes(snapshot) -> int:
+    """Estimated memory held by a GraphSnapshot"""
+    payloads = [
+        snapshot.graph_payload,
+        snapshot.booths_payload,
+        snapshot.tiles.manifest,
+        *snapshot.tiles.payloads.values(),
+    ]
+    size = sum(len(body) for payload in payloads for body in payload.variants.values())
+    size += ELEMENT_BYTES * (
+        snapshot.graph.number_of_nodes() + snapshot.graph.number_of_edges()
+    )
+    # Route table rows, which grow as sources are used
+    nbytes = getattr(snapshot.router, "nbytes", None)
+    if nbytes is not None:
+        size += nbytes()
+    return size
+
+
+class Venue:
+    """The graph store, route cache and booth changes of one venue"""
+
+    def __init__(self, name: str, store: Any, route_cache: Any, changes: Any):
+        self.name = name
+        self.store = store  # GraphStore of the venue's file
+        self.route_cache = route_cache
+        self.changes = changes  # ChangeLog, kept while the venue is unloaded
+        self.size = 0  # estimated bytes of the snapshot it was last sized at
+        self._sized_version = None
+        self._load_lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.store.snapshot is not None
+
+    def measure(self) -> int:
+        """Estimate the memory of the published snapshot, once per version"""
+        snapshot = self.store.snapshot
+        if snapshot is None:
+            self.size = 0
+        elif snapshot.version != self._sized_version:
+            self.size = snapshot_bytes(snapshot)
+            self._sized_version = snapshot.version
+        return self.size
+
+    def unload(self) -> None:
+        """Drop the snapshot and cached routes, requests holding them finish"""
+        self.store.unload()
+        self.route_cache.clear()
+        self.size = 0
+        self._sized_version = None
+
+
+class VenueRegistry:
+    """
+    Venues by name with their snapshots loaded on demand.
+
+    Loaded venues are kept in least recently used order. After every load,
+    venues are unloaded from the front until the estimated memory of the rest
+    fits memory_budget bytes. The venue just opened is never unloaded, so one
+    venue larger than the budget is still served.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        default: Venue,
+        make_venue: Callable[[str, str], Venue],
+        memory_budget: int,
+        reserved: Iterable[str] = (),
+    ):
+        self.directory = directory
+        self.default = default
+        self.memory_budget = memory_budget
+        self.reserved = set(reserved)
+        self._make_venue = make_venue  # (name, GraphML path) -> Venue
+        self._venues: Dict[str, Venue] = {default.name: default}
+        # Loaded venues, most recently used last
+        self._loaded: "OrderedDict[str, Venue]" = OrderedDict()
+
+        # Counters, only for reporting
+        self.loads = 0
+        self.evictions = 0
+
+    def path(self, name: str) -> Optional[str]:
+        """GraphML file of a venue in the directory, None if there is none"""
+        if not VENUE_NAME.fullmatch(name) or name in self.reserved:
+            return None
+        path = os.path.join(self.directory, f"{name}.graphml")
+        return path if os.path.isfile(path) else None
+
+    def get(self, name: str) -> Optional[Venue]:
+        """The venue without loading it, None for an unknown name"""
+        venue = self._venues.get(name)
+        if venue is None:
+            path = self.path(name)
+            if path is None:
+                return None
+            venue = self._venues.setdefault(name, self._make_venue(name, path))
+        return venue
+
+    def names(self) -> List[str]:
+        """The default venue, then every venue in the directory"""
+        names = [self.default.name]
+        try:
+            files = sorted(os.listdir(self.directory))
+        except FileNotFoundError:
+            files = []
+        for file_name in files:
+            name, extension = os.path.splitext(file_name)
+            if extension != ".graphml" or name == self.default.name:
+                continue
+            if self.path(name):
+                names.append(name)
+        return names
+
+    def loaded(self) -> List[Venue]:
+        """Loaded venues, least recently used first"""
+        return list(self._loaded.values())
+
+    def venues(self) -> List[Venue]:
+        """Every venue opened so far, loaded or not"""
+        return list(self._venues.values())
+
+    async def open(self, name: str) -> Optional[Tuple[Venue, Any]]:
+        """
+        The venue and its published snapshot, loaded off the event loop if
+        needed, None for an unknown name. The caller keeps using that snapshot
+        even if the venue is unloaded meanwhile.
+        """
+        venue = self.get(name)
+        if venue is None:
+            return None
+        snapshot = venue.store.snapshot
+        if snapshot is None:
+            # Concurrent first requests wait for one build
+            async with venue._load_lock:
+                snapshot = venue.store.snapshot
+                if snapshot is None:
+                    snapshot = await asyncio.to_thread(venue.store.load)
+                    self.loads += 1
+        self.touch(venue)
+        return venue, snapshot
+
+    def preload(self, names: Iterable[str]) -> None:
+        """
+        Load venues at startup (blocking). The budget applies as usual, so
+        when they do not all fit the last ones stay loaded.
+        """
+        for name in names:
+            venue = self.get(name)
+            if venue is None:
+                print(f"WARNING: Unknown venue to preload: {name}")
+                continue
+            try:
+                if not venue.loaded:
+                    venue.store.load()
+                    self.loads += 1
+            except Exception as e:
+                print(f"WARNING: Failed to preload {name}: {e}")
+                continue
+            self.touch(venue)
+
+    def touch(self, venue: Venue) -> None:
+        """Mark the venue as most recently used and enforce the budget"""
+        self._loaded[venue.name] = venue
+        self._loaded.move_to_end(venue.name)
+        venue.measure()
+        self._evict(keep=venue)
+
+    def memory(self) -> int:
+        """Estimated bytes held by the loaded venues"""
+        return sum(venue.measure() for venue in self._loaded.values())
+
+    def _evict(self, keep: Venue) -> None:
+        while self.memory() > self.memory_budget and len(self._loaded) > 1:
+            name = next(name for name in self._loaded if name != keep.name)
+            self._loaded.pop(name).unload()
+            self.evictions += 1
+
+    async def watch(self, interval: float) -> None:
+        """Reload loaded venues whose file changed, checking every interval"""
+        while True:
+            await asyncio.sleep(interval)
+            for venue in list(self._loaded.values()):
+                try:
+                    if venue.loaded and venue.store.is_stale():
+                        print(f"Graph file of {venue.name} changed, reloading...")
+                        snapshot = await venue.store.reload()
+                        print(f"{venue.name} reloaded (version {snapshot.version})")
+                        venue.measure()
+                except Exception as e:
+                    print(f"WARNING: Failed to reload {venue.name}: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            "memoryBudget": self.memory_budget,
+            "memory": self.memory(),
+            "loads": self.loads,
+            "evictions": self.evictions,
+            # Least recently used first
+            "loaded": [
+                {
+                    "name": venue.name,
+                    "bytes": venue.size,
+                    "version": venue.store.metrics["version"],
+                }
+                for venue in self.loaded()
+            ],
+            "venues": self.names(),
+        }
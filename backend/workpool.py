@@ -0,0 +1,106 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class PoolFull(Exception):
+    """Raised by WorkPool.run when an endpoint's queue is full"""
+
+
+class EndpointLimit:
+    """Concurrency cap, queue bound and counters of one endpoint"""
+
+    def __init__(self, concurrency: int, max_queue: int):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+class WorkPool:
+    """
+    Runs blocking handler work on a bounded thread pool.
+
+    Each endpoint has its own limit on jobs running at once and on jobs
+    waiting for a slot, so one busy endpoint cannot take every thread or
+    queue without bound. run() raises PoolFull when the endpoint's queue is
+    full. With max_workers=0 jobs run inline on the event loop, as handlers
+    did before the pool existed.
+
+    The pool keeps the event loop free to answer cheap requests. Routing is
+    pure Python and holds the GIL, so throughput across cores comes from
+    running more worker processes, not from more threads.
+    """
+
+    def __init__(self, max_workers: int, limits: Dict[str, Tuple[int, int]]):
+        self.max_workers = max_workers
+        self._limits_config = limits
+        self._limits: Dict[str, EndpointLimit] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def start(self) -> None:
+        """Create the executor and the per-endpoint limits on the running loop"""
+        if self.max_workers > 0 and self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="work"
+            )
+        self._limits = {
+            name: EndpointLimit(concurrency, max_queue)
+            for name, (concurrency, max_queue) in self._limits_config.items()
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, endpoint: str, fn: Callable[..., T], *args) -> T:
+        """Run fn(*args) in the pool under the limits of endpoint"""
+        if self._executor is None:
+            return fn(*args)
+
+        limit = self._limits[endpoint]
+        if limit.queued >= limit.max_queue:
+            limit.rejected += 1
+            raise PoolFull(f"Too many pending {endpoint} requests")
+
+        limit.queued += 1
+        try:
+            await limit.semaphore.acquire()
+        finally:
+            limit.queued -= 1
+
+        limit.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            limit.running -= 1
+            limit.completed += 1
+            limit.semaphore.release()
+
+    def stats(self) -> Dict:
+        """Queue depth and counters per endpoint"""
+        return {
+            "max_workers": self.max_workers,
+            "queued": sum(limit.queued for limit in self._limits.values()),
+            "running": sum(limit.running for limit in self._limits.values()),
+            "endpoints": {
+                name: limit.stats() for name, limit in self._limits.items()
+            },
+        }
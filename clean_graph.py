@@ -4,44 +4,150 @@
 #     "lxml",
 # ]
 # ///
+"""
+Export the booths of a yEd GraphML file with their size in the label.
+
+Edges, non-booth nodes and the yEd graphics resources are dropped. The file
+is streamed with iterparse and every element is cleared once written, so
+memory stays flat whatever the size of the map. stream_graphml() is the
+reusable part: it copies a GraphML file through any element transform.
+
+    uv run clean_graph.py [SOURCE] [OUTPUT]
+"""
+
+import argparse
+import re
+from typing import BinaryIO, Callable, Optional
+
 from lxml import etree
 
-# Parse the XML file
-tree = etree.parse("./backend/flea_market.graphml")
-root = tree.getroot()
+GRAPHML_NS = "http://graphml.graphdrawing.org/xmlns"
+Y_NS = "http://www.yworks.com/xml/graphml"
 
 # Define namespace mapping
 namespaces = {
-    "graphml": "http://graphml.graphdrawing.org/xmlns",
-    "y": "http://www.yworks.com/xml/graphml",
+    "graphml": GRAPHML_NS,
+    "y": Y_NS,
 }
 
-graph = root.find(".//graphml:graph", namespaces)
+BOOTH_SHAPES = ["rectangle", "hexagon", "roundrectangle"]
+
+GRAPH = f"{{{GRAPHML_NS}}}graph"
+NODE = f"{{{GRAPHML_NS}}}node"
+EDGE = f"{{{GRAPHML_NS}}}edge"
+DATA = f"{{{GRAPHML_NS}}}data"
+RESOURCES = f"{{{Y_NS}}}Resources"
+
+# Receives each complete child of the root and of a graph, returns the
+# element to write or None to drop it
+Transform = Callable[[etree._Element], Optional[etree._Element]]
+
+NAMESPACE_DECLARATION = re.compile(rb'\sxmlns(?::([\w.-]+))?="([^"]*)"')
+
+
+def stream_graphml(source: str, output: BinaryIO, transform: Transform) -> None:
+    """
+    Copy GraphML from the source path to the output file through transform.
+
+    The root and graph elements are copied as they start, every other
+    element is passed to transform once it is complete and cleared after it
+    is written. Elements nested in a node, such as the graph of a group node,
+    reach transform as part of that node.
+    """
+    root_namespaces = {}
+    # Closing tags of the open root and graph elements
+    open_tags = []
+    depth = 0
+
+    def start_tag(elem) -> bytes:
+        shallow = etree.Element(elem.tag, elem.attrib, nsmap=elem.nsmap)
+        tag = _strip_namespaces(etree.tostring(shallow), root_namespaces)
+        return tag[: -len(b"/>")] + b">"
+
+    output.write(b"<?xml version='1.0' encoding='UTF-8'?>\n")
+    for event, elem in etree.iterparse(source, events=("start", "end", "comment")):
+        if event == "comment":
+            if depth <= 1:
+                comment = etree.tostring(elem, with_tail=False)
+                output.write(b"  " * depth + comment + b"\n")
+            continue
 
-# remove all edges
-if graph is not None:
-    for edge in graph.findall("graphml:edge", namespaces):
-        graph.remove(edge)
+        if event == "start":
+            depth += 1
+            if depth == 1 or (depth == 2 and elem.tag == GRAPH):
+                # Namespaces are declared once, on the root
+                tag = start_tag(elem)
+                if depth == 1:
+                    root_namespaces = {
+                        (prefix or "").encode(): uri.encode()
+                        for prefix, uri in elem.nsmap.items()
+                    }
+                output.write(b"  " * (depth - 1) + tag + b"\n")
+                name = tag[1:].split(maxsplit=1)[0].rstrip(b">")
+                open_tags.append(b"</" + name + b">")
+            continue
 
-for node in root.findall(".//graphml:node", namespaces):
-    shape_type = node.find(".//y:ShapeNode/y:Shape", namespaces)
+        depth -= 1
+        parent = elem.getparent()
+        if depth == 0 or (depth == 1 and elem.tag == GRAPH):
+            output.write(b"  " * depth + open_tags.pop() + b"\n")
+        elif depth == 1 or (depth == 2 and parent.tag == GRAPH):
+            result = transform(elem)
+            if result is not None:
+                body = etree.tostring(result, with_tail=False)
+                output.write(
+                    b"  " * depth + _strip_namespaces(body, root_namespaces) + b"\n"
+                )
+        else:
+            continue
 
+        # Free the element and the already written siblings before it
+        elem.clear()
+        if parent is not None:
+            while elem.getprevious() is not None:
+                del parent[0]
+
+
+def _strip_namespaces(serialized: bytes, declared) -> bytes:
+    """Drop namespace declarations of the first tag that the root already makes"""
+    end = serialized.index(b">")
+
+    def strip(match):
+        prefix = match.group(1) or b""
+        return b"" if declared.get(prefix) == match.group(2) else match.group(0)
+
+    return NAMESPACE_DECLARATION.sub(strip, serialized[:end]) + serialized[end:]
+
+
+def clean_booths(elem: etree._Element) -> Optional[etree._Element]:
+    """Transform keeping booth nodes, with their size in feet added to the label"""
+    if elem.tag == EDGE:
+        return None
+    if elem.tag == DATA and elem.find(RESOURCES) is not None:
+        return None
+    if elem.tag != NODE:
+        return elem
+
+    shape_type = elem.find(".//y:ShapeNode/y:Shape", namespaces)
     # remove non-booth nodes
-    if shape_type is None or shape_type.get("type") not in [
-        "rectangle",
-        "hexagon",
-        "roundrectangle",
-    ]:
-        graph.remove(node)
-    else:
-        node_label = node.find(".//y:NodeLabel", namespaces)
-        geometry = node.find(".//y:Geometry", namespaces)
-
-        if node_label is not None and geometry is not None:
-            width = int(float(geometry.get("width")) / 10)
-            height = int(float(geometry.get("height")) / 10)
-            original_label = node_label.text
-            new_label = f"{original_label} ({height}'x{width}')"
-            node_label.text = new_label
-
-tree.write("clean_flea_market.graphml", encoding="UTF-8", xml_declaration=True)
+    if shape_type is None or shape_type.get("type") not in BOOTH_SHAPES:
+        return None
+
+    node_label = elem.find(".//y:NodeLabel", namespaces)
+    geometry = elem.find(".//y:Geometry", namespaces)
+    if node_label is not None and geometry is not None:
+        width = int(float(geometry.get("width")) / 10)
+        height = int(float(geometry.get("height")) / 10)
+        original_label = node_label.text
+        node_label.text = f"{original_label} ({height}'x{width}')"
+    return elem
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("source", nargs="?", default="./backend/flea_market.graphml")
+    parser.add_argument("output", nargs="?", default="clean_flea_market.graphml")
+    args = parser.parse_args()
+
+    with open(args.output, "wb") as f:
+        stream_graphml(args.source, f, clean_booths)
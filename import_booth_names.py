@@ -5,216 +5,287 @@
 # ]
 # ///
 
+import argparse
 import csv
 import sys
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 from lxml import etree
 
+GRAPHML_NS = "http://graphml.graphdrawing.org/xmlns"
+Y_NS = "http://www.yworks.com/xml/graphml"
+NODE = f"{{{GRAPHML_NS}}}node"
+DATA = f"{{{GRAPHML_NS}}}data"
+SHAPE_NODE = f"{{{Y_NS}}}ShapeNode"
+NODE_LABEL = f"{{{Y_NS}}}NodeLabel"
 
-def update_booth_names(graphml_file, csv_file, output_file):
+# GraphML keys of the booth name and extension number, and their defaults
+NAME_KEY = "d4"
+EXTENSION_KEY = "d10"
+DEFAULT_NAME = "booth"
+DEFAULT_EXTENSION = "0"
+
+# (vendor name, extension number), None for a booth without a vendor
+Assignment = Optional[Tuple[str, str]]
+
+
+class BoothNode(NamedTuple):
+    node: etree._Element
+    label: Optional[str]  # label text as drawn, None without a label
+    key: Optional[str]  # normalized label
+    name: Optional[etree._Element]  # d4 data element
+    extension: Optional[etree._Element]  # d10 data element
+
+
+def normalize_label(label: str) -> str:
+    """Normalize a label: strip whitespace, lowercase and remove dashes"""
+    return label.strip().lower().replace("-", "")
+
+
+def load_mapping(csv_file, log=print):
+    """
+    Read vendor names and their booth labels from the CSV.
+
+    The first label of a row is the vendor's main booth (extension 0), the
+    following ones are extensions 1, 2, ... A label listed again overrides the
+    earlier row.
+
+    Returns (normalized label -> (vendor, extension), stats dict).
+    """
+    mapping: Dict[str, Tuple[str, str]] = {}
+    rows = 0
+    skipped_rows = []
+    duplicate_labels = []
+    vendor_booths: Dict[str, int] = {}
+
+    with open(csv_file, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            rows += 1
+            if "label" not in row or "name" not in row:
+                skipped_rows.append(rows)
+                log(f"Warning: Row {rows} missing 'label' or 'name' column")
+                continue
+
+            vendor_name = row["name"].strip()
+            labels = [label.strip() for label in row["label"].split(",")]
+            for index, original_label in enumerate(labels):
+                if not original_label:
+                    continue
+                label = normalize_label(original_label)
+                if label in mapping:
+                    duplicate_labels.append((rows, label, original_label, vendor_name))
+                mapping[label] = (vendor_name, str(index))
+                vendor_booths[vendor_name] = vendor_booths.get(vendor_name, 0) + 1
+
+    stats = {
+        "rows": rows,
+        "skipped_rows": skipped_rows,
+        "duplicate_labels": duplicate_labels,
+        "multi_booth_vendors": sum(1 for n in vendor_booths.values() if n > 1),
+    }
+    return mapping, stats
+
+
+def index_booths(root) -> Tuple[List[BoothNode], Dict[str, List[BoothNode]]]:
+    """
+    Collect every node with its name and extension elements in one pass.
+
+    Returns the nodes in document order and an index from normalized label
+    to the nodes drawn with it. Labels are read from the node's own
+    y:ShapeNode graphics.
+    """
+    booths = []
+    by_label: Dict[str, List[BoothNode]] = {}
+    for node in root.iter(NODE):
+        name = extension = label = None
+        for data in node.iterchildren(DATA):
+            key = data.get("key")
+            if key == NAME_KEY:
+                name = data
+            elif key == EXTENSION_KEY:
+                extension = data
+            for shape in data.iterchildren(SHAPE_NODE):
+                label_elem = next(shape.iterchildren(NODE_LABEL), None)
+                if label_elem is not None and label_elem.text:
+                    label = label_elem.text.strip()
+
+        key = normalize_label(label) if label else None
+        booth = BoothNode(node, label, key, name, extension)
+        booths.append(booth)
+        if key:
+            by_label.setdefault(key, []).append(booth)
+    return booths, by_label
+
+
+def stored_name(vendor_name: str, extension: str) -> str:
+    """Name written to a booth, extensions are marked as such"""
+    if extension == DEFAULT_EXTENSION:
+        return vendor_name
+    return f"{vendor_name} - Extension"
+
+
+def current_assignment(booth: BoothNode) -> Assignment:
+    name = booth.name.text if booth.name is not None else None
+    if not name or name == DEFAULT_NAME:
+        return None
+    extension = booth.extension.text if booth.extension is not None else None
+    return name, extension or DEFAULT_EXTENSION
+
+
+def describe(assignment: Assignment) -> str:
+    name, extension = assignment
+    if extension == DEFAULT_EXTENSION:
+        return name
+    return f"{name} [extension {extension}]"
+
+
+def data_element(booth: BoothNode, key: str) -> etree._Element:
+    """Append a data element for key to the node"""
+    elem = etree.SubElement(booth.node, DATA)
+    elem.set("key", key)
+    return elem
+
+
+def update_booth_names(
+    graphml_file, csv_file, output_file=None, dry_run=False, quiet=False
+):
     """
     Update booth names in a GraphML file based on a CSV mapping.
     Handles extension booths by marking them with extension field.
     Processes comma-separated booth labels in CSV.
 
+    Every booth not in the CSV is reset to the default name. The file is
+    parsed once and the nodes are indexed by normalized label, so all
+    mappings are applied in a single pass.
+
     Args:
         graphml_file (str): Path to the GraphML file
         csv_file (str): Path to the CSV file with name-label mappings
         output_file (str): Path to save the updated GraphML.
+        dry_run (bool): Print the vendor assignments that would be added,
+            changed and removed instead of writing the file.
+        quiet (bool): Only print errors, and the diff of a dry run.
     """
+    log = (lambda *args, **kwargs: None) if quiet else print
+
     if output_file is None:
         # Use more descriptive output filename
         output_file = graphml_file.replace(".graphml", "_updated.graphml")
 
-    # Step a: Parse the GraphML file
     try:
         tree = etree.parse(graphml_file)
-        root = tree.getroot()
-
-        # Extract namespaces from the root element
-        nsmap = root.nsmap
-        # Add y namespace if not present (for y:NodeLabel)
-        if "y" not in nsmap:
-            nsmap["y"] = "http://www.yworks.com/xml/graphml"
     except Exception as e:
         print(f"Error parsing GraphML file: {e}", file=sys.stderr)
         return False
 
-    # Clear all existing booth names and extensions
-    for node in tree.findall("//node", nsmap):
-        # Clear booth name (d4)
-        name_elem = node.find('./data[@key="d4"]', nsmap)
-        if name_elem is not None:
-            name_elem.text = "booth"
-
-        # Clear extension info (d10)
-        ext_elem = node.find('./data[@key="d10"]', nsmap)
-        if ext_elem is not None:
-            ext_elem.text = "0"
-
-    # Step b: Create mapping from CSV
-    label_to_name = {}
-    label_to_extension = {}  # Track extension number for each label
-    csv_row_count = 0
-    skipped_rows = []
-    duplicate_labels = []
-    used_mappings = set()  # Track which mappings are actually used
-
-    # Track vendor booths for extension processing
-    vendor_to_booths = {}  # Vendor name -> list of booth labels
-
     try:
-        with open(csv_file, "r", newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                csv_row_count += 1
-                if "label" in row and "name" in row:
-                    vendor_name = row["name"].strip()
-
-                    # Split label entries by comma
-                    label_entries = [label.strip() for label in row["label"].split(",")]
-
-                    # Process each booth label for this vendor
-                    for index, original_label in enumerate(label_entries):
-                        if not original_label:  # Skip empty entries
-                            continue
-
-                        # Normalize label: remove dashes, lowercase and strip whitespace
-                        normalized_label = original_label.lower().replace("-", "")
-
-                        # Check for duplicates
-                        if normalized_label in label_to_name:
-                            duplicate_labels.append(
-                                (
-                                    csv_row_count,
-                                    normalized_label,
-                                    original_label,
-                                    vendor_name,
-                                )
-                            )
-
-                        # Store mapping with appropriate extension number
-                        label_to_name[normalized_label] = vendor_name
-
-                        # First booth (index 0) gets extension=0, others get 1, 2, etc.
-                        if index == 0:
-                            label_to_extension[normalized_label] = "0"  # Main booth
-                        else:
-                            label_to_extension[normalized_label] = str(
-                                index
-                            )  # Extension booth
-
-                        # Group booths by vendor
-                        if vendor_name not in vendor_to_booths:
-                            vendor_to_booths[vendor_name] = []
-                        vendor_to_booths[vendor_name].append(normalized_label)
-                else:
-                    skipped_rows.append(csv_row_count)
-                    print(
-                        f"Warning: Row {csv_row_count} missing 'label' or 'name' column"
-                    )
-
-        print(
-            f"Loaded {len(label_to_name)} label-name mappings from {csv_row_count} CSV rows"
-        )
-        print(
-            f"Found {sum(1 for v in vendor_to_booths.values() if len(v) > 1)} vendors with multiple booths"
-        )
-
+        mapping, stats = load_mapping(csv_file, log)
     except Exception as e:
         print(f"Error reading CSV file: {e}", file=sys.stderr)
         return False
+    log(f"Loaded {len(mapping)} label-name mappings from {stats['rows']} CSV rows")
 
-    # Step c: Find and update nodes
-    nodes_updated = 0
-    nodes_total = 0
+    booths, by_label = index_booths(tree.getroot())
+    used_mappings = mapping.keys() & by_label.keys()
+
+    added: List[Tuple[str, Assignment]] = []
+    changed: List[Tuple[str, Assignment, Assignment]] = []
+    removed: List[Tuple[str, Assignment]] = []
     extension_booths = 0
+    nodes_updated = 0
 
-    # Find all nodes
-    nodes = root.findall(".//node", nsmap)
-
-    for node in nodes:
-        nodes_total += 1
-        # Find the node label within y:NodeLabel (inside y:ShapeNode)
-        shape_node = node.find(".//y:ShapeNode", nsmap)
-        if shape_node is not None:
-            label_elem = shape_node.find(".//y:NodeLabel", nsmap)
-
-            if label_elem is not None and label_elem.text:
-                # Extract and normalize the label text
-                original_label = label_elem.text.strip()
-                node_label = original_label.lower().replace("-", "").strip()
-
-                # Check if this label is in our mapping
-                if node_label in label_to_name:
-                    vendor_name = label_to_name[node_label]
-                    extension_value = label_to_extension[node_label]
-
-                    # Find or create the name element (d4)
-                    name_elem = node.find('./data[@key="d4"]', nsmap)
-                    if name_elem is None:
-                        name_elem = etree.SubElement(node, "data")
-                        name_elem.set("key", "d4")
-
-                    # Only create/update extension element (d10) if it's not the default value (0)
-                    if extension_value != "0":
-                        # Find or create extension element (d10)
-                        extension_elem = node.find('./data[@key="d10"]', nsmap)
-                        if extension_elem is None:
-                            extension_elem = etree.SubElement(node, "data")
-                            extension_elem.set("key", "d10")
-                        extension_elem.text = extension_value
-                        extension_booths += 1
-                        # Set name for extension booth
-                        name_elem.text = f"{vendor_name} - Extension"
-                        print(
-                            f"Booth {original_label} marked as extension {extension_value} for {vendor_name}"
-                        )
-                    else:
-                        # This is the main booth, don't create extension element as it's the default value
-                        name_elem.text = vendor_name
-                        print(
-                            f"Booth {original_label} set as main booth for {vendor_name}"
-                        )
-
-                    used_mappings.add(node_label)
-                    nodes_updated += 1
-
-    # Print CSV entries that weren't found in the GraphML
-    unused_mappings = set(label_to_name.keys()) - used_mappings
+    for booth in booths:
+        old = current_assignment(booth)
+        new = None
+        if booth.key in used_mappings:
+            vendor_name, extension = mapping[booth.key]
+            new = (stored_name(vendor_name, extension), extension)
+        where = booth.label or booth.node.get("id")
+        if new is None:
+            if old is not None:
+                removed.append((where, old))
+        elif old is None:
+            added.append((where, new))
+        elif old != new:
+            changed.append((where, old, new))
+
+        if new is not None:
+            nodes_updated += 1
+            extension_booths += new[1] != DEFAULT_EXTENSION
+        if dry_run:
+            continue
+
+        if new is None:
+            # Clear booth name and extension info
+            if booth.name is not None:
+                booth.name.text = DEFAULT_NAME
+            if booth.extension is not None:
+                booth.extension.text = DEFAULT_EXTENSION
+            continue
+
+        name_elem = booth.name
+        if name_elem is None:
+            name_elem = data_element(booth, NAME_KEY)
+        name_elem.text, extension = new
+        if extension == DEFAULT_EXTENSION:
+            if booth.extension is not None:
+                booth.extension.text = DEFAULT_EXTENSION
+        else:
+            extension_elem = booth.extension
+            if extension_elem is None:
+                extension_elem = data_element(booth, EXTENSION_KEY)
+            extension_elem.text = extension
+
+    if dry_run:
+        # The diff is the output of a dry run, printed even when quiet
+        for label, assignment in added:
+            print(f"+ {label}: {describe(assignment)}")
+        for label, old, new in changed:
+            print(f"~ {label}: {describe(old)} -> {describe(new)}")
+        for label, assignment in removed:
+            print(f"- {label}: {describe(assignment)}")
+
+    # CSV entries that weren't found in the GraphML
+    unused_mappings = sorted(mapping.keys() - used_mappings)
     if unused_mappings:
-        print("\nThe following CSV entries were not found in the GraphML file:")
+        log("\nThe following CSV entries were not found in the GraphML file:")
         for label in unused_mappings:
-            print(f"  - Label: '{label}', Name: '{label_to_name[label]}'")
-
-    # Print summary statistics
-    print("\nSummary:")
-    print(f"  - Total CSV rows: {csv_row_count}")
-    print(f"  - Total booth mappings: {len(label_to_name)}")
-    print(
-        f"  - Vendors with multiple booths: {sum(1 for v in vendor_to_booths.values() if len(v) > 1)}"
+            log(f"  - Label: '{label}', Name: '{mapping[label][0]}'")
+
+    log("\nSummary:")
+    log(f"  - Total CSV rows: {stats['rows']}")
+    log(f"  - Total booth mappings: {len(mapping)}")
+    log(f"  - Vendors with multiple booths: {stats['multi_booth_vendors']}")
+    log(f"  - Extension booths processed: {extension_booths}")
+    log(f"  - Mappings used (nodes updated): {len(used_mappings)}")
+    log(f"  - Mappings not used: {len(unused_mappings)}")
+    log(
+        f"  - Vendor assignments added: {len(added)}, changed: {len(changed)}, "
+        f"removed: {len(removed)}"
     )
-    print(f"  - Extension booths processed: {extension_booths}")
-    print(f"  - Mappings used (nodes updated): {len(used_mappings)}")
-    print(f"  - Mappings not used: {len(unused_mappings)}")
-    if skipped_rows:
-        print(
-            f"  - Rows skipped (missing columns): {len(skipped_rows)} - {skipped_rows}"
-        )
-    if duplicate_labels:
-        print(f"  - Duplicate normalized labels (overwritten): {len(duplicate_labels)}")
-        for row_num, norm_label, orig_label, name in duplicate_labels:
-            print(
-                f"    - Row {row_num}: '{orig_label}' (normalized to '{norm_label}') with name '{name}'"
+    if stats["skipped_rows"]:
+        skipped = stats["skipped_rows"]
+        log(f"  - Rows skipped (missing columns): {len(skipped)} - {skipped}")
+    if stats["duplicate_labels"]:
+        duplicates = stats["duplicate_labels"]
+        log(f"  - Duplicate normalized labels (overwritten): {len(duplicates)}")
+        for row_num, norm_label, orig_label, name in duplicates:
+            log(
+                f"    - Row {row_num}: '{orig_label}' (normalized to "
+                f"'{norm_label}') with name '{name}'"
             )
 
-    # Step d: Save the updated XML
+    if dry_run:
+        log("Dry run, nothing written")
+        return True
+
     try:
         tree.write(
             output_file, pretty_print=True, xml_declaration=True, encoding="UTF-8"
         )
-        print(
-            f"Successfully updated {nodes_updated} out of {nodes_total} nodes in {output_file}"
+        log(
+            f"Successfully updated {nodes_updated} out of {len(booths)} nodes "
+            f"in {output_file}"
         )
         return True
     except Exception as e:
@@ -223,15 +294,29 @@ def update_booth_names(graphml_file, csv_file, output_file):
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print(
-            "Usage: python update_booth_names.py <graphml_file> <csv_file> [output_file]"
-        )
-        sys.exit(1)
-
-    graphml_file = sys.argv[1]
-    csv_file = sys.argv[2]
-    output_file = sys.argv[3] if len(sys.argv) > 3 else None
+    parser = argparse.ArgumentParser(
+        description="Set booth vendor names in a GraphML file from a CSV"
+    )
+    parser.add_argument("graphml_file")
+    parser.add_argument("csv_file", help="CSV with 'name' and 'label' columns")
+    parser.add_argument(
+        "output_file", nargs="?", help="default: <graphml_file>_updated.graphml"
+    )
+    parser.add_argument(
+        "-n",
+        "--dry-run",
+        action="store_true",
+        help="print added, changed and removed vendor assignments, write nothing",
+    )
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="only print errors and the dry-run diff",
+    )
+    args = parser.parse_args()
 
-    if not update_booth_names(graphml_file, csv_file, output_file):
+    if not update_booth_names(
+        args.graphml_file, args.csv_file, args.output_file, args.dry_run, args.quiet
+    ):
         sys.exit(1)